@@ -0,0 +1,29 @@
+"""Add token_version to users for access token revocation
+
+Revision ID: b3c4d5e6f7a8
+Revises: f7e3c8d2b4a1
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3c4d5e6f7a8'
+down_revision = 'f7e3c8d2b4a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Embedded in access tokens; bumped whenever a user is deactivated or
+    # their role changes so previously issued tokens stop being accepted.
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,108 @@
+"""Partition attendance_records by month on marked_at
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d5e6f7a8b9'
+down_revision = 'b3c4d5e6f7a8'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+_FOREIGN_KEYS = [
+    ('timetable_id', 'timetables'),
+    ('student_id', 'users'),
+    ('enrollment_id', 'student_enrollments'),
+    ('teacher_id', 'users'),
+    ('division_id', 'divisions'),
+    ('batch_id', 'batches'),
+    ('location_id', 'locations'),
+]
+
+_INDEXES = [
+    ('ix_attendance_records_id', ['id']),
+    ('ix_attendance_records_student_id', ['student_id']),
+    ('idx_timetable_student_date', ['timetable_id', 'student_id', 'marked_at']),
+]
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_legacy(table: str) -> None:
+    op.execute(f'ALTER TABLE attendance_records RENAME TO {table}')
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT attendance_records_pkey TO {table}_pkey')
+    for name, _ in _INDEXES:
+        op.execute(f'ALTER INDEX IF EXISTS {name} RENAME TO {name}_old')
+
+
+def _finish_copy(table: str) -> None:
+    for column, referred in _FOREIGN_KEYS:
+        op.create_foreign_key(
+            f'attendance_records_{column}_fkey', 'attendance_records', referred, [column], ['id']
+        )
+    for name, columns in _INDEXES:
+        op.create_index(name, 'attendance_records', columns, unique=False)
+    op.execute('INSERT INTO attendance_records SELECT * FROM ' + table)
+    op.execute('ALTER SEQUENCE attendance_records_id_seq OWNED BY attendance_records.id')
+    op.execute(f'DROP TABLE {table}')
+
+
+def upgrade() -> None:
+    # Native range partitioning is Postgres-only; SQLite keeps the plain table.
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    _rename_legacy('attendance_records_unpartitioned')
+    op.execute(
+        'CREATE TABLE attendance_records ('
+        ' LIKE attendance_records_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS'
+        ') PARTITION BY RANGE (marked_at)'
+    )
+    # Unique constraints on a partitioned table must include the partition key.
+    op.execute('ALTER TABLE attendance_records ADD CONSTRAINT attendance_records_pkey PRIMARY KEY (id, marked_at)')
+
+    oldest = bind.execute(sa.text('SELECT min(marked_at) FROM attendance_records_unpartitioned')).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f'CREATE TABLE attendance_records_y{month.year:04d}m{month.month:02d} '
+            f"PARTITION OF attendance_records FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+    # Catches rows outside the maintained range instead of failing the insert.
+    op.execute('CREATE TABLE attendance_records_default PARTITION OF attendance_records DEFAULT')
+
+    _finish_copy('attendance_records_unpartitioned')
+
+
+def downgrade() -> None:
+    # Partitions already moved to the archive schema are not restored.
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    _rename_legacy('attendance_records_partitioned')
+    op.execute(
+        'CREATE TABLE attendance_records ('
+        ' LIKE attendance_records_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS'
+        ')'
+    )
+    op.execute('ALTER TABLE attendance_records ADD CONSTRAINT attendance_records_pkey PRIMARY KEY (id)')
+    _finish_copy('attendance_records_partitioned')
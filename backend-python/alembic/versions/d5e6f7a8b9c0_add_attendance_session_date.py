@@ -0,0 +1,115 @@
+"""Add session_date to attendance_records with a unique session-day index
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import logging
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e6f7a8b9c0'
+down_revision = 'c4d5e6f7a8b9'
+branch_labels = None
+depends_on = None
+
+UNIQUE_INDEX = 'uq_attendance_session_day'
+UNIQUE_COLUMNS = ['timetable_id', 'student_id', 'session_date']
+# Rows dropped to satisfy the unique index are copied here for review.
+DUPLICATES_TABLE = 'attendance_session_day_duplicates'
+
+# Every record of a session day after the one to keep: a student's own
+# PRESENT/LATE mark beats the auto-closer's ABSENT row
+# (device_info 'system:marked_absent'), and the latest mark wins among equals.
+_DUPLICATE_IDS = (
+    'SELECT id FROM ('
+    ' SELECT id, ROW_NUMBER() OVER ('
+    '  PARTITION BY timetable_id, student_id, session_date'
+    "  ORDER BY CASE status WHEN 'PRESENT' THEN 0 WHEN 'LATE' THEN 1 ELSE 2 END,"
+    "   CASE WHEN device_info = 'system:marked_absent' THEN 1 ELSE 0 END,"
+    '   marked_at DESC, id DESC'
+    ' ) AS position FROM attendance_records'
+    ') ranked WHERE position > 1'
+)
+
+
+def _partitions(bind) -> list[str]:
+    """Partitions of attendance_records, or [] when it is a plain table."""
+    if bind.dialect.name != 'postgresql':
+        return []
+    return list(bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'attendance_records' "
+        "AND p.relnamespace = current_schema()::regnamespace"
+    )).scalars())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.add_column('attendance_records', sa.Column('session_date', sa.Date(), nullable=True))
+
+    # marked_at is naive UTC; the session day is the campus calendar day.
+    if bind.dialect.name == 'postgresql':
+        bind.execute(
+            sa.text(
+                "UPDATE attendance_records SET session_date = "
+                "(marked_at AT TIME ZONE 'UTC' AT TIME ZONE :tz)::date"
+            ),
+            {'tz': os.getenv('CAMPUS_TIMEZONE', 'UTC')},
+        )
+    else:
+        op.execute('UPDATE attendance_records SET session_date = date(marked_at)')
+
+    # Session days marked more than once before the constraint existed keep
+    # their best record; the others are moved to DUPLICATES_TABLE.
+    duplicates = bind.execute(sa.text(f'SELECT count(*) FROM ({_DUPLICATE_IDS}) d')).scalar()
+    if duplicates:
+        # Left in place on downgrade; a later upgrade appends to it.
+        target = (
+            f'INSERT INTO {DUPLICATES_TABLE} '
+            if sa.inspect(bind).has_table(DUPLICATES_TABLE)
+            else f'CREATE TABLE {DUPLICATES_TABLE} AS '
+        )
+        op.execute(f'{target}SELECT * FROM attendance_records WHERE id IN ({_DUPLICATE_IDS})')
+        op.execute(f'DELETE FROM attendance_records WHERE id IN (SELECT id FROM {DUPLICATES_TABLE})')
+        logger.warning(
+            'Removed %d duplicate attendance records (same timetable, student and session day); '
+            'they were copied to %s for review',
+            duplicates,
+            DUPLICATES_TABLE,
+        )
+
+    with op.batch_alter_table('attendance_records') as batch_op:
+        batch_op.alter_column('session_date', existing_type=sa.Date(), nullable=False)
+
+    # A unique index on a partitioned table must contain the partition key
+    # (marked_at), which would make it useless here; each partition gets its
+    # own. All marks for a session day land in the same partition unless the
+    # session runs across UTC midnight at the end of a month.
+    partitions = _partitions(bind)
+    if partitions:
+        for partition in partitions:
+            op.create_index(f'{partition}_session_day_key', partition, UNIQUE_COLUMNS, unique=True)
+    else:
+        op.create_index(UNIQUE_INDEX, 'attendance_records', UNIQUE_COLUMNS, unique=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    partitions = _partitions(bind)
+    if partitions:
+        for partition in partitions:
+            op.drop_index(f'{partition}_session_day_key', table_name=partition)
+    else:
+        op.drop_index(UNIQUE_INDEX, table_name='attendance_records')
+    with op.batch_alter_table('attendance_records') as batch_op:
+        batch_op.drop_column('session_date')
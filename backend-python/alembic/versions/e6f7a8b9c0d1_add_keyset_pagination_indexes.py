@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f7a8b9c0d1'
+down_revision = 'd5e6f7a8b9c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pages are ordered by (marked_at, id) / (created_at, id) descending and
+    # resume after the previous page's last key; these make each page an
+    # index range scan. On the partitioned attendance table the indexes
+    # cascade to every partition.
+    op.create_index(
+        'ix_attendance_student_marked_id', 'attendance_records', ['student_id', 'marked_at', 'id'], unique=False
+    )
+    op.create_index('ix_attendance_marked_id', 'attendance_records', ['marked_at', 'id'], unique=False)
+    op.create_index(
+        'ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_created_id', table_name='notifications')
+    op.drop_index('ix_attendance_marked_id', table_name='attendance_records')
+    op.drop_index('ix_attendance_student_marked_id', table_name='attendance_records')
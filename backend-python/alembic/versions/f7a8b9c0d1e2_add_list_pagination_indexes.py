@@ -0,0 +1,38 @@
+"""Add indexes for paged CRUD listings
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a8b9c0d1e2'
+down_revision = 'e6f7a8b9c0d1'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_users_role_id', 'users', ['role', 'id']),
+    ('ix_student_enrollments_course_id_id', 'student_enrollments', ['course_id', 'id']),
+    ('ix_student_enrollments_branch_id_id', 'student_enrollments', ['branch_id', 'id']),
+    ('ix_student_enrollments_division_id_id', 'student_enrollments', ['division_id', 'id']),
+    ('ix_qr_codes_created_id', 'qr_codes', ['created_at', 'id']),
+    ('ix_qr_codes_timetable_created_id', 'qr_codes', ['timetable_id', 'created_at', 'id']),
+    ('ix_otp_codes_created_id', 'otp_codes', ['created_at', 'id']),
+    ('ix_otp_codes_timetable_created_id', 'otp_codes', ['timetable_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # List endpoints page by (sort column, id) within their filters; the QR
+    # and OTP tables grow with every code refresh and are listed newest first.
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,56 @@
+import ipaddress
+import logging
+from functools import lru_cache
+
+from fastapi import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger("smartattendance.request")
+
+
+@lru_cache(maxsize=1)
+def _trusted_networks() -> tuple:
+    networks = []
+    for item in (part.strip() for part in settings.TRUSTED_PROXIES.split(",")):
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning("Invalid trusted proxy skipped: %s", item)
+    return tuple(networks)
+
+
+def _is_trusted_peer(peer: str) -> bool:
+    networks = _trusted_networks()
+    if not networks:
+        return True
+    try:
+        address = ipaddress.ip_address(peer)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request: Request) -> str:
+    """Best-effort address of the end client.
+
+    Behind ``TRUSTED_PROXY_HOPS`` reverse proxies (nginx appends
+    ``$remote_addr`` to X-Forwarded-For), the client is the entry that many
+    hops from the right. Entries further left are client-supplied and are
+    never used. The header is ignored unless the direct peer is one of
+    ``TRUSTED_PROXIES`` (any peer when that list is empty).
+    """
+    peer = request.client.host if request.client else "unknown"
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops <= 0 or not _is_trusted_peer(peer):
+        return peer
+    forwarded = [
+        part.strip()
+        for part in request.headers.get("x-forwarded-for", "").split(",")
+        if part.strip()
+    ]
+    if len(forwarded) < hops:
+        return peer
+    return forwarded[-hops]
@@ -10,6 +10,71 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
     REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 10080))
     DATABASE_URL = os.getenv("DATABASE_URL")
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+    DB_POOL_SATURATION_LOG_SECONDS = float(os.getenv("DB_POOL_SATURATION_LOG_SECONDS", 30))
+    DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", 5))
+    DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", 5))
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 10))
+    DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", 5))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000))
+    DB_CONNECT_TIMEOUT_SECONDS = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", 5))
+    DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "smartattendance-api")
+    DB_KEEPALIVES_IDLE_SECONDS = int(os.getenv("DB_KEEPALIVES_IDLE_SECONDS", 30))
+    DB_KEEPALIVES_INTERVAL_SECONDS = int(os.getenv("DB_KEEPALIVES_INTERVAL_SECONDS", 10))
+    DB_KEEPALIVES_COUNT = int(os.getenv("DB_KEEPALIVES_COUNT", 3))
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "False").lower() == "true"
+
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 600))
+    IDEMPOTENCY_MAX_LOCAL_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_LOCAL_ENTRIES", 10000))
+
+    LIST_DEFAULT_LIMIT = int(os.getenv("LIST_DEFAULT_LIMIT", 100))
+    LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", 500))
+
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+    IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 50000))
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", 1000))
+    IMPORT_HASH_BATCH_SIZE = int(os.getenv("IMPORT_HASH_BATCH_SIZE", 25))
+
+    LOGIN_THROTTLE_WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", 900))
+    LOGIN_ACCOUNT_MAX_FAILURES = int(os.getenv("LOGIN_ACCOUNT_MAX_FAILURES", 5))
+    LOGIN_IP_MAX_FAILURES = int(os.getenv("LOGIN_IP_MAX_FAILURES", 500))
+    LOGIN_IP_PREFIX_MAX_FAILURES = int(os.getenv("LOGIN_IP_PREFIX_MAX_FAILURES", 0))
+    LOGIN_IP_PREFIX_CHARS = int(os.getenv("LOGIN_IP_PREFIX_CHARS", 3))
+    LOGIN_BACKOFF_BASE_SECONDS = int(os.getenv("LOGIN_BACKOFF_BASE_SECONDS", 2))
+    LOGIN_BACKOFF_MAX_SECONDS = int(os.getenv("LOGIN_BACKOFF_MAX_SECONDS", 900))
+
+    # Limits are "bucket=limit/period[/burst]" lists; see app/core/rate_limit.py.
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "auto")
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")
+    RATE_LIMITS_BY_ROLE = os.getenv("RATE_LIMITS_BY_ROLE", "")
+    RATE_LIMIT_MAX_LOCAL_KEYS = int(os.getenv("RATE_LIMIT_MAX_LOCAL_KEYS", 100000))
+    RATE_LIMIT_CLASS_CAPACITY = int(os.getenv("RATE_LIMIT_CLASS_CAPACITY", 120))
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+    TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", 1000))
+    LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", 1.0))
+    LOG_HOT_PATH_SAMPLE_RATE = float(os.getenv("LOG_HOT_PATH_SAMPLE_RATE", 0.05))
+    LOG_HOT_PATHS = os.getenv(
+        "LOG_HOT_PATHS",
+        "/health,/api/v1/attendance/mark,/api/v1/attendance/today,"
+        "/api/v1/auth/refresh,/api/v1/notifications/unread-count",
+    )
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+    DB_STRICT_LOADING = os.getenv("DB_STRICT_LOADING", "False").lower() == "true"
+
     DEBUG = os.getenv("debug", "False").lower() == "true"
     
     QR_DEFAULT_TTL_MINUTES = int(os.getenv("QR_DEFAULT_TTL_MINUTES", 10))
@@ -18,6 +83,29 @@ class Settings:
     
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
+    CAMPUS_TIMEZONE = os.getenv("CAMPUS_TIMEZONE", "UTC")
+    ACTIVE_SESSION_INDEX_TTL_SECONDS = int(os.getenv("ACTIVE_SESSION_INDEX_TTL_SECONDS", 60))
+    ENFORCE_SESSION_WINDOW = os.getenv("ENFORCE_SESSION_WINDOW", "False").lower() == "true"
+    SESSION_WINDOW_GRACE_MINUTES = int(os.getenv("SESSION_WINDOW_GRACE_MINUTES", 10))
+
+    # Location geofences are compiled into a grid index (app/services/geofence.py).
+    GEOFENCE_INDEX_TTL_SECONDS = int(os.getenv("GEOFENCE_INDEX_TTL_SECONDS", 60))
+    GEOFENCE_GRID_CELL_DEGREES = float(os.getenv("GEOFENCE_GRID_CELL_DEGREES", 0.01))
+
+    # attendance_records is range-partitioned by month on Postgres; see
+    # app/services/attendance_partitions.py.
+    ATTENDANCE_PARTITION_MONTHS_AHEAD = int(os.getenv("ATTENDANCE_PARTITION_MONTHS_AHEAD", 3))
+    ATTENDANCE_ARCHIVE_SCHEMA = os.getenv("ATTENDANCE_ARCHIVE_SCHEMA", "archive")
+    ACADEMIC_YEAR_START_MONTH = int(os.getenv("ACADEMIC_YEAR_START_MONTH", 7))
+    ATTENDANCE_HISTORY_LOOKBACK_DAYS = int(os.getenv("ATTENDANCE_HISTORY_LOOKBACK_DAYS", 400))
+
+    AUTO_CLOSE_ENABLED = os.getenv("AUTO_CLOSE_ENABLED", "False").lower() == "true"
+    AUTO_CLOSE_GRACE_MINUTES = int(os.getenv("AUTO_CLOSE_GRACE_MINUTES", 5))
+    AUTO_CLOSE_MAX_SLEEP_SECONDS = int(os.getenv("AUTO_CLOSE_MAX_SLEEP_SECONDS", 300))
+    AUTO_CLOSE_BATCH_SIZE = int(os.getenv("AUTO_CLOSE_BATCH_SIZE", 25))
+    AUTO_CLOSE_MAX_CONCURRENCY = int(os.getenv("AUTO_CLOSE_MAX_CONCURRENCY", 2))
+    AUTO_CLOSE_TIME_BUDGET_SECONDS = int(os.getenv("AUTO_CLOSE_TIME_BUDGET_SECONDS", 30))
+
     SMTP_HOST = os.getenv("SMTP_HOST", None)
     SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
     SMTP_USER = os.getenv("SMTP_USER", None)
@@ -1,12 +1,16 @@
-from typing import Optional, Generator
+from dataclasses import dataclass
+from typing import Iterable, Optional, Generator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.principal_cache import CurrentUser, principal_cache
+from app.core.read_replica import open_read_session
 from app.database.database import SessionLocal
-from app.database.user import User
-from app.security.jwt_token import decode_token
+from app.database.user import User, UserRole
+from app.security.jwt_token import decode_token, token_type
+from app.security.token_revocation import token_revocation
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -19,62 +23,178 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+def get_read_db() -> Generator[Session, None, None]:
+    """Session for routes that only read; on the replica when it is healthy."""
+    db = open_read_session()
     try:
-        payload = decode_token(token)
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except Exception:
+        yield db
+    finally:
+        db.close()
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    user_id: int
+    role: Optional[UserRole]
+    branch_id: Optional[int]
+    version: int
+
+
+def decode_claims(token: str) -> TokenClaims:
+    """Verify and parse an access token. Pure CPU: no database or Redis.
+
+    ``role`` is None for tokens issued before role claims were embedded.
+    Raises on an invalid, expired or malformed token, and on anything that
+    is not an access token (refresh tokens are signed with the same key).
+    """
+    payload = decode_token(token)
+    if token_type(payload) != "access":
+        raise ValueError("Not an access token")
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise ValueError("Token has no subject")
+    role = payload.get("role")
+    return TokenClaims(
+        user_id=int(user_id),
+        role=UserRole(role) if role else None,
+        branch_id=payload.get("branch_id"),
+        version=int(payload.get("ver", 0)),
+    )
+
+
+def peek_claims(request: Request) -> Optional[TokenClaims]:
+    """Claims of the request's bearer token, or None; decoded once per request.
+
+    Used by middleware (rate limiting) before routing, and reused by
+    ``get_token_claims`` so the signature is only checked once.
+    """
+    cached = getattr(request.state, "token_claims", None)
+    if cached is not None:
+        return cached[1]
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    claims = None
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_claims(token)
+        except Exception:
+            claims = None
+    request.state.token_claims = (token, claims)
+    return claims
+
+
+def get_token_claims(request: Request, token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """Decode the bearer token and apply the revocation check; no database access."""
+    cached = getattr(request.state, "token_claims", None)
+    if cached is not None and cached[0] == token:
+        claims = cached[1]
+    else:
+        try:
+            claims = decode_claims(token)
+        except Exception:
+            claims = None
+    if claims is None:
         raise HTTPException(status_code=401, detail="Invalid token or expired")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
+    if claims.version < token_revocation.min_version(claims.user_id):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return claims
+
+
+def load_principal(db: Session, user_id: int) -> Optional[CurrentUser]:
+    """Resolve a user id to a ``CurrentUser``, hitting the database only on a cache miss."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    row = (
+        db.query(
+            User.id,
+            User.role,
+            User.branch_id,
+            User.is_active,
+            User.username,
+            User.first_name,
+            User.last_name,
+        )
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    principal = CurrentUser.from_row(row)
+    principal_cache.set(principal)
+    return principal
+
+
+def get_current_user(
+    claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+) -> CurrentUser:
+    principal = load_principal(db, claims.user_id)
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+
+def get_current_user_model(
+    current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)
+) -> User:
+    """Load the full ORM ``User`` for routes that need more than the principal."""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role.value != "ADMIN":
-        raise HTTPException(status_code=403, detail="Admin access required")
+def authorize(
+    claims: TokenClaims, db: Session, allowed: Iterable[str], detail: str
+) -> CurrentUser:
+    """Reject on the token's role claim before touching the database, then
+    confirm against the (cached) principal."""
+    allowed = list(allowed)
+    if claims.role is not None and claims.role.value not in allowed:
+        raise HTTPException(status_code=403, detail=detail)
+    current_user = get_current_user(claims, db)
+    if current_user.role.value not in allowed:
+        raise HTTPException(status_code=403, detail=detail)
     return current_user
 
 
-def require_teacher(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role.value not in ["ADMIN", "TEACHER"]:
-        raise HTTPException(status_code=403, detail="Teacher access required")
-    return current_user
+def require_admin(
+    claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+) -> CurrentUser:
+    return authorize(claims, db, ["ADMIN"], "Admin access required")
 
 
-def require_teacher_or_admin(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role.value not in ["ADMIN", "TEACHER"]:
-        raise HTTPException(status_code=403, detail="Teacher or admin access required")
-    return current_user
+def require_teacher(
+    claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+) -> CurrentUser:
+    return authorize(claims, db, ["ADMIN", "TEACHER"], "Teacher access required")
 
 
-def require_student(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role.value not in ["STUDENT", "ADMIN"]:
-        raise HTTPException(status_code=403, detail="Student access required")
-    return current_user
+def require_teacher_or_admin(
+    claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+) -> CurrentUser:
+    return authorize(claims, db, ["ADMIN", "TEACHER"], "Teacher or admin access required")
+
+
+def require_student(
+    claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+) -> CurrentUser:
+    return authorize(claims, db, ["STUDENT", "ADMIN"], "Student access required")
 
 
 def require_role(*allowed_roles):
-    def check_role(current_user: User = Depends(get_current_user)) -> User:
-        role_strings = [r.value if hasattr(r, 'value') else str(r) for r in allowed_roles]
-        if current_user.role.value not in role_strings:
-            raise HTTPException(
-                status_code=403,
-                detail=f"One of {allowed_roles} access required"
-            )
-        return current_user
+    role_strings = [r.value if hasattr(r, 'value') else str(r) for r in allowed_roles]
+
+    def check_role(
+        claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+    ) -> CurrentUser:
+        return authorize(claims, db, role_strings, f"One of {allowed_roles} access required")
     return check_role
 
 
-def get_teacher_branch_id(user: User = Depends(get_current_user)) -> Optional[int]:
+def get_teacher_branch_id(user: CurrentUser = Depends(get_current_user)) -> Optional[int]:
     """Get the branch_id for a teacher. Returns None for admin (full access)."""
     if user.role.value == "admin":
         return None
@@ -84,7 +204,7 @@ def get_teacher_branch_id(user: User = Depends(get_current_user)) -> Optional[in
 class DepartmentFilter:
     """Helper class for filtering queries by department."""
     
-    def __init__(self, user: User):
+    def __init__(self, user: CurrentUser):
         self.user = user
         self.is_admin = user.role.value == "ADMIN"
         self.branch_id = user.branch_id
@@ -40,6 +40,13 @@ class UnauthorizedError(Exception):
         super().__init__(self.message)
 
 
+class ServiceUnavailableError(Exception):
+    def __init__(self, message: str = "Service is busy, please retry.", retry_after: int = 1):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+
 class ValidationError(Exception):
     def __init__(self, message: str, data: Any = None):
         self.message = message
@@ -77,6 +84,16 @@ async def unauthorized_handler(request: Request, exc: UnauthorizedError) -> JSON
     )
 
 
+async def service_unavailable_handler(
+    request: Request, exc: ServiceUnavailableError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content=error_response(exc.message),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 def _to_json_safe(value: Any) -> Any:
     return jsonable_encoder(
         value,
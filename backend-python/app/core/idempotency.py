@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+
+IDEMPOTENCY_KEY = "idempotency:{scope}:{user_id}:{key}"
+MAX_KEY_LENGTH = 128
+
+
+class IdempotencyStore:
+    """Short-lived cache of successful responses keyed by ``Idempotency-Key``.
+
+    A client that retries a write with the same key gets the first response
+    back instead of a second write (or a conflict). Keys are scoped per user
+    and per endpoint. Redis is used when configured; otherwise the cache is
+    process-local and bounded.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    @staticmethod
+    def valid_key(key: Optional[str]) -> bool:
+        return bool(key) and len(key) <= MAX_KEY_LENGTH and key.isprintable()
+
+    def get(self, scope: str, user_id: int, key: str) -> Optional[Any]:
+        cache_key = IDEMPOTENCY_KEY.format(scope=scope, user_id=user_id, key=key)
+        if redis_service.is_configured:
+            cached = redis_service.get_json(cache_key)
+            if cached is not None:
+                return cached
+        with self._lock:
+            entry = self._local.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at <= time.monotonic():
+                del self._local[cache_key]
+                return None
+            return body
+
+    def put(self, scope: str, user_id: int, key: str, body: Any) -> None:
+        cache_key = IDEMPOTENCY_KEY.format(scope=scope, user_id=user_id, key=key)
+        if redis_service.is_configured:
+            redis_service.set(cache_key, json.dumps(body), ex_seconds=self._ttl_seconds)
+        with self._lock:
+            self._local[cache_key] = (time.monotonic() + self._ttl_seconds, body)
+            self._local.move_to_end(cache_key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_LOCAL_ENTRIES,
+)
@@ -0,0 +1,133 @@
+"""
+Process-wide logging: JSON lines written off the request path.
+
+Loggers hand records to a ``QueueHandler``; a single ``QueueListener``
+thread formats and writes them. The caller only pays for building the
+record, so a slow stdout or log shipper no longer blocks the event loop.
+"""
+
+import copy
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    from pythonjsonlogger.orjson import OrjsonFormatter as JsonFormatter
+except ImportError:  # orjson not installed
+    from pythonjsonlogger.json import JsonFormatter
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """Enqueue records without formatting them on the calling thread.
+
+    The stock ``prepare`` renders the full message (and traceback) before
+    enqueueing; here only the message arguments are merged and the
+    exception text rendered, so extra fields survive for the JSON formatter.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Shed records rather than block callers when the writer falls behind.
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            type(self).dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging() -> None:
+    """Install the queue-backed JSON handler on the root logger (idempotent)."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream.setFormatter(
+            JsonFormatter(
+                "%(asctime)s %(levelname)s %(name)s %(message)s",
+                rename_fields={"asctime": "ts", "levelname": "level", "name": "logger"},
+            )
+        )
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    _handler = _DeferredFormatQueueHandler(log_queue)
+    root.addHandler(_handler)
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _listener = _handler = None
+
+
+class RequestLogSampler:
+    """Decides whether a finished request is logged.
+
+    Errors (5xx and unhandled exceptions) and requests slower than
+    ``slow_ms`` are always logged. Other responses on ``hot_paths`` are
+    logged with probability ``hot_path_rate``, everything else with
+    ``success_rate``. The chosen rate is returned so it can be written with
+    the record and counts scaled back up.
+    """
+
+    def __init__(
+        self,
+        slow_ms: float,
+        success_rate: float,
+        hot_path_rate: float,
+        hot_paths: list[str],
+    ) -> None:
+        self._slow_ms = slow_ms
+        self._success_rate = success_rate
+        self._hot_path_rate = hot_path_rate
+        self._hot_paths = tuple(hot_paths)
+
+    def level_and_rate(self, path: str, status_code: int, duration_ms: float) -> tuple[int, float]:
+        if status_code >= 500:
+            return logging.ERROR, 1.0
+        if duration_ms >= self._slow_ms:
+            return logging.WARNING, 1.0
+        if status_code >= 400:
+            return logging.INFO, 1.0
+        if path.startswith(self._hot_paths):
+            return logging.INFO, self._hot_path_rate
+        return logging.INFO, self._success_rate
+
+    def should_log(self, rate: float) -> bool:
+        return rate >= 1.0 or random.random() < rate
+
+
+request_log_sampler = RequestLogSampler(
+    slow_ms=settings.LOG_SLOW_REQUEST_MS,
+    success_rate=settings.LOG_SUCCESS_SAMPLE_RATE,
+    hot_path_rate=settings.LOG_HOT_PATH_SAMPLE_RATE,
+    hot_paths=[path.strip() for path in settings.LOG_HOT_PATHS.split(",") if path.strip()],
+)
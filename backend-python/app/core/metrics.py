@@ -0,0 +1,78 @@
+"""
+Prometheus metrics for the API process.
+
+Request-path instrumentation is limited to counter increments and histogram
+observations (a lock and a bisect each). Gauges that describe existing state
+(DB pool, WebSocket connections) are computed only when /metrics is scraped.
+The DB pool collector is registered from the app lifespan, so importing this
+module does not create the engine.
+"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter.", ["bucket"]
+)
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip latency by command.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+MARK_OUTCOMES = Counter(
+    "attendance_mark_outcomes_total", "Attendance mark attempts by outcome.", ["outcome"]
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections", "Open attendance WebSocket connections."
+)
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+class DatabasePoolCollector(Collector):
+    """Reports the SQLAlchemy QueuePool state at scrape time."""
+
+    def collect(self):
+        from app.database.database import engine
+
+        pool = engine.pool
+        readings = {
+            "db_pool_size": ("Configured pool size.", "size"),
+            "db_pool_checked_out": ("Connections currently checked out.", "checkedout"),
+            "db_pool_checked_in": ("Idle connections in the pool.", "checkedin"),
+            "db_pool_overflow": ("Connections open beyond pool_size.", "overflow"),
+        }
+        for name, (documentation, method) in readings.items():
+            reader = getattr(pool, method, None)
+            if reader is None:
+                continue
+            yield GaugeMetricFamily(name, documentation, value=reader())
+
+
+_pool_collector = None
+
+
+def register_pool_collector() -> None:
+    """Add the DB pool gauges to the registry (once per process).
+
+    Registering calls ``collect()``, which imports the engine, so this runs
+    at startup rather than when the module is imported.
+    """
+    global _pool_collector
+    if _pool_collector is None:
+        _pool_collector = DatabasePoolCollector()
+        REGISTRY.register(_pool_collector)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
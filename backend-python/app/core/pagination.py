@@ -0,0 +1,232 @@
+"""
+Keyset pagination for list endpoints.
+
+Pages are ordered by ``(sort_column, id)`` descending and continue from an
+opaque cursor holding the last row's key, so every page is an index range
+scan of ``limit + 1`` rows no matter how deep the client scrolls. The
+legacy ``page`` parameter still works as OFFSET/LIMIT for existing clients.
+
+Totals are optional: ``exact`` runs ``COUNT(*)``, ``estimated`` reads the
+planner's row estimate from ``pg_class`` (summed over partitions) for
+unfiltered listings, and ``none`` skips counting entirely.
+
+CRUD list endpoints use the ``list_params`` dependency and ``list_response``
+on top of this: ``?limit=&cursor=&sort=-name&fields=id,name``. Their
+``data`` stays a plain list (what clients already read) and the paging
+state goes in a sibling ``meta`` object. ``limit`` is capped at
+``LIST_MAX_LIMIT``, so no list endpoint returns an unbounded table.
+"""
+
+import base64
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Literal, Optional
+
+from fastapi import Query as QueryParam
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.core.response import FastJSONResponse, fast_response
+
+CountMode = Literal["exact", "estimated", "none"]
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        python_type = sort_column.type.python_type
+        if python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        elif python_type is date:
+            sort_value = date.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor")
+
+
+def estimated_row_count(db: Session, table_name: str) -> int:
+    """Planner estimate of a table's rows; exact ``COUNT(*)`` off Postgres."""
+    if db.get_bind().dialect.name != "postgresql":
+        return db.execute(text(f"SELECT count(*) FROM {table_name}")).scalar() or 0
+    estimate = db.execute(
+        text(
+            "SELECT COALESCE(sum(GREATEST(c.reltuples, 0)), 0) FROM pg_class c "
+            "WHERE c.oid = to_regclass(:table) OR c.oid IN ("
+            "  SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:table))"
+        ),
+        {"table": table_name},
+    ).scalar()
+    return int(estimate or 0)
+
+
+@dataclass
+class Page:
+    rows: list
+    limit: int
+    next_cursor: Optional[str] = None
+    page: Optional[int] = None
+    total: Optional[int] = None
+
+    def meta(self) -> dict:
+        result = {
+            "limit": self.limit,
+            "next_cursor": self.next_cursor,
+            "has_more": self.next_cursor is not None,
+            "total": self.total,
+        }
+        if self.page is not None:
+            result["page"] = self.page
+            result["pages"] = math.ceil(self.total / self.limit) if self.total else 0
+        return result
+
+    def as_dict(self, serialize: Callable[[Any], dict]) -> dict:
+        return {"items": [serialize(row) for row in self.rows], **self.meta()}
+
+
+def keyset_page(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    page: Optional[int] = None,
+    descending: bool = True,
+) -> Page:
+    """Fetch one page of ``query`` ordered by ``(sort_column, id)``, newest
+    first unless ``descending`` is False.
+
+    With ``page`` (and no cursor) the page is fetched by OFFSET for clients
+    that still number pages; the returned cursor lets them switch over.
+    """
+    columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    ordered = query.order_by(*(c.desc() if descending else c.asc() for c in columns))
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        if sort_column is id_column:
+            key, after = id_column, row_id
+        else:
+            key, after = tuple_(sort_column, id_column), tuple_(sort_value, row_id)
+        ordered = ordered.filter(key < after if descending else key > after)
+        page = None
+    elif page is not None:
+        ordered = ordered.offset((page - 1) * limit)
+
+    rows = ordered.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return Page(rows=rows, limit=limit, next_cursor=next_cursor, page=page)
+
+
+def count_total(
+    query: Query, mode: CountMode, table_name: Optional[str] = None
+) -> Optional[int]:
+    """Total for ``query`` per ``mode``; ``estimated`` needs an unfiltered
+    ``table_name`` and otherwise counts exactly."""
+    if mode == "none":
+        return None
+    if mode == "estimated" and table_name:
+        return estimated_row_count(query.session, table_name)
+    return query.order_by(None).count()
+
+
+@dataclass
+class ListParams:
+    limit: int
+    cursor: Optional[str]
+    page: Optional[int]
+    sort: str
+    fields: Optional[list[str]]
+    include_total: CountMode
+
+    @property
+    def sort_key(self) -> str:
+        return self.sort.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+
+def list_params(
+    sortable: tuple[str, ...], default_sort: str = "id", default_total: CountMode = "none"
+) -> Callable[..., ListParams]:
+    """Dependency parsing the shared list query parameters.
+
+    Totals cost a query, so they are only computed when asked for with
+    ``include_total``; ``meta.has_more`` is enough to drive paging.
+
+    ``sortable`` names the model columns clients may sort by; each should be
+    non-null and indexed together with ``id`` for filters the endpoint offers.
+    """
+
+    def dependency(
+        cursor: Optional[str] = QueryParam(None, description="meta.next_cursor from the previous page"),
+        page: Optional[int] = QueryParam(None, ge=1, description="Legacy offset paging"),
+        limit: int = QueryParam(settings.LIST_DEFAULT_LIMIT, ge=1, le=settings.LIST_MAX_LIMIT),
+        sort: str = QueryParam(
+            default_sort, description=f"One of {', '.join(sortable)}; prefix with - for descending"
+        ),
+        fields: Optional[str] = QueryParam(None, description="Comma-separated fields to return, e.g. id,name"),
+        include_total: CountMode = QueryParam(default_total),
+    ) -> ListParams:
+        if sort.lstrip("-") not in sortable:
+            raise ValidationError(f"sort must be one of: {', '.join(sortable)}")
+        wanted = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        return ListParams(
+            limit=limit,
+            cursor=cursor,
+            page=page,
+            sort=sort,
+            fields=wanted or None,
+            include_total=include_total,
+        )
+
+    return dependency
+
+
+def paginate(query: Query, model, params: ListParams, table_name: Optional[str] = None) -> Page:
+    """One page of ``query`` per ``params``; pass ``table_name`` only when
+    ``query`` is unfiltered so ``estimated`` totals can use the planner."""
+    result = keyset_page(
+        query,
+        getattr(model, params.sort_key),
+        model.id,
+        params.limit,
+        cursor=params.cursor,
+        page=params.page,
+        descending=params.descending,
+    )
+    result.total = count_total(query, params.include_total, table_name)
+    return result
+
+
+def project(items: list[dict], fields: Optional[list[str]]) -> list[dict]:
+    """Keep only ``fields`` of each serialised item."""
+    if not fields or not items:
+        return items
+    unknown = [name for name in fields if name not in items[0]]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+    return [{name: item[name] for name in fields} for item in items]
+
+
+def list_response(
+    page: Page, serialize: Callable[[Any], dict], params: ListParams, message: str = "Success"
+) -> FastJSONResponse:
+    items = project([serialize(row) for row in page.rows], params.fields)
+    return fast_response(items, message, meta=page.meta())
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+from app.database.user import UserRole
+
+logger = logging.getLogger("smartattendance.auth")
+
+PRINCIPAL_REDIS_KEY = "auth:principal:{user_id}"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The slice of a user that authorisation and most handlers need.
+
+    Routes that need anything else (email, phone, password hash) should load
+    the ORM ``User`` explicitly, e.g. via ``get_current_user_model``.
+    """
+
+    id: int
+    role: UserRole
+    branch_id: Optional[int]
+    is_active: bool
+    username: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "CurrentUser":
+        return cls(
+            id=row.id,
+            role=row.role,
+            branch_id=row.branch_id,
+            is_active=bool(row.is_active),
+            username=row.username,
+            first_name=row.first_name,
+            last_name=row.last_name,
+        )
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data["role"] = self.role.value
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "CurrentUser":
+        return cls(**{**data, "role": UserRole(data["role"])})
+
+
+class PrincipalCache:
+    """Per-process TTL + LRU cache of ``CurrentUser`` keyed by user id.
+
+    When Redis is configured it is used as a shared second level, so a
+    worker with a cold local cache still avoids the database. Invalidation
+    clears both levels; other workers' local copies expire within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[float, CurrentUser]] = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[CurrentUser]:
+        if self._ttl_seconds <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, principal = entry
+                if expires_at > now:
+                    self._entries.move_to_end(user_id)
+                    return principal
+                del self._entries[user_id]
+
+        if not redis_service.is_configured:
+            return None
+        cached = redis_service.get_json(PRINCIPAL_REDIS_KEY.format(user_id=user_id))
+        if not cached:
+            return None
+        try:
+            principal = CurrentUser.from_json(cached)
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Discarding malformed cached principal for user %s", user_id)
+            return None
+        self._store_local(principal)
+        return principal
+
+    def set(self, principal: CurrentUser) -> None:
+        if self._ttl_seconds <= 0:
+            return
+        self._store_local(principal)
+        if redis_service.is_configured:
+            redis_service.set_json(
+                PRINCIPAL_REDIS_KEY.format(user_id=principal.id),
+                principal.to_json(),
+                ex_seconds=self._ttl_seconds,
+            )
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if redis_service.is_configured:
+            redis_service.delete(PRINCIPAL_REDIS_KEY.format(user_id=user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, principal: CurrentUser) -> None:
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self._ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+)
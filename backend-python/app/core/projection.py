@@ -0,0 +1,65 @@
+"""
+Column projections for read-only listings.
+
+A ``Projection`` maps output field names to columns and selects just those
+columns, so large read-only lists skip building ORM objects (identity map,
+attribute instrumentation, relationship state) only to turn them into dicts.
+Dotted names build nested objects:
+
+    RECORD = Projection({
+        "id": AttendanceRecord.id,
+        "student.id": User.id,
+        "student.email": User.email,
+    })
+    rows = RECORD.query(db).select_from(AttendanceRecord).outerjoin(User, ...)
+    items = RECORD.all(rows)
+
+A nested object whose first column is NULL (an outer join that matched
+nothing) is left out, as the ORM serializers did for missing relations.
+Values are returned as the driver gives them; ``FastJSONResponse`` encodes
+datetimes and enums directly.
+"""
+
+from typing import Any, Iterable
+
+from sqlalchemy.orm import Query, Session
+
+
+class Projection:
+    def __init__(self, fields: dict[str, Any]) -> None:
+        self.fields = dict(fields)
+        # Top-level fields keep their names as labels so keyset paging can
+        # read the sort key off the row.
+        self.columns = [
+            column.label(name.replace(".", "__")) for name, column in self.fields.items()
+        ]
+        self._plain: list[tuple[int, str]] = []
+        self._nested: dict[str, list[tuple[int, str]]] = {}
+        self._order: list[str] = []
+        for index, name in enumerate(self.fields):
+            prefix, _, leaf = name.partition(".")
+            if not leaf:
+                self._plain.append((index, name))
+                self._order.append(name)
+                continue
+            if prefix not in self._nested:
+                self._nested[prefix] = []
+                self._order.append(prefix)
+            self._nested[prefix].append((index, leaf))
+
+    def extend(self, fields: dict[str, Any]) -> "Projection":
+        return Projection({**self.fields, **fields})
+
+    def query(self, db: Session) -> Query:
+        return db.query(*self.columns)
+
+    def to_dict(self, row) -> dict:
+        values = tuple(row)
+        result = {name: values[index] for index, name in self._plain}
+        for prefix, leaves in self._nested.items():
+            if values[leaves[0][0]] is not None:
+                result[prefix] = {leaf: values[index] for index, leaf in leaves}
+        return result
+
+    def all(self, rows: Iterable) -> list[dict]:
+        return [self.to_dict(row) for row in rows]
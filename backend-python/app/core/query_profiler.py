@@ -0,0 +1,149 @@
+"""
+Per-request SQL accounting.
+
+Cursor-execute hooks on every SQLAlchemy engine count statements and sum
+their time into a ``QueryStats`` bound to the current request through a
+context variable. The request middleware reports the totals in the
+``Server-Timing`` header and the request log. Statements slower than
+``SLOW_QUERY_MS`` are logged with parameter values replaced by their types.
+
+Strict loading (``DB_STRICT_LOADING``, always on in tests) adds
+``raiseload("*", sql_only=True)`` to every ORM select. Any relationship an
+endpoint did not load up front with ``joinedload``/``selectinload`` then
+raises instead of quietly issuing a query per row.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from app.core.config import settings
+
+logger = logging.getLogger("smartattendance.sql")
+
+_START_KEY = "query_profiler_start"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    statements: list[str] = field(default_factory=list)
+    keep_statements: bool = False
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if self.keep_statements:
+            self.statements.append(statement)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+# Collectors that see every statement regardless of context, for tests
+# where the app runs on a different thread than the assertion.
+_global_collectors: list[QueryStats] = []
+_global_lock = threading.Lock()
+
+
+def begin_request() -> QueryStats:
+    stats = QueryStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def server_timing(stats: QueryStats, app_ms: float) -> str:
+    return (
+        f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+        f"app;dur={app_ms:.1f}"
+    )
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Count every statement executed on any engine inside the block."""
+    stats = QueryStats(keep_statements=True)
+    with _global_lock:
+        _global_collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _global_lock:
+            _global_collectors.remove(stats)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep the shape of bound parameters but none of their values."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if _global_collectors:
+        with _global_lock:
+            for collector in _global_collectors:
+                collector.record(statement, elapsed_ms)
+
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "slow query",
+            extra={
+                "duration_ms": round(elapsed_ms, 2),
+                "statement": " ".join(statement.split())[:2000],
+                "parameters": redact_parameters(parameters),
+                "executemany": executemany,
+            },
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_START_KEY):
+        conn.info[_START_KEY].pop()
+
+
+def _raise_on_lazy_load(state: ORMExecuteState) -> None:
+    if state.is_select and not state.is_relationship_load and not state.is_column_load:
+        state.statement = state.statement.options(raiseload("*", sql_only=True))
+
+
+def enable_strict_loading() -> None:
+    if not event.contains(Session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(Session, "do_orm_execute", _raise_on_lazy_load)
+
+
+def disable_strict_loading() -> None:
+    if event.contains(Session, "do_orm_execute", _raise_on_lazy_load):
+        event.remove(Session, "do_orm_execute", _raise_on_lazy_load)
+
+
+if settings.DB_STRICT_LOADING:
+    enable_strict_loading()
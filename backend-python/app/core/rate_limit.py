@@ -0,0 +1,316 @@
+"""
+Request rate limiting with GCRA (generic cell rate algorithm).
+
+GCRA is a token bucket stored as a single number per key: the theoretical
+arrival time (TAT) of the next request. A request is allowed when pushing
+the TAT forward by one emission interval keeps it within the burst
+tolerance, so each key costs one float locally or one Redis string, and a
+check is O(1) with no per-request history.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+
+logger = logging.getLogger("smartattendance.ratelimit")
+
+RATE_LIMIT_KEY = "ratelimit:{bucket}:{key}"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    bucket: str
+    limit: int
+    period_seconds: int
+    burst: int
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period_seconds / self.limit
+
+    @property
+    def tolerance(self) -> float:
+        return self.emission_interval * self.burst
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+
+class RateLimitBackend(Protocol):
+    # True when hit() does network I/O and must not run on the event loop.
+    blocking: bool
+
+    def hit(self, key: str, rate: RateLimit) -> RateLimitDecision: ...
+
+    def clear(self) -> None: ...
+
+
+def _decide(tat: float, now: float, rate: RateLimit) -> tuple[RateLimitDecision, Optional[float]]:
+    """Apply GCRA; returns the decision and the new TAT (None when rejected)."""
+    interval = rate.emission_interval
+    new_tat = max(tat, now) + interval
+    allow_at = new_tat - rate.tolerance
+    if now < allow_at:
+        return (
+            RateLimitDecision(
+                allowed=False,
+                remaining=0,
+                retry_after=allow_at - now,
+                reset_after=max(tat, now) - now,
+            ),
+            None,
+        )
+    return (
+        RateLimitDecision(
+            allowed=True,
+            remaining=int((now - allow_at) / interval),
+            retry_after=0.0,
+            reset_after=new_tat - now,
+        ),
+        new_tat,
+    )
+
+
+class LocalRateLimitBackend:
+    """Per-process GCRA state with LRU eviction.
+
+    An evicted key behaves like one that has been idle past its TAT, which
+    is exactly the state the least recently used keys are in, so evicting
+    them does not loosen the limit for active clients.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int) -> None:
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._tats: OrderedDict[tuple[str, str], float] = OrderedDict()
+
+    def hit(self, key: str, rate: RateLimit) -> RateLimitDecision:
+        now = time.monotonic()
+        entry = (rate.bucket, key)
+        with self._lock:
+            decision, new_tat = _decide(self._tats.get(entry, now), now, rate)
+            if new_tat is not None:
+                self._tats[entry] = new_tat
+                self._tats.move_to_end(entry)
+                while len(self._tats) > self._max_keys:
+                    self._tats.popitem(last=False)
+        return decision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+
+# KEYS[1] = TAT key; ARGV = emission interval (ms), tolerance (ms).
+# Uses the Redis clock so every worker agrees on "now". Returns
+# {allowed, remaining, retry_after_ms, reset_after_ms}.
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+
+
+class RedisRateLimitBackend:
+    """GCRA in Redis: one script call per request, shared by all workers.
+
+    If Redis fails the request is checked against the local backend instead,
+    so an outage degrades to per-process limits rather than to no limits.
+    The client is synchronous, so async callers go through
+    ``RateLimiter.check_async``.
+    """
+
+    blocking = True
+
+    def __init__(self, fallback: LocalRateLimitBackend) -> None:
+        self._fallback = fallback
+        self._script = None
+
+    def hit(self, key: str, rate: RateLimit) -> RateLimitDecision:
+        try:
+            if self._script is None:
+                self._script = redis_service.client.register_script(_GCRA_SCRIPT)
+            allowed, remaining, retry_after_ms, reset_after_ms = self._script(
+                keys=[RATE_LIMIT_KEY.format(bucket=rate.bucket, key=key)],
+                args=[round(rate.emission_interval * 1000), round(rate.tolerance * 1000)],
+            )
+        except redis.RedisError:
+            logger.exception("Redis rate limit check failed; using local limiter")
+            return self._fallback.hit(key, rate)
+        return RateLimitDecision(
+            allowed=bool(allowed),
+            remaining=int(remaining),
+            retry_after=int(retry_after_ms) / 1000,
+            reset_after=int(reset_after_ms) / 1000,
+        )
+
+    def clear(self) -> None:
+        self._fallback.clear()
+
+
+def parse_limits(spec: str) -> dict[str, RateLimit]:
+    """Parse ``bucket=limit/period[/burst]`` entries separated by commas,
+    e.g. ``general=120/60,auth=60/60/10``. Burst defaults to the limit."""
+    limits: dict[str, RateLimit] = {}
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        try:
+            bucket, value = item.split("=", 1)
+            numbers = [int(number) for number in value.split("/")]
+            limit, period = numbers[0], numbers[1]
+            burst = numbers[2] if len(numbers) > 2 else limit
+        except (ValueError, IndexError):
+            logger.warning("Invalid rate limit entry skipped: %s", item)
+            continue
+        if limit <= 0 or period <= 0 or burst <= 0:
+            logger.warning("Invalid rate limit entry skipped: %s", item)
+            continue
+        limits[bucket.strip()] = RateLimit(bucket.strip(), limit, period, burst)
+    return limits
+
+
+def parse_role_limits(spec: str) -> dict[str, dict[str, RateLimit]]:
+    """Parse ``ROLE:bucket=limit/period[/burst]`` entries separated by commas."""
+    by_role: dict[str, dict[str, RateLimit]] = {}
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        role, sep, entry = item.partition(":")
+        if not sep:
+            logger.warning("Invalid role rate limit entry skipped: %s", item)
+            continue
+        by_role.setdefault(role.strip().upper(), {}).update(parse_limits(entry))
+    return by_role
+
+
+class RateLimiter:
+    """Resolves a request to a bucket and checks it against the backend.
+
+    ``routes`` maps path prefixes to bucket names (first match wins, so list
+    more specific prefixes first). Prefixes match whole path segments, so
+    ``/attendance/mark`` does not cover ``/attendance/mark-absent``.
+    ``role_limits`` overrides bucket limits for authenticated users of a role.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        routes: list[tuple[str, str]],
+        limits: dict[str, RateLimit],
+        role_limits: Optional[dict[str, dict[str, RateLimit]]] = None,
+        default_bucket: str = "general",
+    ) -> None:
+        self.backend = backend
+        self._routes = routes
+        self._limits = limits
+        self._role_limits = role_limits or {}
+        self._default_bucket = default_bucket
+
+    def resolve(self, path: str, role: Optional[str] = None) -> RateLimit:
+        bucket = next(
+            (
+                name
+                for prefix, name in self._routes
+                if path == prefix or path.startswith(prefix + "/")
+            ),
+            self._default_bucket,
+        )
+        if role:
+            override = self._role_limits.get(role.upper(), {}).get(bucket)
+            if override is not None:
+                return override
+        return self._limits.get(bucket) or self._limits[self._default_bucket]
+
+    def check(self, key: str, path: str, role: Optional[str] = None) -> tuple[RateLimit, RateLimitDecision]:
+        rate = self.resolve(path, role)
+        return rate, self.backend.hit(key, rate)
+
+    async def check_async(
+        self, key: str, path: str, role: Optional[str] = None
+    ) -> tuple[RateLimit, RateLimitDecision]:
+        """``check`` for the middleware: a blocking backend runs in a worker
+        thread; the local backend is a few float operations and stays inline."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.check, key, path, role)
+        return self.check(key, path, role)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def rate_limit_headers(rate: RateLimit, decision: RateLimitDecision) -> dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(rate.limit),
+        "X-RateLimit-Remaining": str(decision.remaining),
+        "X-RateLimit-Reset": str(math.ceil(decision.reset_after)),
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+    return headers
+
+
+ROUTE_BUCKETS = [
+    ("/api/v1/qr/generate", "code_generation"),
+    ("/api/v1/otp/generate", "code_generation"),
+    ("/api/v1/attendance/mark", "mark"),
+    ("/api/v1/auth/refresh", "refresh"),
+    ("/api/v1/auth", "auth"),
+]
+
+# Authenticated requests are limited per user, so "general" and "mark" are
+# per-student quotas. Auth requests arrive before there is a user and are
+# limited per client IP, which on campus is a shared NAT address: the burst
+# lets a whole class sign in at once at the start of a lecture. Refreshes
+# carry no bearer token either but are keyed on the refresh token's family,
+# so "refresh" is a per-session quota rather than one shared by the NAT.
+_capacity = settings.RATE_LIMIT_CLASS_CAPACITY
+DEFAULT_LIMITS = (
+    "general=120/60,code_generation=30/60,mark=10/60/5,refresh=10/60/5,"
+    f"auth={_capacity}/60/{_capacity}"
+)
+
+
+def _build_backend() -> RateLimitBackend:
+    local = LocalRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_LOCAL_KEYS)
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "redis" or (backend == "auto" and redis_service.is_configured):
+        return RedisRateLimitBackend(fallback=local)
+    return local
+
+
+rate_limiter = RateLimiter(
+    backend=_build_backend(),
+    routes=ROUTE_BUCKETS,
+    limits={**parse_limits(DEFAULT_LIMITS), **parse_limits(settings.RATE_LIMITS)},
+    role_limits=parse_role_limits(settings.RATE_LIMITS_BY_ROLE),
+)
@@ -0,0 +1,127 @@
+"""
+Routing of read-only requests to the optional Postgres replica.
+
+``open_read_session`` hands out a replica session while the replica is
+reachable and within ``DB_REPLICA_MAX_LAG_SECONDS`` of the primary, and a
+primary session otherwise. Replica health is probed at most once per
+``DB_REPLICA_CHECK_SECONDS`` on whichever request finds it stale; other
+requests keep using the last result instead of waiting on the probe.
+Sessions from here refuse to flush, so a route that declared read-only
+intent cannot write on the primary fallback either.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import database
+
+logger = logging.getLogger("smartattendance.db")
+
+# 0 on a caught-up standby (nothing left to replay, even if the primary has
+# been idle) or when pointed at a primary; NULL when the standby has not
+# replayed anything yet.
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReadOnlySessionError(RuntimeError):
+    pass
+
+
+def _probe_replica_lag() -> Optional[float]:
+    with database.read_engine.connect() as conn:
+        lag = conn.execute(_LAG_SQL).scalar()
+    return None if lag is None else float(lag)
+
+
+class ReplicaHealth:
+    def __init__(
+        self,
+        probe: Callable[[], Optional[float]] = _probe_replica_lag,
+        check_interval: Optional[float] = None,
+        max_lag: Optional[float] = None,
+    ):
+        self._probe = probe
+        self._check_interval = (
+            settings.DB_REPLICA_CHECK_SECONDS if check_interval is None else check_interval
+        )
+        self._max_lag = settings.DB_REPLICA_MAX_LAG_SECONDS if max_lag is None else max_lag
+        self._lock = threading.Lock()
+        self._healthy = False
+        self._lag: Optional[float] = None
+        self._checked_at = float("-inf")
+
+    def usable(self) -> bool:
+        if time.monotonic() - self._checked_at >= self._check_interval:
+            self._refresh()
+        return self._healthy
+
+    def mark_unhealthy(self) -> None:
+        """Route reads to the primary until the next probe."""
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {"healthy": self._healthy, "lag_seconds": self._lag}
+
+    def _refresh(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            try:
+                lag = self._probe()
+            except Exception:
+                logger.warning("replica probe failed", exc_info=True)
+                lag = None
+                healthy = False
+            else:
+                healthy = lag is not None and lag <= self._max_lag
+            if healthy != self._healthy:
+                logger.warning(
+                    "replica %s", "in use" if healthy else "bypassed",
+                    extra={"lag_seconds": lag, "max_lag_seconds": self._max_lag},
+                )
+            self._lag = lag
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+
+replica_health = ReplicaHealth()
+
+
+def open_read_session() -> Session:
+    if database.ReadSessionLocal is not None and replica_health.usable():
+        session = database.ReadSessionLocal()
+    else:
+        session = database.SessionLocal()
+    session.info["read_only"] = True
+    return session
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError("Attempted to write through a read-only session")
+
+
+if database.read_engine is not None:
+
+    @event.listens_for(database.read_engine, "handle_error")
+    def _replica_error(exception_context):
+        if exception_context.is_disconnect:
+            replica_health.mark_unhealthy()
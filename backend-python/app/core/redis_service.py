@@ -1,14 +1,41 @@
 import json
 import logging
+import time
 from typing import Any, Optional
 
 import redis
 
 from app.core.config import settings
+from app.core.metrics import REDIS_LATENCY
 
 logger = logging.getLogger("smartattendance.redis")
 
 
+class _TimedRedis(redis.Redis):
+    """``redis.Redis`` that records round-trip latency per command."""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_LATENCY.labels(str(args[0]).upper()).observe(time.perf_counter() - started)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def timed_execute(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return execute(*args, **kwargs)
+            finally:
+                REDIS_LATENCY.labels("PIPELINE").observe(time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
 class RedisService:
     def __init__(
         self,
@@ -32,7 +59,7 @@ class RedisService:
     @property
     def client(self) -> redis.Redis:
         if self._client is None:
-            self._client = redis.Redis(
+            self._client = _TimedRedis(
                 host=self._host,
                 port=self._port,
                 db=self._db,
@@ -60,6 +87,16 @@ class RedisService:
             logger.exception("Redis SET failed for key: %s", key)
             return False
 
+    def set_if_absent(self, key: str, value: str, ex_seconds: int) -> Optional[bool]:
+        """True if the key was set, False if it already existed and None if
+        Redis could not be reached, so callers can tell a held lock apart
+        from an outage."""
+        try:
+            return bool(self.client.set(key, value, ex=ex_seconds, nx=True))
+        except redis.RedisError:
+            logger.exception("Redis SET NX failed for key: %s", key)
+            return None
+
     def delete(self, key: str) -> bool:
         try:
             return bool(self.client.delete(key))
@@ -1,6 +1,14 @@
 from typing import Any, Generic, Optional, TypeVar
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # orjson not installed
+    orjson = None
+
 T = TypeVar("T")
 
 
@@ -10,9 +18,30 @@ class APIResponse(BaseModel, Generic[T]):
     data: Optional[T] = None
 
 
+class FastJSONResponse(JSONResponse):
+    """JSON rendered with orjson, the application's default response class.
+
+    orjson encodes datetimes, dates, times and enums itself (ISO 8601 and
+    ``.value``, as the serializers wrote them by hand), so handlers can
+    return rows as they come from the database. Anything else falls back to
+    ``jsonable_encoder``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+
 def success_response(data: Any = None, message: str = "Success", status_code: int = 200) -> dict:
     return {"success": True, "message": message, "data": data}
 
 
+def fast_response(data: Any = None, message: str = "Success", status_code: int = 200, **extra: Any) -> FastJSONResponse:
+    """``success_response`` returned as a response, skipping FastAPI's
+    ``jsonable_encoder`` pass over the body; for large read-only payloads."""
+    return FastJSONResponse({**success_response(data, message), **extra}, status_code=status_code)
+
+
 def error_response(message: str = "An error occurred", data: Any = None) -> dict:
     return {"success": False, "message": message, "data": data}
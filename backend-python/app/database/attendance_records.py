@@ -1,9 +1,12 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import enum
+from typing import Optional
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String, Index
+from sqlalchemy import Boolean, Column, Date, DateTime, Enum, ForeignKey, Integer, String, Index
 from sqlalchemy.orm import relationship
 
+from app.core.config import settings
 from app.database.database import Base
 
 
@@ -13,7 +16,20 @@ class AttendanceStatus(enum.Enum):
     LATE = "late"
 
 
+def campus_date(marked_at: Optional[datetime] = None) -> date:
+    """Campus calendar day of a naive-UTC ``marked_at`` (now if omitted)."""
+    moment = (marked_at or datetime.now(timezone.utc).replace(tzinfo=None)).replace(tzinfo=timezone.utc)
+    return moment.astimezone(ZoneInfo(settings.CAMPUS_TIMEZONE)).date()
+
+
+def _session_date_default(context) -> date:
+    return campus_date(context.get_current_parameters().get("marked_at"))
+
+
 class AttendanceRecord(Base):
+    # On Postgres the table is range-partitioned by month on marked_at and its
+    # primary key is (id, marked_at); ids stay unique via the sequence, so the
+    # ORM keeps identifying rows by id alone.
     __tablename__ = "attendance_records"
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
@@ -27,6 +43,8 @@ class AttendanceRecord(Base):
     batch_id = Column(Integer, ForeignKey("batches.id"), nullable=True)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     marked_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    # The day the session ran; one record per (timetable, student, day).
+    session_date = Column(Date, default=_session_date_default, nullable=False)
     status = Column(Enum(AttendanceStatus), nullable=False)
     device_info = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
@@ -38,7 +56,12 @@ class AttendanceRecord(Base):
     student = relationship("User", foreign_keys=[student_id])
     teacher = relationship("User", foreign_keys=[teacher_id])
     
-    # Indexes for efficient querying and duplicate prevention
+    # Indexes for efficient querying and duplicate prevention. On a
+    # partitioned Postgres table the unique index exists per partition.
     __table_args__ = (
         Index('idx_timetable_student_date', 'timetable_id', 'student_id', 'marked_at'),
+        Index('uq_attendance_session_day', 'timetable_id', 'student_id', 'session_date', unique=True),
+        # Keyset pagination: per-student history and the admin listing.
+        Index('ix_attendance_student_marked_id', 'student_id', 'marked_at', 'id'),
+        Index('ix_attendance_marked_id', 'marked_at', 'id'),
     )
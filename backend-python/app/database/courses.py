@@ -20,5 +20,6 @@ class Course(Base):
         DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False
     )
 
-    subjects = relationship("Subject", back_populates="course", lazy="selectin")
-    branches = relationship("Branch", back_populates="course", lazy="selectin")
+    # Loaded on request by the endpoints that need them, not with every course.
+    subjects = relationship("Subject", back_populates="course")
+    branches = relationship("Branch", back_populates="course")
@@ -1,21 +1,114 @@
-from sqlalchemy import create_engine, MetaData
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
 
+from app.core.config import settings
+
 load_dotenv()
 URL = os.getenv("DATABASE_URL")
 
 if not URL:
     raise RuntimeError("DATABASE_URL environment variable is required")
 
+logger = logging.getLogger("smartattendance.db")
+
+
+def engine_options(url: str, *, pool_size: int, max_overflow: int) -> dict[str, Any]:
+    """``create_engine`` keyword arguments for ``url`` from ``settings``.
+
+    Postgres connections carry an application_name, TCP keepalives and (unless
+    behind PgBouncer) a server-side statement_timeout. In PgBouncer transaction
+    mode the ``options`` startup parameter is rejected and server-side prepared
+    statements break across backends, so neither is used; set statement_timeout
+    on the database role instead.
+    """
+    options: dict[str, Any] = {
+        "echo": os.getenv("DEBUG", "False").lower() == "true",
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return options
+
+    connect_args: dict[str, Any] = {
+        "application_name": settings.DB_APPLICATION_NAME,
+        "connect_timeout": settings.DB_CONNECT_TIMEOUT_SECONDS,
+        "keepalives": 1,
+        "keepalives_idle": settings.DB_KEEPALIVES_IDLE_SECONDS,
+        "keepalives_interval": settings.DB_KEEPALIVES_INTERVAL_SECONDS,
+        "keepalives_count": settings.DB_KEEPALIVES_COUNT,
+    }
+    if settings.DB_PGBOUNCER:
+        if parsed.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = None
+    elif settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    options["connect_args"] = connect_args
+    return options
+
+
+def watch_pool_saturation(engine: Engine, name: str, max_overflow: int) -> None:
+    """Warn when every connection the pool may open is checked out.
+
+    The next checkout will wait up to ``pool_timeout``. Logged at most once
+    per ``DB_POOL_SATURATION_LOG_SECONDS`` per engine.
+    """
+    pool = engine.pool
+    if not hasattr(pool, "size"):
+        return
+    capacity = pool.size() + max_overflow
+    last_logged = [0.0]
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if pool.checkedout() < capacity:
+            return
+        now = time.monotonic()
+        if now - last_logged[0] < settings.DB_POOL_SATURATION_LOG_SECONDS:
+            return
+        last_logged[0] = now
+        logger.warning(
+            "db pool saturated",
+            extra={
+                "engine": name,
+                "checked_out": pool.checkedout(),
+                "pool_size": pool.size(),
+                "max_overflow": max_overflow,
+            },
+        )
+
+
 engine = create_engine(
     URL,
-    echo=os.getenv("DEBUG", "False").lower() == "true",
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
+    **engine_options(URL, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW),
 )
+watch_pool_saturation(engine, "primary", settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Optional read replica for reports and list endpoints. None when unset.
+read_engine: Optional[Engine] = None
+ReadSessionLocal: Optional[sessionmaker] = None
+if settings.DATABASE_REPLICA_URL:
+    read_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        **engine_options(
+            settings.DATABASE_REPLICA_URL,
+            pool_size=settings.DB_REPLICA_POOL_SIZE,
+            max_overflow=settings.DB_REPLICA_MAX_OVERFLOW,
+        ),
+    )
+    watch_pool_saturation(read_engine, "replica", settings.DB_REPLICA_MAX_OVERFLOW)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String
 
 from app.database.database import Base
 
@@ -16,3 +16,9 @@ class OTPCode(Base):
     expires_at = Column(DateTime, nullable=False)
     used_count = Column(Integer, default=0, nullable=False)
     status = Column(String, default="active", nullable=False)
+
+    __table_args__ = (
+        # Newest-first paged listings, overall and per timetable.
+        Index('ix_otp_codes_created_id', 'created_at', 'id'),
+        Index('ix_otp_codes_timetable_created_id', 'timetable_id', 'created_at', 'id'),
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String
 
 from app.database.database import Base
 
@@ -22,3 +22,9 @@ class QRCode(Base):
     expires_at = Column(DateTime, nullable=False)
     used_count = Column(Integer, default=0, nullable=False)
     status = Column(Enum(CodeStatus), default=CodeStatus.ACTIVE, nullable=False)
+
+    __table_args__ = (
+        # Newest-first paged listings, overall and per timetable.
+        Index('ix_qr_codes_created_id', 'created_at', 'id'),
+        Index('ix_qr_codes_timetable_created_id', 'timetable_id', 'created_at', 'id'),
+    )
@@ -8,6 +8,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
@@ -51,3 +52,10 @@ class StudentEnrollment(Base):
     updated_at = Column(
         DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False
     )
+
+    __table_args__ = (
+        # Paged listings filtered by course, branch or division.
+        Index('ix_student_enrollments_course_id_id', 'course_id', 'id'),
+        Index('ix_student_enrollments_branch_id_id', 'branch_id', 'id'),
+        Index('ix_student_enrollments_division_id_id', 'division_id', 'id'),
+    )
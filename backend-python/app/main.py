@@ -1,11 +1,14 @@
-import os
+import asyncio
 import json
+import os
 import logging
 import time
 import uuid
-from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
 from urllib.parse import urlparse
 
+import anyio
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.requests import Request
@@ -13,10 +16,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
 
+from app.core.client_ip import client_ip
+from app.core.config import settings
+from app.core.dependencies import peek_claims
 from app.core.exceptions import (
     ConflictError,
     ForbiddenError,
     NotFoundError,
+    ServiceUnavailableError,
     UnauthorizedError,
     ValidationError,
     conflict_handler,
@@ -24,9 +31,21 @@ from app.core.exceptions import (
     generic_handler,
     integrity_handler,
     not_found_handler,
+    service_unavailable_handler,
     unauthorized_handler,
     validation_handler,
 )
+from app.core.logging_setup import configure_logging, request_log_sampler, shutdown_logging
+from app.core.metrics import (
+    RATE_LIMIT_REJECTIONS,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    register_pool_collector,
+    status_class,
+)
+from app.core.query_profiler import QueryStats, begin_request, server_timing
+from app.core.rate_limit import rate_limit_headers, rate_limiter
+from app.core.response import FastJSONResponse
 from app.routers import (
     access_points,
     auth,
@@ -46,11 +65,35 @@ from app.routers import (
     users,
 )
 from app.routers import health, otp, qr_code, realtime
+from app.security.jwt_token import decode_token
+from app.security.password import password_hasher
+from app.services.attendance_partitions import ensure_partitions_on_startup
+from app.services.session_closer import session_auto_closer
+
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    register_pool_collector()
+    password_hasher.limit_to_threads(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    await asyncio.to_thread(ensure_partitions_on_startup)
+    if settings.AUTO_CLOSE_ENABLED:
+        session_auto_closer.start()
+    yield
+    await session_auto_closer.stop()
+    password_hasher.shutdown()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="Smart Attendance System",
     description="Attendance Tracking with QR codes and OTP",
     version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 logger = logging.getLogger("smartattendance.request")
@@ -84,15 +127,70 @@ def _load_allowed_origins() -> list[str]:
 
 allowed_origins = _load_allowed_origins()
 
-_rate_limit_buckets: dict[tuple[str, str], deque[float]] = defaultdict(deque)
+
+def _request_log_fields(
+    request: Request,
+    request_id: str,
+    remote_ip: str,
+    status_code: int,
+    started: float,
+    query_stats: QueryStats,
+) -> dict:
+    return {
+        "request_id": request_id,
+        "method": request.method,
+        "path": request.url.path,
+        "status_code": status_code,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        "db_queries": query_stats.count,
+        "db_ms": round(query_stats.total_ms, 2),
+        "client_ip": remote_ip,
+    }
+
+
+def _observe_latency(request: Request, status_code: int, started: float) -> None:
+    # Label by route template (/timetables/{timetable_id}) to bound cardinality.
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        status_class(status_code),
+    ).observe(time.perf_counter() - started)
 
 
-def _resolve_limit(path: str) -> tuple[str, int]:
-    if path.startswith("/api/v1/qr/generate") or path.startswith("/api/v1/otp/generate"):
-        return ("code_generation", 30)
-    if path.startswith("/api/v1/auth"):
-        return ("auth", 60)
-    return ("general", 120)
+REFRESH_PATH = "/api/v1/auth/refresh"
+
+
+async def _refresh_family(request: Request) -> Optional[str]:
+    """Family of a valid refresh token in the request body, else None.
+
+    Starlette replays the body to the endpoint after it is read here.
+    Invalid or expired tokens stay on the per-IP key.
+    """
+    body = await request.body()
+    if len(body) > 8192:
+        return None
+    try:
+        payload = decode_token(json.loads(body)["refresh_token"])
+    except Exception:
+        return None
+    if payload.get("typ") != "refresh":
+        return None
+    return payload.get("fam")
+
+
+async def _rate_limit_identity(request: Request, remote_ip: str) -> tuple[str, Optional[str]]:
+    """Limit authenticated traffic per user rather than per address: the
+    campus egresses through a few NAT IPs shared by every student. Token
+    refreshes are limited per refresh-token family for the same reason."""
+    if request.url.path == REFRESH_PATH and request.method == "POST":
+        family = await _refresh_family(request)
+        if family:
+            return f"family:{family}", None
+    claims = peek_claims(request)
+    if claims is not None:
+        return f"user:{claims.user_id}", claims.role.value if claims.role else None
+    return f"ip:{remote_ip}", None
 
 # ---------------------------------------------------------------------------
 # CORS - must be added FIRST (outermost middleware)
@@ -103,7 +201,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["x-request-id"],
+    expose_headers=["x-request-id", "Server-Timing", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Idempotent-Replayed"],
 )
 
 
@@ -114,60 +212,49 @@ async def request_logging_and_rate_limit(request: Request, call_next):
     
     started = time.perf_counter()
     request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
-    client_ip = request.client.host if request.client else "unknown"
-    bucket_name, limit = _resolve_limit(request.url.path)
-    key = (client_ip, bucket_name)
-    now = time.time()
-    bucket = _rate_limit_buckets[key]
-
-    while bucket and now - bucket[0] > 60:
-        bucket.popleft()
+    remote_ip = client_ip(request)
+    limit_key, role = await _rate_limit_identity(request, remote_ip)
+    rate, decision = await rate_limiter.check_async(limit_key, request.url.path, role)
 
-    if len(bucket) >= limit:
+    if not decision.allowed:
+        RATE_LIMIT_REJECTIONS.labels(rate.bucket).inc()
         return JSONResponse(
             status_code=429,
             content={
                 "success": False,
                 "message": "Rate limit exceeded",
-                "data": {"bucket": bucket_name, "limit": limit},
+                "data": {"bucket": rate.bucket, "limit": rate.limit},
             },
-            headers={"x-request-id": request_id},
+            headers={"x-request-id": request_id, **rate_limit_headers(rate, decision)},
         )
 
-    bucket.append(now)
-
+    query_stats = begin_request()
+    REQUESTS_IN_FLIGHT.inc()
     try:
         response = await call_next(request)
     except Exception:
-        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        _observe_latency(request, 500, started)
         logger.exception(
-            json.dumps(
-                {
-                    "request_id": request_id,
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status_code": 500,
-                    "duration_ms": duration_ms,
-                    "client_ip": client_ip,
-                }
-            )
+            "request failed",
+            extra=_request_log_fields(request, request_id, remote_ip, 500, started, query_stats),
         )
         raise
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
 
-    duration_ms = round((time.perf_counter() - started) * 1000, 2)
-    logger.info(
-        json.dumps(
-            {
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "duration_ms": duration_ms,
-                "client_ip": client_ip,
-            }
-        )
+    _observe_latency(request, response.status_code, started)
+    fields = _request_log_fields(
+        request, request_id, remote_ip, response.status_code, started, query_stats
+    )
+    level, sample_rate = request_log_sampler.level_and_rate(
+        fields["path"], response.status_code, fields["duration_ms"]
     )
+    if request_log_sampler.should_log(sample_rate):
+        fields["sample_rate"] = sample_rate
+        logger.log(level, "request", extra=fields)
     response.headers["x-request-id"] = request_id
+    response.headers["Server-Timing"] = server_timing(query_stats, fields["duration_ms"])
+    response.headers.update(rate_limit_headers(rate, decision))
     return response
 
 # ---------------------------------------------------------------------------
@@ -177,6 +264,7 @@ app.add_exception_handler(NotFoundError, not_found_handler)
 app.add_exception_handler(ConflictError, conflict_handler)
 app.add_exception_handler(ForbiddenError, forbidden_handler)
 app.add_exception_handler(UnauthorizedError, unauthorized_handler)
+app.add_exception_handler(ServiceUnavailableError, service_unavailable_handler)
 app.add_exception_handler(ValidationError, validation_handler)
 app.add_exception_handler(RequestValidationError, validation_handler)
 app.add_exception_handler(IntegrityError, integrity_handler)
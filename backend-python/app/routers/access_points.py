@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 
 from app.core.dependencies import get_db, require_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
 from app.core.response import success_response
 from app.schemas.access_points import AccessPointCreate, AccessPointOut, AccessPointUpdate
 from app.database.access_points import AccessPoint
@@ -29,15 +30,17 @@ def _serialize_access_point(ap: AccessPoint) -> dict:
 def list_access_points(
     location_id: int | None = None,
     is_active: bool | None = None,
+    params: ListParams = Depends(list_params(("id", "name"))),
     db: Session = Depends(get_db),
 ):
-    query = db.query(AccessPoint)
+    query = db.query(AccessPoint).options(joinedload(AccessPoint.location))
     if location_id is not None:
         query = query.filter(AccessPoint.location_id == location_id)
     if is_active is not None:
         query = query.filter(AccessPoint.is_active == is_active)
-    access_points = query.all()
-    return success_response([_serialize_access_point(ap) for ap in access_points], "Access points retrieved successfully")
+    unfiltered = location_id is None and is_active is None
+    page = paginate(query, AccessPoint, params, AccessPoint.__tablename__ if unfiltered else None)
+    return list_response(page, _serialize_access_point, params, "Access points retrieved successfully")
 
 
 @router.get("/{access_point_id}")
@@ -1,27 +1,41 @@
-from datetime import datetime, date, timezone
-from typing import Optional
-import math
+from datetime import datetime, date, timedelta, timezone
+from typing import Literal, Optional
 import logging
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import func, null
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 
+from app.core.config import settings
 from app.core.dependencies import get_db, get_current_user
+from app.core.principal_cache import CurrentUser
+from app.core.metrics import MARK_OUTCOMES
 from app.core.exceptions import NotFoundError, ConflictError, ForbiddenError, ValidationError
-from app.core.response import success_response
-from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+from app.core.idempotency import idempotency_store
+from app.core.pagination import CountMode, count_total, keyset_page
+from app.core.projection import Projection
+from app.core.response import fast_response, success_response
+from app.database.attendance_records import AttendanceRecord, AttendanceStatus, campus_date
 from app.database.qr_codes import QRCode
 from app.database.otp_code import OTPCode
 from app.database.timetables import Timetable, DayOfWeek
-from app.database.locations import Location
 from app.database.access_points import AccessPoint
 from app.database.student_enrollments import StudentEnrollment, EnrollmentStatus
 from app.database.user import User
 from app.database.subjects import Subject
 from app.schemas.attendance_records import MarkAttendanceRequest
 from app.security.permissions import UserRole, require_role
+from app.services.active_sessions import active_session_index
+from app.services.attendance_closing import (
+    close_recently_ended_sessions,
+    insert_attendance,
+    mark_session_absentees,
+)
+from app.services.attendance_partitions import marked_between
 from app.services.audit_service import log_action
+from app.services.geofence import fence_check, geofence_index
+from app.services.session_closer import session_auto_closer
 from app.services.attendance_ws import attendance_ws_manager
 from app.services.notification_service import create_notification
 
@@ -33,28 +47,85 @@ router = APIRouter(prefix="/api/v1/attendance", tags=["Attendance Records"])
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _serialize_record_with_student(r: AttendanceRecord) -> dict:
-    """Serialize record with student info for teacher/admin view."""
-    result = _serialize_record(r, include_timetable=True)
-    if r.student:
-        result["student"] = {
-            "id": r.student.id,
-            "first_name": r.student.first_name,
-            "last_name": r.student.last_name,
-            "enrollment_no": getattr(r.student, 'enrollment_no', None),
-            "email": r.student.email,
-        }
-    return result
+# Column projections of ``_serialize_record`` (plus the timetable and student
+# blocks of the teacher views) for read-only listings, which select plain
+# rows instead of hydrating records and their relations.
+RECORD_COLUMNS = Projection({
+    "id": AttendanceRecord.id,
+    "timetable_id": AttendanceRecord.timetable_id,
+    "student_id": AttendanceRecord.student_id,
+    "enrollment_id": AttendanceRecord.enrollment_id,
+    "teacher_id": AttendanceRecord.teacher_id,
+    "division_id": AttendanceRecord.division_id,
+    "batch_id": AttendanceRecord.batch_id,
+    "location_id": AttendanceRecord.location_id,
+    "marked_at": AttendanceRecord.marked_at,
+    "status": AttendanceRecord.status,
+    "device_info": AttendanceRecord.device_info,
+    "created_at": AttendanceRecord.created_at,
+    "updated_at": AttendanceRecord.updated_at,
+})
+
+RECORD_WITH_STUDENT_COLUMNS = RECORD_COLUMNS.extend({
+    "timetable.id": Timetable.id,
+    "timetable.subject_name": Subject.name,
+    "timetable.subject_code": Subject.code,
+    "timetable.day_of_week": Timetable.day_of_week,
+    "timetable.start_time": Timetable.start_time,
+    "timetable.end_time": Timetable.end_time,
+    "timetable.lecture_type": Timetable.lecture_type,
+    "student.id": User.id,
+    "student.first_name": User.first_name,
+    "student.last_name": User.last_name,
+    "student.enrollment_no": null(),
+    "student.email": User.email,
+})
+
+
+def _records_with_student(db: Session):
+    """Rows of ``RECORD_WITH_STUDENT_COLUMNS``; filter and order on
+    ``AttendanceRecord`` as usual."""
+    return (
+        RECORD_WITH_STUDENT_COLUMNS.query(db)
+        .select_from(AttendanceRecord)
+        .outerjoin(Timetable, Timetable.id == AttendanceRecord.timetable_id)
+        .outerjoin(Subject, Subject.id == Timetable.subject_id)
+        .outerjoin(User, User.id == AttendanceRecord.student_id)
+    )
+
+
+# Just what /today needs to count records and list their ids.
+RECORD_ID_COLUMNS = Projection({
+    "id": AttendanceRecord.id,
+    "status": AttendanceRecord.status,
+    "teacher_id": AttendanceRecord.teacher_id,
+    "timetable_id": AttendanceRecord.timetable_id,
+})
+
+# /today group_by values and the field each one groups on.
+TODAY_GROUPS = {"teacher": "teacher_id", "session": "timetable_id"}
+
+
+def _tally(with_ids: bool, **key) -> dict:
+    tally = {**key, "total": 0}
+    for status in AttendanceStatus:
+        tally[f"{status.value}_count"] = 0
+        if with_ids:
+            tally[f"{status.value}_ids"] = []
+    return tally
+
 
+def _count_into(tally: dict, status: AttendanceStatus, count: int = 1, record_id: Optional[int] = None) -> None:
+    tally["total"] += count
+    tally[f"{status.value}_count"] += count
+    if record_id is not None:
+        tally[f"{status.value}_ids"].append(record_id)
 
-def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Return distance in metres between two WGS-84 coordinates."""
-    R = 6_371_000
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+def _mark_rejected(outcome: str, exc: Exception) -> Exception:
+    """Count a failed mark attempt by reason and hand back the error to raise."""
+    MARK_OUTCOMES.labels(outcome).inc()
+    return exc
 
 
 def _serialize_record(r: AttendanceRecord, include_timetable: bool = False) -> dict:
@@ -97,20 +168,33 @@ def _serialize_record(r: AttendanceRecord, include_timetable: bool = False) -> d
 @router.post("/mark")
 async def mark_attendance(
     request: Request,
+    response: Response,
     body: MarkAttendanceRequest,
-    current_user: User = Depends(require_role(UserRole.STUDENT)),
+    current_user: CurrentUser = Depends(require_role(UserRole.STUDENT)),
     db: Session = Depends(get_db),
 ):
     """
     Mark attendance with multi-factor validation:
     1. Code validation (QR/OTP)
     2. Enrollment validation
-    3. Duplicate prevention (with row locking)
-    4. Geofence validation
-    5. WiFi BSSID validation
-    
+    3. Geofence validation
+    4. WiFi BSSID validation
+    5. Duplicate prevention (unique per timetable, student and session day)
+
     IMPORTANT: All validations must complete successfully BEFORE creating any record.
+
+    A retry carrying the same ``Idempotency-Key`` header as a successful
+    request gets that request's response back (``Idempotent-Replayed: true``).
     """
+    idempotency_key = request.headers.get("idempotency-key")
+    if idempotency_store.valid_key(idempotency_key):
+        cached = idempotency_store.get("attendance-mark", current_user.id, idempotency_key)
+        if cached is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return cached
+    else:
+        idempotency_key = None
+
     method = body.method
     code = body.code
     user_lat = body.latitude
@@ -132,9 +216,9 @@ async def mark_attendance(
         entry = db.query(OTPCode).filter(OTPCode.code == code).first()
 
     if not entry:
-        raise ValidationError("Invalid code")
+        raise _mark_rejected("invalid_code", ValidationError("Invalid code"))
     if entry.expires_at < now:
-        raise ValidationError("Code has expired")
+        raise _mark_rejected("expired_code", ValidationError("Code has expired"))
     
     # Use timetable_id from the QR/OTP code itself (security fix)
     actual_timetable_id = entry.timetable_id
@@ -142,9 +226,18 @@ async def mark_attendance(
     # 2. Timetable exists and is active
     timetable = db.query(Timetable).filter(Timetable.id == actual_timetable_id).first()
     if not timetable:
-        raise NotFoundError("Timetable not found")
+        raise _mark_rejected("timetable_not_found", NotFoundError("Timetable not found"))
     if not timetable.is_active:
-        raise ForbiddenError("This timetable session is not active")
+        raise _mark_rejected("inactive_session", ForbiddenError("This timetable session is not active"))
+    if settings.ENFORCE_SESSION_WINDOW and not active_session_index.is_live(
+        db,
+        timetable.id,
+        grace_seconds=settings.SESSION_WINDOW_GRACE_MINUTES * 60,
+    ):
+        raise _mark_rejected(
+            "outside_window",
+            ForbiddenError("This code can only be used during the scheduled session"),
+        )
 
     # 3. Student is enrolled in the timetable's division
     enrollment = (
@@ -157,28 +250,20 @@ async def mark_attendance(
         .first()
     )
     if not enrollment:
-        raise ForbiddenError("You are not enrolled in this division")
+        raise _mark_rejected("not_enrolled", ForbiddenError("You are not enrolled in this division"))
 
     # 4. Location & GPS/WiFi requirements preprocessing
-    location: Optional[Location] = None
-    if timetable.location_id:
-        location = db.query(Location).filter(Location.id == timetable.location_id).first()
+    fence = geofence_index.get(db, timetable.location_id) if timetable.location_id else None
 
     # Determine what verifications are required
-    location_requires_gps = (
-        location is not None and 
-        location.latitude is not None and 
-        location.longitude is not None and 
-        location.radius is not None and
-        location.radius > 0
-    )
+    location_requires_gps = fence is not None and fence.radius > 0
     
     registered_aps = []
-    if location is not None:
+    if timetable.location_id:
         registered_aps = (
             db.query(AccessPoint)
             .filter(
-                AccessPoint.location_id == location.id,
+                AccessPoint.location_id == timetable.location_id,
                 AccessPoint.is_active == True,
             )
             .all()
@@ -189,29 +274,32 @@ async def mark_attendance(
     # 5. GPS Verification
     if location_requires_gps:
         if user_lat is None or user_lon is None:
-            raise ForbiddenError("GPS coordinates required. Please enable location services.")
+            raise _mark_rejected(
+                "gps_missing",
+                ForbiddenError("GPS coordinates required. Please enable location services."),
+            )
         
-        distance = _haversine_distance(user_lat, user_lon, location.latitude, location.longitude)
-        if distance > location.radius:
-            raise ForbiddenError(
-                f"You are {distance:.0f}m away from the session location (maximum {location.radius}m allowed). "
+        if not fence.contains(user_lat, user_lon):
+            distance = fence.distance(user_lat, user_lon)
+            raise _mark_rejected("geofence", ForbiddenError(
+                f"You are {distance:.0f}m away from the session location (maximum {fence.radius}m allowed). "
                 f"Please move closer to the classroom."
-            )
+            ))
 
     # 6. WiFi BSSID Verification - MUST pass if location has registered APs
     if location_has_wifi:
         if not bssid:
-            raise ForbiddenError(
+            raise _mark_rejected("bssid_missing", ForbiddenError(
                 "WiFi connection required. Please connect to the authorized network and try again."
-            )
+            ))
         
         # Check for fake MAC address (Android returns this when it can't get real BSSID)
         fake_mac = "020000000000"
         normalized_bssid_check = bssid.replace(':', '').replace('-', '').upper().strip()
         if normalized_bssid_check == fake_mac:
-            raise ForbiddenError(
+            raise _mark_rejected("bssid_missing", ForbiddenError(
                 "Unable to detect WiFi network. Please ensure you are connected to the authorized WiFi network."
-            )
+            ))
         
         # Normalize BSSID: remove colons/dashes, convert to uppercase
         def normalize_bssid(b: str) -> str:
@@ -222,78 +310,74 @@ async def mark_attendance(
         normalized_bssid = normalize_bssid(bssid) if bssid else ""
         registered_bssids = [normalize_bssid(ap.mac_address) for ap in registered_aps if ap.mac_address]
         
-        # Debug logging
-        logger.warning(f"[WIFI DEBUG] Phone BSSID: '{bssid}' → normalized: '{normalized_bssid}'")
-        logger.warning(f"[WIFI DEBUG] Registered BSSIDs: {registered_bssids}")
+        logger.debug(
+            "BSSID check: phone=%r normalized=%r registered=%s",
+            bssid, normalized_bssid, registered_bssids,
+        )
         
         bssid_matched = normalized_bssid in registered_bssids
         
         if not bssid_matched:
-            raise ForbiddenError(
+            raise _mark_rejected("bssid", ForbiddenError(
                 f"You are not connected to the authorized WiFi network. "
                 f"Detected: {bssid or 'none'}. "
                 f"Required: {', '.join([ap.mac_address for ap in registered_aps]) or 'any registered network'}."
-            )
+            ))
 
     # =========================================================================
-    # PHASE 2: DUPLICATE CHECK WITH ROW LOCKING (pessimistic lock)
-    # =========================================================================
-
-    today_start = datetime.now(timezone.utc).replace(tzinfo=None).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Use row-level lock to prevent race conditions
-    # This ensures only ONE request can create attendance for this student+timetable combo
-    duplicate = (
-        db.query(AttendanceRecord)
-        .filter(
-            AttendanceRecord.timetable_id == actual_timetable_id,
-            AttendanceRecord.student_id == current_user.id,
-            AttendanceRecord.marked_at >= today_start,
-        )
-        .with_for_update()  # Pessimistic lock: wait for other transactions
-        .first()
-    )
-    if duplicate:
-        raise ConflictError("Attendance already marked for this session today")
-
-    # =========================================================================
-    # PHASE 3: CREATE ATTENDANCE RECORD (all validations passed)
+    # PHASE 2: INSERT, SKIPPING DUPLICATES (all validations passed)
     # =========================================================================
 
+    # One statement both checks and inserts: the unique
+    # (timetable_id, student_id, session_date) index makes a concurrent or
+    # repeated mark a no-op that returns no row.
     try:
-        record = AttendanceRecord(
-            timetable_id=actual_timetable_id,
-            student_id=current_user.id,
-            enrollment_id=enrollment.id,
-            teacher_id=timetable.teacher_id,
-            division_id=timetable.division_id,
-            batch_id=timetable.batch_id,
-            location_id=timetable.location_id,
-            marked_at=now,
-            status=AttendanceStatus.PRESENT,
-            device_info=device_info_str,
+        record = db.scalars(
+            insert_attendance(db)
+            .values(
+                timetable_id=actual_timetable_id,
+                student_id=current_user.id,
+                enrollment_id=enrollment.id,
+                teacher_id=timetable.teacher_id,
+                division_id=timetable.division_id,
+                batch_id=timetable.batch_id,
+                location_id=timetable.location_id,
+                marked_at=now,
+                session_date=campus_date(now),
+                status=AttendanceStatus.PRESENT,
+                device_info=device_info_str,
+            )
+            .returning(AttendanceRecord)
+        ).one_or_none()
+        if record is None:
+            db.rollback()
+            raise _mark_rejected(
+                "duplicate", ConflictError("Attendance already marked for this session today")
+            )
+        record_data = _serialize_record(record)
+        db.query(type(entry)).filter(type(entry).id == entry.id).update(
+            {"used_count": func.coalesce(type(entry).used_count, 0) + 1},
+            synchronize_session=False,
         )
-        db.add(record)
-        entry.used_count = (entry.used_count or 0) + 1
         db.commit()
-        db.refresh(record)
-        
+
+    except ConflictError:
+        raise
     except IntegrityError as e:
-        # Catch any database constraint violations (belt-and-suspenders)
+        # Catch any other constraint violation (belt-and-suspenders)
         db.rollback()
-        logger.error(f"[INTEGRITY ERROR] Duplicate attendance attempt: {e}", exc_info=True)
-        raise ConflictError(
-            "Attendance already marked for this session. "
-            "This may happen if you submitted the form multiple times."
-        )
+        logger.error(f"[INTEGRITY ERROR] Failed attendance insert: {e}", exc_info=True)
+        raise _mark_rejected("error", ValidationError("Failed to mark attendance. Please try again."))
     except Exception as e:
         # Any other database error
         db.rollback()
         logger.error(f"[CRITICAL ERROR] Failed to mark attendance: {e}", exc_info=True)
-        raise ValidationError("Failed to mark attendance. Please try again.")
+        raise _mark_rejected("error", ValidationError("Failed to mark attendance. Please try again."))
+
+    MARK_OUTCOMES.labels("marked").inc()
 
     # =========================================================================
-    # PHASE 4: POST-CREATION NOTIFICATIONS & BROADCASTS
+    # PHASE 3: POST-CREATION NOTIFICATIONS & BROADCASTS
     # =========================================================================
 
     if timetable.teacher_id:
@@ -311,7 +395,7 @@ async def mark_attendance(
         actual_timetable_id,
         {
             "event": "attendance_marked",
-            "record": _serialize_record(record),
+            "record": record_data,
             "student": {
                 "id": current_user.id,
                 "name": f"{current_user.first_name} {current_user.last_name}".strip(),
@@ -324,12 +408,22 @@ async def mark_attendance(
         action="ATTENDANCE_MARKED",
         entity_type="attendance_record",
         user_id=current_user.id,
-        entity_id=str(record.id),
-        details={"timetable_id": actual_timetable_id, "method": method},
+        entity_id=str(record_data["id"]),
+        details={
+            "timetable_id": actual_timetable_id,
+            "method": method,
+            # Kept so marks can be re-checked by `app.services.geofence audit`;
+            # the coordinates themselves are not stored.
+            "location_id": timetable.location_id,
+            **fence_check(fence, user_lat, user_lon),
+        },
         request=request,
     )
 
-    return success_response(_serialize_record(record), "Attendance marked successfully")
+    result = success_response(record_data, "Attendance marked successfully")
+    if idempotency_key:
+        idempotency_store.put("attendance-mark", current_user.id, idempotency_key, result)
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -339,15 +433,23 @@ async def mark_attendance(
 @router.get("/history/{user_id}")
 async def get_attendance_history(
     user_id: int,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy offset paging"),
     limit: int = Query(20, ge=1, le=100),
+    include_total: CountMode = Query("exact"),
     timetable_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Students can only view their own history; teachers and admins can view any."""
+    """Students can only view their own history; teachers and admins can view any.
+
+    Newest first, paged by cursor; ``page`` is still accepted. Without
+    ``start_date`` only the last ATTENDANCE_HISTORY_LOOKBACK_DAYS are
+    searched; the bound applied is returned as ``start_date`` (and
+    ``lookback_days`` when it was defaulted).
+    """
     if current_user.role == UserRole.STUDENT and current_user.id != user_id:
         raise ForbiddenError("You can only view your own attendance history")
 
@@ -355,34 +457,32 @@ async def get_attendance_history(
     if not target:
         raise NotFoundError("User not found")
 
-    q = db.query(AttendanceRecord).options(
-        joinedload(AttendanceRecord.timetable).joinedload(Timetable.subject)
-    ).filter(AttendanceRecord.student_id == user_id)
+    q = db.query(AttendanceRecord).filter(AttendanceRecord.student_id == user_id)
 
     if timetable_id:
         q = q.filter(AttendanceRecord.timetable_id == timetable_id)
-    if start_date:
-        q = q.filter(AttendanceRecord.marked_at >= datetime.combine(start_date, datetime.min.time()))
-    if end_date:
-        q = q.filter(AttendanceRecord.marked_at <= datetime.combine(end_date, datetime.max.time()))
-
-    total = q.count()
-    records = (
-        q.order_by(AttendanceRecord.marked_at.desc())
-        .offset((page - 1) * limit)
-        .limit(limit)
-        .all()
+    # Always bound marked_at so Postgres only scans the relevant partitions.
+    lookback_days = None
+    if start_date is None:
+        lookback_days = settings.ATTENDANCE_HISTORY_LOOKBACK_DAYS
+        start_date = (end_date or date.today()) - timedelta(days=lookback_days)
+    q = q.filter(*marked_between(start_date, end_date))
+
+    result = keyset_page(
+        q.options(joinedload(AttendanceRecord.timetable).joinedload(Timetable.subject)),
+        AttendanceRecord.marked_at,
+        AttendanceRecord.id,
+        limit,
+        cursor=cursor,
+        page=page,
     )
+    result.total = count_total(q, include_total)
 
-    return success_response(
-        {
-            "items": [_serialize_record(r, include_timetable=True) for r in records],
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "pages": math.ceil(total / limit) if total > 0 else 0,
-        }
-    )
+    return success_response({
+        **result.as_dict(lambda r: _serialize_record(r, include_timetable=True)),
+        "start_date": start_date.isoformat(),
+        "lookback_days": lookback_days,
+    })
 
 
 # ---------------------------------------------------------------------------
@@ -393,7 +493,7 @@ async def get_attendance_history(
 async def get_session_attendance(
     timetable_id: int,
     session_date: Optional[date] = Query(None, description="Filter by date (YYYY-MM-DD). Defaults to today."),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     timetable = db.query(Timetable).filter(Timetable.id == timetable_id).first()
@@ -428,6 +528,48 @@ async def get_session_attendance(
     )
 
 
+# ---------------------------------------------------------------------------
+# POST /close-ended  —  mark absentees for every session that just ended
+# ---------------------------------------------------------------------------
+
+@router.post("/close-ended")
+async def close_ended_sessions(
+    request: Request,
+    within_minutes: int = Query(15, ge=1, le=720, description="Close sessions that ended this many minutes ago or less"),
+    current_user: CurrentUser = Depends(require_role(UserRole.ADMIN)),
+    db: Session = Depends(get_db),
+):
+    """Campus-wide sweep: one INSERT ... SELECT covering every division-wide
+    session whose end_time fell within the window."""
+    result = close_recently_ended_sessions(db, within_minutes)
+    db.commit()
+
+    await log_action(
+        db,
+        action="ENDED_SESSIONS_CLOSED",
+        entity_type="attendance_batch",
+        user_id=current_user.id,
+        details={"within_minutes": within_minutes, **result},
+        request=request,
+    )
+
+    return success_response(
+        result,
+        f"Closed {result['sessions_closed']} sessions, marked {result['marked_absent']} students as absent",
+    )
+
+
+@router.get("/close-ended/metrics")
+def get_auto_close_metrics(
+    current_user: CurrentUser = Depends(require_role(UserRole.ADMIN)),
+):
+    """Counters from the background auto-close worker in this process."""
+    return success_response(
+        {"enabled": settings.AUTO_CLOSE_ENABLED, **session_auto_closer.metrics},
+        "Auto-close metrics retrieved successfully",
+    )
+
+
 # ---------------------------------------------------------------------------
 # POST /mark-absent/{timetable_id}  —  mark all unenrolled students as absent
 # ---------------------------------------------------------------------------
@@ -435,9 +577,9 @@ async def get_session_attendance(
 @router.post("/mark-absent/{timetable_id}")
 async def mark_absent_students(
     timetable_id: int,
-    session_date: Optional[date] = Query(None, description="Date for the session (YYYY-MM-DD). Defaults to today."),
+    session_date: Optional[date] = Query(None, description="Date for the session (YYYY-MM-DD). Defaults to today on campus."),
     request: Request = None,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Mark all enrolled students who haven't marked attendance as ABSENT.
@@ -451,70 +593,16 @@ async def mark_absent_students(
     if current_user.role == UserRole.TEACHER and timetable.teacher_id != current_user.id:
         raise ForbiddenError("You are not the teacher for this timetable")
 
-    target_date = session_date or date.today()
-    
-    # Use UTC for database queries but display local date
-    day_start_utc = datetime.combine(target_date, datetime.min.time())
-    day_end_utc = datetime.combine(target_date, datetime.max.time())
-
-    # Get enrolled students for this division
-    enrollment_query = (
-        db.query(StudentEnrollment)
-        .filter(
-            StudentEnrollment.division_id == timetable.division_id,
-            StudentEnrollment.status == EnrollmentStatus.ACTIVE,
-        )
-    )
-    
-    # If timetable has a batch, filter by batch too
     if timetable.batch_id:
-        enrollment_query = enrollment_query.filter(
-            StudentEnrollment.batch_id == timetable.batch_id
+        raise ValidationError(
+            "Absent marking is not supported for batch sessions: enrollments are not linked to batches"
         )
-    
-    enrolled_students = enrollment_query.all()
-
-    # Get students who already marked attendance for this session
-    existing_records = (
-        db.query(AttendanceRecord)
-        .filter(
-            AttendanceRecord.timetable_id == timetable_id,
-        )
-        .all()
-    )
-    
-    # Filter to today's records in Python (handles timezone better)
-    today_records = [
-        r for r in existing_records 
-        if r.marked_at and r.marked_at.date() == target_date
-    ]
-    marked_student_ids = set(r.student_id for r in today_records)
-
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    marked_absent = 0
-    skipped_already_marked = 0
-
-    for enrollment in enrolled_students:
-        if enrollment.student_id in marked_student_ids:
-            skipped_already_marked += 1
-            continue
-
-        record = AttendanceRecord(
-            timetable_id=timetable_id,
-            student_id=enrollment.student_id,
-            enrollment_id=enrollment.id,
-            teacher_id=timetable.teacher_id,
-            division_id=timetable.division_id,
-            batch_id=timetable.batch_id,
-            location_id=timetable.location_id,
-            marked_at=now,
-            status=AttendanceStatus.ABSENT,
-            device_info="system:marked_absent",
-        )
-        db.add(record)
-        marked_absent += 1
 
+    target_date = session_date or campus_date()
+    counts = mark_session_absentees(db, timetable, target_date)
     db.commit()
+    marked_absent = counts["marked_absent"]
+    skipped_already_marked = counts["skipped_already_marked"]
 
     await log_action(
         db,
@@ -537,7 +625,7 @@ async def mark_absent_students(
             "date": target_date.isoformat(),
             "marked_absent": marked_absent,
             "skipped_already_marked": skipped_already_marked,
-            "total_enrolled": len(enrolled_students),
+            "total_enrolled": counts["total_enrolled"],
         },
         f"Marked {marked_absent} students as absent"
     )
@@ -551,7 +639,7 @@ async def mark_absent_students(
 async def update_attendance_record(
     attendance_id: int,
     request: Request,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Body JSON fields: status  str  'present' | 'absent' | 'late'"""
@@ -599,28 +687,19 @@ async def update_attendance_record(
 
 @router.get("")
 def list_attendance_records(
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy offset paging"),
     limit: int = Query(50, ge=1, le=200),
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    include_total: CountMode = Query("estimated"),
+    current_user: CurrentUser = Depends(require_role(UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
-    total = db.query(AttendanceRecord).count()
-    records = (
-        db.query(AttendanceRecord)
-        .order_by(AttendanceRecord.marked_at.desc())
-        .offset((page - 1) * limit)
-        .limit(limit)
-        .all()
-    )
-    return success_response(
-        {
-            "items": [_serialize_record(r) for r in records],
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "pages": math.ceil(total / limit) if total > 0 else 0,
-        }
-    )
+    """Newest first, paged by cursor. The total defaults to the planner's
+    estimate because an exact count scans the whole table."""
+    q = RECORD_COLUMNS.query(db).select_from(AttendanceRecord)
+    result = keyset_page(q, AttendanceRecord.marked_at, AttendanceRecord.id, limit, cursor=cursor, page=page)
+    result.total = count_total(q, include_total, AttendanceRecord.__tablename__)
+    return fast_response(result.as_dict(RECORD_COLUMNS.to_dict))
 
 
 # ---------------------------------------------------------------------------
@@ -629,42 +708,73 @@ def list_attendance_records(
 
 @router.get("/today")
 def get_today_attendance(
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    view: Literal["summary", "compact", "full"] = Query(
+        "full", description="summary: counts only; compact: counts and record ids; full: the records too"
+    ),
+    group_by: Optional[Literal["teacher", "session"]] = Query(
+        None, description="Also break the day down per teacher or per session (timetable)"
+    ),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
-    """Get all attendance records for today. Teachers see their own, admins see all."""
+    """Get all attendance records for today. Teachers see their own, admins see all.
+
+    Every record appears once, in ``records`` (``full`` only); the
+    ``<status>_ids`` lists and groups refer to records by id. ``summary`` is
+    counted in SQL, for dashboards that poll.
+
+    ``full`` still carries the present and late records in ``items`` for
+    installed app builds that predate ``records``; drop it next release.
+    """
     today = date.today()
     day_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=None)
     day_end = datetime.combine(today, datetime.max.time()).replace(tzinfo=None)
-    
-    query = (
-        db.query(AttendanceRecord)
-        .options(
-            joinedload(AttendanceRecord.student),
-            joinedload(AttendanceRecord.timetable).joinedload(Timetable.subject)
-        )
-        .filter(
-            AttendanceRecord.marked_at >= day_start,
-            AttendanceRecord.marked_at <= day_end,
-        )
-    )
+    filters = [
+        AttendanceRecord.marked_at >= day_start,
+        AttendanceRecord.marked_at <= day_end,
+    ]
     
     # Teachers only see their own students' attendance
     if current_user.role == UserRole.TEACHER:
-        query = query.filter(AttendanceRecord.teacher_id == current_user.id)
-    
-    records = query.order_by(AttendanceRecord.marked_at.desc()).all()
+        filters.append(AttendanceRecord.teacher_id == current_user.id)
     
-    present_students = [_serialize_record_with_student(r) for r in records if r.status == AttendanceStatus.PRESENT]
-    absent_students = [_serialize_record_with_student(r) for r in records if r.status == AttendanceStatus.ABSENT]
-    late_students = [_serialize_record_with_student(r) for r in records if r.status == AttendanceStatus.LATE]
-    
-    return success_response({
-        "date": today.isoformat(),
-        "total": len(records),
-        "present_count": len(present_students),
-        "absent_count": len(absent_students),
-        "late_count": len(late_students),
-        "items": present_students + late_students,
-        "all_records": [_serialize_record_with_student(r) for r in records],
-    })
+    group_field = TODAY_GROUPS.get(group_by)
+    with_ids = view != "summary"
+    day = _tally(with_ids)
+    groups: dict[int, dict] = {}
+    records = None
+
+    if view == "summary":
+        columns = [AttendanceRecord.status]
+        if group_field:
+            columns.append(getattr(AttendanceRecord, group_field))
+        counts = db.query(*columns, func.count()).filter(*filters).group_by(*columns)
+        for row in counts:
+            _count_into(day, row[0], row[-1])
+            if group_field:
+                group = groups.setdefault(row[1], _tally(False, **{group_field: row[1]}))
+                _count_into(group, row[0], row[-1])
+    else:
+        projection = RECORD_WITH_STUDENT_COLUMNS if view == "full" else RECORD_ID_COLUMNS
+        query = _records_with_student(db) if view == "full" else projection.query(db).select_from(AttendanceRecord)
+        records = projection.all(query.filter(*filters).order_by(AttendanceRecord.marked_at.desc()))
+        for record in records:
+            _count_into(day, record["status"], record_id=record["id"])
+            if group_field:
+                key = record[group_field]
+                group = groups.setdefault(key, _tally(True, **{group_field: key}))
+                _count_into(group, record["status"], record_id=record["id"])
+
+    body = {"date": today.isoformat(), "view": view, **day}
+    if group_by:
+        body["groups"] = [groups[key] for key in sorted(groups)]
+    if view == "full":
+        body["records"] = records
+        # Deprecated: kept for one release for app builds that read ``items``.
+        body["items"] = [
+            record
+            for wanted in (AttendanceStatus.PRESENT, AttendanceStatus.LATE)
+            for record in records
+            if record["status"] == wanted
+        ]
+    return fast_response(body)
@@ -1,21 +1,39 @@
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.core.dependencies import get_db, get_current_user
+from app.core.client_ip import client_ip
+from app.core.dependencies import (
+    get_current_user,
+    get_current_user_model,
+    get_db,
+    load_principal,
+)
+from app.core.principal_cache import CurrentUser, principal_cache
 from app.core.email import email_service
 from app.core.response import success_response
 from app.schemas.auth import (
     AuthForgotPasswordRequest,
     AuthLoginRequest,
     AuthLoginResponse,
+    AuthLogoutRequest,
     AuthRegisterRequest,
     AuthResetPasswordRequest,
     AuthTokens,
     TokenRefreshRequest,
     UserPublic,
 )
-from app.security.jwt_token import create_access_token, create_refresh_token, decode_token
-from app.security.password import hash_password, verify_password
+from app.security.jwt_token import (
+    access_token_claims,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+)
+from app.security.login_throttle import login_throttle
+from app.security.password import password_hasher
+from app.security.refresh_tokens import RefreshTokenRejected, refresh_tokens
+from app.security.token_revocation import token_revocation
 from app.database.password_reset_tokens import PasswordResetToken
 from app.database.user import User
 from datetime import datetime, timedelta
@@ -38,7 +56,7 @@ def register(payload: AuthRegisterRequest, db: Session = Depends(get_db)):
     user = User(
         email=payload.email,
         username=payload.username,
-        password_hash=hash_password(payload.password, payload.username),
+        password_hash=password_hasher.hash_sync(payload.password, payload.username),
         first_name=payload.first_name,
         last_name=payload.last_name,
         phone=payload.phone,
@@ -49,8 +67,10 @@ def register(payload: AuthRegisterRequest, db: Session = Depends(get_db)):
 
     return success_response(
         data={
-            "access_token": create_access_token({"sub": str(user.id)}),
-            "refresh_token": create_refresh_token({"sub": str(user.id)}),
+            "access_token": create_access_token(access_token_claims(user)),
+            "refresh_token": create_refresh_token(
+                refresh_tokens.issue(user.id, user.token_version or 0)
+            ),
             "user": {
                 "id": user.id,
                 "email": user.email,
@@ -65,22 +85,41 @@ def register(payload: AuthRegisterRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(credentials: AuthLoginRequest, db: Session = Depends(get_db)):
+def login(credentials: AuthLoginRequest, request: Request, db: Session = Depends(get_db)):
+    account = login_throttle.account_key(credentials.email or credentials.username)
+    remote_ip = client_ip(request)
+    retry_after = login_throttle.retry_after(account, remote_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     user = None
     if credentials.email:
         user = db.query(User).filter(User.email == credentials.email).first()
     elif credentials.username:
         user = db.query(User).filter(User.username == credentials.username).first()
 
-    if not user or not verify_password(
-        credentials.password, user.password_hash, user.username
-    ):
+    verified, upgraded_hash = False, None
+    if user:
+        verified, upgraded_hash = password_hasher.verify_and_update_sync(
+            credentials.password, user.password_hash, user.username
+        )
+    if not verified:
+        login_throttle.record_failure(account, remote_ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    login_throttle.reset_account(account)
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Inactive user")
+    if upgraded_hash:
+        # Stored hash uses a deprecated scheme or cost; replace it transparently.
+        user.password_hash = upgraded_hash
+        db.commit()
 
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
+    access_token = create_access_token(access_token_claims(user))
+    refresh_token = create_refresh_token(refresh_tokens.issue(user.id, user.token_version or 0))
 
     return success_response(
         data={
@@ -108,12 +147,23 @@ def refresh_token(request: TokenRefreshRequest, db: Session = Depends(get_db)):
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user or not user.is_active:
+    try:
+        successor = refresh_tokens.rotate(payload)
+    except RefreshTokenRejected as exc:
+        detail = "Refresh token reuse detected" if exc.reason == "reuse" else "Invalid or expired refresh token"
+        raise HTTPException(status_code=401, detail=detail)
+
+    version = int(payload.get("ver", 0))
+    if version < token_revocation.min_version(int(user_id)):
+        refresh_tokens.revoke_family(successor["fam"])
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    principal = load_principal(db, int(user_id))
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=403, detail="User not found or inactive")
 
-    access_token = create_access_token({"sub": str(user.id)})
-    new_refresh_token = create_refresh_token({"sub": str(user.id)})
+    access_token = create_access_token(access_token_claims(principal, version=version))
+    new_refresh_token = create_refresh_token(successor)
 
     return success_response(
         data={
@@ -125,10 +175,25 @@ def refresh_token(request: TokenRefreshRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/logout")
-def logout(_=None):
+def logout(payload: Optional[AuthLogoutRequest] = None):
+    """End the session the refresh token belongs to. Access tokens simply expire."""
+    if payload is not None:
+        try:
+            claims = decode_token(payload.refresh_token)
+        except Exception:
+            claims = {}
+        if claims.get("fam"):
+            refresh_tokens.revoke_family(claims["fam"])
     return success_response(None, "Logged out successfully")
 
 
+@router.post("/logout-all")
+def logout_all(current_user: CurrentUser = Depends(get_current_user)):
+    """Revoke every refresh token issued to the current user."""
+    refresh_tokens.revoke_all(current_user.id)
+    return success_response(None, "Logged out of all sessions")
+
+
 @router.post("/forgot-password")
 def forgot_password(payload: AuthForgotPasswordRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == payload.email).first()
@@ -179,15 +244,17 @@ def reset_password(payload: AuthResetPasswordRequest, db: Session = Depends(get_
     if not user or not user.is_active:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = hash_password(payload.new_password, user.username)
+    user.password_hash = password_hasher.hash_sync(payload.new_password, user.username)
     reset_entry.used_at = now
     db.commit()
+    principal_cache.invalidate(user.id)
+    refresh_tokens.revoke_all(user.id)
 
     return success_response(None, "Password has been reset")
 
 
 @router.get("/me")
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_user_model)):
     return success_response(
         data={
             "id": current_user.id,
@@ -204,7 +271,7 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/is-admin")
-def is_admin(current_user: User = Depends(get_current_user)):
+def is_admin(current_user: CurrentUser = Depends(get_current_user)):
     return success_response(
         data={"is_admin": current_user.role.value == "ADMIN"},
         message="Admin check completed",
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.core.dependencies import get_db, require_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
 from app.core.response import success_response
 from app.schemas.batches import BatchCreate, BatchOut, BatchUpdate
 from app.database.batches import Batch
@@ -21,16 +23,28 @@ def _serialize_batch(batch: Batch) -> dict:
     }
 
 
+batch_list_params = list_params(("id", "name"))
+
+
 @router.get("")
-def list_all_batches(db: Session = Depends(get_db)):
-    batches = db.query(Batch).all()
-    return success_response([_serialize_batch(b) for b in batches], "Batches retrieved successfully")
+def list_all_batches(
+    division_id: Optional[int] = Query(None),
+    params: ListParams = Depends(batch_list_params),
+    db: Session = Depends(get_db),
+):
+    query = db.query(Batch)
+    if division_id is not None:
+        query = query.filter(Batch.division_id == division_id)
+    page = paginate(query, Batch, params, Batch.__tablename__ if division_id is None else None)
+    return list_response(page, _serialize_batch, params, "Batches retrieved successfully")
 
 
 @router.get("/division/{division_id}")
-def list_batches_by_division(division_id: int, db: Session = Depends(get_db)):
-    batches = db.query(Batch).filter(Batch.division_id == division_id).all()
-    return success_response([_serialize_batch(b) for b in batches], "Batches retrieved successfully")
+def list_batches_by_division(
+    division_id: int, params: ListParams = Depends(batch_list_params), db: Session = Depends(get_db)
+):
+    page = paginate(db.query(Batch).filter(Batch.division_id == division_id), Batch, params)
+    return list_response(page, _serialize_batch, params, "Batches retrieved successfully")
 
 
 @router.get("/{batch_id}")
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.core.dependencies import get_db, require_admin
+from app.core.dependencies import get_db, require_admin, require_teacher_or_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
+from app.core.principal_cache import CurrentUser
+from app.database.timetables import Timetable
+from app.database.user import UserRole
 from app.schemas.qr_code import QRCodeCreate, QRCodeOut
 from app.database.qr_codes import QRCode
 from app.schemas.otp_code import OTPCodeCreate, OTPCodeOut
@@ -9,24 +14,84 @@ from app.database.otp_code import OTPCode
 router = APIRouter(prefix="/api/v1/codes", tags=["codes"])
 
 
-@router.get("/qr", response_model=list[QRCodeOut])
-def list_qr_codes(db: Session = Depends(get_db)):
-    return db.query(QRCode).all()
-
-
-@router.get("/otp", response_model=list[OTPCodeOut])
-def list_otp_codes(db: Session = Depends(get_db)):
-    return db.query(OTPCode).all()
-
-
-@router.get("/qr/timetable/{timetable_id}", response_model=list[QRCodeOut])
-def get_qr_codes_by_timetable(timetable_id: int, db: Session = Depends(get_db)):
-    return db.query(QRCode).filter(QRCode.timetable_id == timetable_id).all()
-
-
-@router.get("/otp/timetable/{timetable_id}", response_model=list[OTPCodeOut])
-def get_otp_codes_by_timetable(timetable_id: int, db: Session = Depends(get_db)):
-    return db.query(OTPCode).filter(OTPCode.timetable_id == timetable_id).all()
+# Codes are issued on every refresh and never deleted, so these lists are
+# newest first and always paged.
+code_list_params = list_params(("id", "created_at", "expires_at"), default_sort="-created_at")
+
+
+def _serialize_qr_code(code: QRCode) -> dict:
+    return QRCodeOut.model_validate(code).model_dump(mode="json")
+
+
+def _serialize_otp_code(code: OTPCode) -> dict:
+    return OTPCodeOut.model_validate(code).model_dump(mode="json")
+
+
+def _code_page(
+    db: Session,
+    model,
+    serialize,
+    params: ListParams,
+    timetable_id: Optional[int],
+    current_user: CurrentUser,
+) -> dict:
+    # Live codes are what students type in to mark attendance: admins see
+    # all of them, teachers only those of their own sessions.
+    if current_user.role != UserRole.ADMIN:
+        if timetable_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Teachers must list codes per timetable"
+            )
+        teacher_id = db.query(Timetable.teacher_id).filter(Timetable.id == timetable_id).scalar()
+        if teacher_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this timetable"
+            )
+    query = db.query(model)
+    if timetable_id is not None:
+        query = query.filter(model.timetable_id == timetable_id)
+    page = paginate(query, model, params, model.__tablename__ if timetable_id is None else None)
+    return list_response(page, serialize, params, "Codes retrieved successfully")
+
+
+@router.get("/qr")
+def list_qr_codes(
+    timetable_id: Optional[int] = Query(None),
+    params: ListParams = Depends(code_list_params),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_teacher_or_admin),
+):
+    return _code_page(db, QRCode, _serialize_qr_code, params, timetable_id, current_user)
+
+
+@router.get("/otp")
+def list_otp_codes(
+    timetable_id: Optional[int] = Query(None),
+    params: ListParams = Depends(code_list_params),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_teacher_or_admin),
+):
+    return _code_page(db, OTPCode, _serialize_otp_code, params, timetable_id, current_user)
+
+
+@router.get("/qr/timetable/{timetable_id}")
+def get_qr_codes_by_timetable(
+    timetable_id: int,
+    params: ListParams = Depends(code_list_params),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_teacher_or_admin),
+):
+    return _code_page(db, QRCode, _serialize_qr_code, params, timetable_id, current_user)
+
+
+@router.get("/otp/timetable/{timetable_id}")
+def get_otp_codes_by_timetable(
+    timetable_id: int,
+    params: ListParams = Depends(code_list_params),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(require_teacher_or_admin),
+):
+    return _code_page(db, OTPCode, _serialize_otp_code, params, timetable_id, current_user)
 
 
 @router.post(
@@ -4,18 +4,19 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import get_current_user, get_read_db
+from app.core.principal_cache import CurrentUser
 from app.core.response import success_response
 from app.database.attendance_records import AttendanceRecord, AttendanceStatus
-from app.database.user import User
+from app.services.attendance_partitions import marked_between
 
 router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
 
 
 @router.get("/stats")
 def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     today = date.today()
     start_day = today - timedelta(days=6)
@@ -26,7 +27,7 @@ def get_dashboard_stats(
         base_query = base_query.filter(AttendanceRecord.student_id == current_user.id)
     
     # Today's stats
-    today_query = base_query.filter(func.date(AttendanceRecord.marked_at) == today)
+    today_query = base_query.filter(*marked_between(today, today))
     today_total = today_query.count()
     today_present = today_query.filter(AttendanceRecord.status == AttendanceStatus.PRESENT).count()
     today_absent = today_query.filter(AttendanceRecord.status == AttendanceStatus.ABSENT).count()
@@ -43,7 +44,7 @@ def get_dashboard_stats(
     trend_query = db.query(
         func.date(AttendanceRecord.marked_at).label("day"),
         func.count(AttendanceRecord.id).label("count"),
-    ).filter(func.date(AttendanceRecord.marked_at) >= start_day)
+    ).filter(*marked_between(start_day, today))
 
     if current_user.role.value == "STUDENT":
         trend_query = trend_query.filter(AttendanceRecord.student_id == current_user.id)
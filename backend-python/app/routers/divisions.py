@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, joinedload
 from app.core.dependencies import get_db, require_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
 from app.core.response import success_response
 from app.schemas.divisions import DivisionCreate, DivisionUpdate, DivisionOut
 from app.database.divisions import Division
@@ -25,21 +27,41 @@ def _serialize_division(division: Division) -> dict:
     }
 
 
+def _division_query(db: Session):
+    return db.query(Division).options(joinedload(Division.branch).joinedload(Branch.course))
+
+
+division_list_params = list_params(("id", "name"))
+
+
 @router.get("")
-def list_all_divisions(db: Session = Depends(get_db)):
-    divisions = db.query(Division).all()
-    return success_response([_serialize_division(d) for d in divisions], "Divisions retrieved successfully")
+def list_all_divisions(
+    branch_id: Optional[int] = Query(None),
+    academic_year: Optional[str] = Query(None),
+    params: ListParams = Depends(division_list_params),
+    db: Session = Depends(get_db),
+):
+    query = _division_query(db)
+    if branch_id is not None:
+        query = query.filter(Division.branch_id == branch_id)
+    if academic_year is not None:
+        query = query.filter(Division.academic_year == academic_year)
+    unfiltered = branch_id is None and academic_year is None
+    page = paginate(query, Division, params, Division.__tablename__ if unfiltered else None)
+    return list_response(page, _serialize_division, params, "Divisions retrieved successfully")
 
 
 @router.get("/branch/{branch_id}")
-def list_divisions_by_branch(branch_id: int, db: Session = Depends(get_db)):
-    divisions = db.query(Division).filter(Division.branch_id == branch_id).all()
-    return success_response([_serialize_division(d) for d in divisions], "Divisions retrieved successfully")
+def list_divisions_by_branch(
+    branch_id: int, params: ListParams = Depends(division_list_params), db: Session = Depends(get_db)
+):
+    page = paginate(_division_query(db).filter(Division.branch_id == branch_id), Division, params)
+    return list_response(page, _serialize_division, params, "Divisions retrieved successfully")
 
 
 @router.get("/{division_id}")
 def get_division(division_id: int, db: Session = Depends(get_db)):
-    division = db.query(Division).filter(Division.id == division_id).first()
+    division = _division_query(db).filter(Division.id == division_id).first()
     if not division:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Division not found"
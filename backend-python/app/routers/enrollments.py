@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
-from app.core.dependencies import get_db, require_admin
+from app.core.dependencies import get_db, get_read_db, require_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
 from app.core.response import success_response
 from app.schemas.enrollment import EnrollmentCreate, EnrollmentOut, EnrollmentUpdate
-from app.database.student_enrollments import StudentEnrollment
+from app.database.student_enrollments import EnrollmentStatus, StudentEnrollment
+from app.services.bulk_import import detect_format, import_enrollments, import_message
 
 router = APIRouter(prefix="/api/v1/enrollments", tags=["enrollments"])
 
@@ -27,10 +30,37 @@ def _serialize_enrollment(enrollment: StudentEnrollment) -> dict:
     }
 
 
+enrollment_list_params = list_params(("id", "enrollment_number", "enrollment_date"))
+
+
+def _enrollment_page(query, params: ListParams, table_name: Optional[str] = None) -> dict:
+    page = paginate(query, StudentEnrollment, params, table_name)
+    return list_response(page, _serialize_enrollment, params, "Enrollments retrieved successfully")
+
+
 @router.get("")
-def list_enrollments(db: Session = Depends(get_db)):
-    enrollments = db.query(StudentEnrollment).all()
-    return success_response([_serialize_enrollment(e) for e in enrollments], "Enrollments retrieved successfully")
+def list_enrollments(
+    course_id: Optional[int] = Query(None),
+    branch_id: Optional[int] = Query(None),
+    division_id: Optional[int] = Query(None),
+    enrollment_status: Optional[EnrollmentStatus] = Query(None, alias="status"),
+    academic_year: Optional[str] = Query(None),
+    params: ListParams = Depends(enrollment_list_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(StudentEnrollment)
+    filters = [
+        (StudentEnrollment.course_id, course_id),
+        (StudentEnrollment.branch_id, branch_id),
+        (StudentEnrollment.division_id, division_id),
+        (StudentEnrollment.status, enrollment_status),
+        (StudentEnrollment.academic_year, academic_year),
+    ]
+    for column, value in filters:
+        if value is not None:
+            query = query.filter(column == value)
+    unfiltered = all(value is None for _, value in filters)
+    return _enrollment_page(query, params, StudentEnrollment.__tablename__ if unfiltered else None)
 
 
 @router.get("/{enrollment_id}")
@@ -48,43 +78,43 @@ def get_enrollment(enrollment_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/student/{student_id}")
-def list_enrollments_by_student(student_id: int, db: Session = Depends(get_db)):
-    enrollments = (
-        db.query(StudentEnrollment)
-        .filter(StudentEnrollment.student_id == student_id)
-        .all()
-    )
-    return success_response([_serialize_enrollment(e) for e in enrollments], "Enrollments retrieved successfully")
+def list_enrollments_by_student(
+    student_id: int,
+    params: ListParams = Depends(enrollment_list_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(StudentEnrollment).filter(StudentEnrollment.student_id == student_id)
+    return _enrollment_page(query, params)
 
 
 @router.get("/course/{course_id}")
-def list_enrollments_by_course(course_id: int, db: Session = Depends(get_db)):
-    enrollments = (
-        db.query(StudentEnrollment)
-        .filter(StudentEnrollment.course_id == course_id)
-        .all()
-    )
-    return success_response([_serialize_enrollment(e) for e in enrollments], "Enrollments retrieved successfully")
+def list_enrollments_by_course(
+    course_id: int,
+    params: ListParams = Depends(enrollment_list_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(StudentEnrollment).filter(StudentEnrollment.course_id == course_id)
+    return _enrollment_page(query, params)
 
 
 @router.get("/branch/{branch_id}")
-def list_enrollments_by_branch(branch_id: int, db: Session = Depends(get_db)):
-    enrollments = (
-        db.query(StudentEnrollment)
-        .filter(StudentEnrollment.branch_id == branch_id)
-        .all()
-    )
-    return success_response([_serialize_enrollment(e) for e in enrollments], "Enrollments retrieved successfully")
+def list_enrollments_by_branch(
+    branch_id: int,
+    params: ListParams = Depends(enrollment_list_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(StudentEnrollment).filter(StudentEnrollment.branch_id == branch_id)
+    return _enrollment_page(query, params)
 
 
 @router.get("/division/{division_id}")
-def list_enrollments_by_division(division_id: int, db: Session = Depends(get_db)):
-    enrollments = (
-        db.query(StudentEnrollment)
-        .filter(StudentEnrollment.division_id == division_id)
-        .all()
-    )
-    return success_response([_serialize_enrollment(e) for e in enrollments], "Enrollments retrieved successfully")
+def list_enrollments_by_division(
+    division_id: int,
+    params: ListParams = Depends(enrollment_list_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(StudentEnrollment).filter(StudentEnrollment.division_id == division_id)
+    return _enrollment_page(query, params)
 
 
 @router.post("")
@@ -109,6 +139,19 @@ def create_enrollment(
     return success_response(_serialize_enrollment(new_enrollment), "Enrollment created successfully", 201)
 
 
+@router.post("/import")
+def import_enrollments_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = Query(None),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db),
+    _=Depends(require_admin),
+):
+    """Create enrollments from a CSV or JSONL file; invalid rows are reported, not fatal."""
+    report = import_enrollments(db, file.file, detect_format(file.filename, format), dry_run)
+    return success_response(report.as_dict(), import_message(report))
+
+
 @router.put("/{enrollment_id}")
 def update_enrollment(
     enrollment_id: int,
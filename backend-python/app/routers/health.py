@@ -1,12 +1,18 @@
+import hmac
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.dependencies import get_db
+from app.core.metrics import render_metrics
+from app.core.read_replica import replica_health
+from app.database import database
 from app.core.response import success_response, error_response
+from app.security.password import password_hasher
 
 router = APIRouter(tags=["health"])
 
@@ -42,8 +48,30 @@ async def health_check(db: Session = Depends(get_db)):
             data={
                 "status": "ok",
                 "database": db_status,
+                "password_hashing": password_hasher.metrics(),
+                "replica": replica_health.status() if database.read_engine is not None else None,
                 "version": "1.0.0",
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             },
         ),
     )
+
+
+def require_metrics_access(request: Request) -> None:
+    """Let Prometheus in with the ``METRICS_TOKEN`` bearer token. Without a
+    configured token the endpoint is closed: behind a proxy every peer looks
+    internal, so the network cannot be trusted instead."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if not (
+        settings.METRICS_TOKEN
+        and scheme.lower() == "bearer"
+        and hmac.compare_digest(token, settings.METRICS_TOKEN)
+    ):
+        raise HTTPException(status_code=403, detail="Not authorized to read metrics")
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,11 +1,13 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-import math
 
 from app.core.dependencies import get_db, require_admin
+from app.core.pagination import ListParams, list_params, list_response, paginate
 from app.core.response import success_response
 from app.schemas.locations import LocationCreate, LocationOut, LocationUpdate
 from app.database.locations import Location, RoomType
+from app.services.geofence import geofence_index
 
 router = APIRouter(prefix="/api/v1/locations", tags=["locations"])
 
@@ -27,9 +29,43 @@ def _serialize_location(location: Location) -> dict:
 
 
 @router.get("")
-def list_locations(db: Session = Depends(get_db)):
-    locations = db.query(Location).all()
-    return success_response([_serialize_location(l) for l in locations], "Locations retrieved successfully")
+def list_locations(
+    room_type: Optional[RoomType] = Query(None),
+    params: ListParams = Depends(list_params(("id", "name"))),
+    db: Session = Depends(get_db),
+):
+    query = db.query(Location)
+    if room_type is not None:
+        query = query.filter(Location.room_type == room_type)
+    page = paginate(query, Location, params, Location.__tablename__ if room_type is None else None)
+    return list_response(page, _serialize_location, params, "Locations retrieved successfully")
+
+
+@router.get("/validate-point")
+def validate_point(
+    lat: float = Query(..., description="Latitude of the point"),
+    lon: float = Query(..., description="Longitude of the point"),
+    db: Session = Depends(get_db),
+):
+    matching_locations = [
+        {
+            "id": fence.location_id,
+            "name": fence.name,
+            "distance_meters": round(fence.distance(lat, lon), 2),
+            "radius_meters": fence.radius,
+        }
+        for fence in geofence_index.containing(db, lat, lon)
+    ]
+
+    if matching_locations:
+        return success_response(
+            {"valid": True, "locations": matching_locations},
+            "Point is within valid attendance location(s)",
+        )
+    return success_response(
+        {"valid": False, "locations": []},
+        "Point is not within any registered location radius",
+    )
 
 
 @router.get("/{location_id}")
@@ -70,6 +106,7 @@ def create_location(location_in: LocationCreate, db: Session = Depends(get_db),
     db.add(new_location)
     db.commit()
     db.refresh(new_location)
+    geofence_index.invalidate()
     return success_response(_serialize_location(new_location), "Location created successfully", 201)
 
 
@@ -97,6 +134,7 @@ def update_location(
         setattr(db_location, key, value)
     db.commit()
     db.refresh(db_location)
+    geofence_index.invalidate()
     return success_response(_serialize_location(db_location), "Location updated successfully")
 
 
@@ -109,47 +147,4 @@ def delete_location(location_id: int, db: Session = Depends(get_db), _=Depends(r
         )
     db.delete(db_location)
     db.commit()
-
-
-def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    R = 6371000
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
-@router.get("/validate-point")
-def validate_point(
-    lat: float = Query(..., description="Latitude of the point"),
-    lon: float = Query(..., description="Longitude of the point"),
-    db: Session = Depends(get_db),
-):
-    locations = db.query(Location).filter(
-        Location.latitude.isnot(None),
-        Location.longitude.isnot(None),
-        Location.radius.isnot(None),
-    ).all()
-
-    matching_locations = []
-    for loc in locations:
-        distance = _haversine_distance(lat, lon, loc.latitude, loc.longitude)
-        if distance <= loc.radius:
-            matching_locations.append({
-                "id": loc.id,
-                "name": loc.name,
-                "distance_meters": round(distance, 2),
-                "radius_meters": loc.radius,
-            })
-
-    if matching_locations:
-        return success_response(
-            {"valid": True, "locations": matching_locations},
-            "Point is within valid attendance location(s)",
-        )
-    return success_response(
-        {"valid": False, "locations": []},
-        "Point is not within any registered location radius",
-    )
+    geofence_index.invalidate()
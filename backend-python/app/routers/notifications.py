@@ -1,12 +1,13 @@
-import math
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_db
+from app.core.pagination import CountMode, count_total, keyset_page
+from app.core.principal_cache import CurrentUser
 from app.core.response import success_response
 from app.database.notifications import Notification
-from app.database.user import User
 
 router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"])
 
@@ -26,28 +27,19 @@ def _serialize_notification(record: Notification) -> dict:
 
 @router.get("")
 def list_notifications(
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: Optional[int] = Query(None, ge=1, description="Legacy offset paging"),
     limit: int = Query(20, ge=1, le=100),
+    include_total: CountMode = Query("exact"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     query = db.query(Notification).filter(Notification.user_id == current_user.id)
-    total = query.count()
-    records = (
-        query.order_by(Notification.created_at.desc())
-        .offset((page - 1) * limit)
-        .limit(limit)
-        .all()
-    )
+    result = keyset_page(query, Notification.created_at, Notification.id, limit, cursor=cursor, page=page)
+    result.total = count_total(query, include_total)
 
     return success_response(
-        {
-            "items": [_serialize_notification(item) for item in records],
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "pages": math.ceil(total / limit) if total > 0 else 0,
-        },
+        result.as_dict(_serialize_notification),
         "Notifications retrieved successfully",
     )
 
@@ -56,7 +48,7 @@ def list_notifications(
 def mark_notification_read(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     notification = (
         db.query(Notification)
@@ -76,7 +68,7 @@ def mark_notification_read(
 @router.get("/unread-count")
 def unread_count(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     count = (
         db.query(Notification)
@@ -16,13 +16,13 @@ from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_db
+from app.core.principal_cache import CurrentUser
 from app.core.config import settings
 from app.core.exceptions import ForbiddenError, NotFoundError
 from app.core.redis_service import redis_service
 from app.core.response import success_response
 from app.database.otp_code import OTPCode
 from app.database.timetables import Timetable
-from app.database.user import User
 from app.security.permissions import UserRole, require_role
 from app.services.audit_service import log_action
 
@@ -73,7 +73,7 @@ async def generate_otp(
     request: Request,
     ttl_minutes: int = Query(settings.OTP_DEFAULT_TTL_MINUTES, ge=1, le=60,
                              description="OTP validity in minutes"),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Generate a new OTP for a timetable session.
@@ -129,7 +129,7 @@ async def generate_otp(
 @router.get("/current/{timetable_id}")
 async def get_current_otp(
     timetable_id: int,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Return the most recent non-expired OTP for a timetable."""
@@ -164,7 +164,7 @@ async def get_current_otp(
 @router.get("/status/{timetable_id}")
 async def get_otp_status(
     timetable_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Return OTP session status for students (without exposing the code)."""
@@ -196,7 +196,7 @@ async def refresh_otp(
     timetable_id: int,
     request: Request,
     ttl_minutes: int = Query(settings.OTP_DEFAULT_TTL_MINUTES, ge=1, le=60),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Invalidate the current OTP and issue a fresh one."""
@@ -250,7 +250,7 @@ async def refresh_otp(
 async def cancel_otp(
     otp_id: int,
     request: Request,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Cancel an active OTP session immediately."""
@@ -290,7 +290,7 @@ async def cancel_otp(
 async def cancel_otp_by_timetable(
     timetable_id: int,
     request: Request,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Cancel an active OTP session by timetable ID."""
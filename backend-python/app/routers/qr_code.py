@@ -19,13 +19,13 @@ from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_db
+from app.core.principal_cache import CurrentUser
 from app.core.config import settings
 from app.core.exceptions import ForbiddenError, NotFoundError
 from app.core.redis_service import redis_service
 from app.core.response import success_response
 from app.database.qr_codes import QRCode, CodeStatus
 from app.database.timetables import Timetable
-from app.database.user import User
 from app.security.permissions import UserRole, require_role
 from app.services.audit_service import log_action
 
@@ -83,7 +83,7 @@ async def generate_qr_code(
     request: Request,
     ttl_minutes: int = Query(settings.QR_DEFAULT_TTL_MINUTES, ge=1, le=120,
                              description="Code validity in minutes"),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Generate a new QR code for a timetable session.
@@ -143,7 +143,7 @@ async def generate_qr_code(
 async def get_current_qr(
     timetable_id: int,
     with_image: bool = Query(False, description="Include base64 PNG image"),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Return the most recent non-expired QR code for a timetable."""
@@ -178,7 +178,7 @@ async def get_current_qr(
 @router.get("/status/{timetable_id}")
 async def get_qr_status(
     timetable_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Return QR session status for students (without exposing the code)."""
@@ -210,7 +210,7 @@ async def refresh_qr_code(
     timetable_id: int,
     request: Request,
     ttl_minutes: int = Query(settings.QR_DEFAULT_TTL_MINUTES, ge=1, le=120),
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Invalidate the current QR code and issue a fresh one."""
@@ -264,7 +264,7 @@ async def refresh_qr_code(
 async def cancel_qr_code(
     qr_id: int,
     request: Request,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Cancel an active QR code session immediately."""
@@ -304,7 +304,7 @@ async def cancel_qr_code(
 async def cancel_qr_by_timetable(
     timetable_id: int,
     request: Request,
-    current_user: User = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
+    current_user: CurrentUser = Depends(require_role(UserRole.TEACHER, UserRole.ADMIN)),
     db: Session = Depends(get_db),
 ):
     """Cancel an active QR code session by timetable ID."""
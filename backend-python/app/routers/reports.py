@@ -6,11 +6,12 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy import case, func, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import csv
 import io
 
-from app.core.dependencies import get_db, get_current_user, require_admin, require_role
+from app.core.dependencies import get_read_db, get_current_user, require_admin, require_role
+from app.core.principal_cache import CurrentUser
 from app.core.exceptions import NotFoundError
 from app.core.response import success_response
 from app.database.attendance_records import AttendanceRecord, AttendanceStatus
@@ -20,6 +21,7 @@ from app.database.user import User
 from app.database.divisions import Division
 from app.database.courses import Course
 from app.database.branches import Branch
+from app.services.attendance_partitions import marked_between
 
 router = APIRouter(prefix="/api/v1/reports", tags=["Reports"])
 
@@ -30,8 +32,8 @@ def get_attendance_summary(
     end_date: Optional[date] = Query(None),
     division_id: Optional[int] = Query(None),
     course_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get attendance summary statistics.
@@ -45,10 +47,7 @@ def get_attendance_summary(
     )
     
     # Apply date filters
-    if start_date:
-        query = query.filter(func.date(AttendanceRecord.marked_at) >= start_date)
-    if end_date:
-        query = query.filter(func.date(AttendanceRecord.marked_at) <= end_date)
+    query = query.filter(*marked_between(start_date, end_date))
     
     # If student, only show their own records
     if current_user.role.value == 'STUDENT':
@@ -111,8 +110,8 @@ def get_attendance_summary(
 @router.get("/student/{user_id}")
 def get_student_report(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get per-student attendance percentage per course.
@@ -217,8 +216,8 @@ def get_student_report(
 def get_class_report(
     timetable_id: int,
     session_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role('TEACHER', 'ADMIN'))
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(require_role('TEACHER', 'ADMIN'))
 ):
     """
     Get per-session attendance list with student names and attendance percentage.
@@ -227,7 +226,12 @@ def get_class_report(
     Admins can view all.
     """
     # Verify timetable exists
-    timetable = db.query(TimeTable).filter(TimeTable.id == timetable_id).first()
+    timetable = (
+        db.query(TimeTable)
+        .options(joinedload(TimeTable.subject))
+        .filter(TimeTable.id == timetable_id)
+        .first()
+    )
     if not timetable:
         raise NotFoundError(message=f"Timetable with id {timetable_id} not found")
     
@@ -240,7 +244,7 @@ def get_class_report(
     query = db.query(AttendanceRecord).filter(AttendanceRecord.timetable_id == timetable_id)
     
     if session_date:
-        query = query.filter(func.date(AttendanceRecord.marked_at) == session_date)
+        query = query.filter(*marked_between(session_date, session_date))
     
     records = query.all()
     
@@ -251,18 +255,24 @@ def get_class_report(
     ).all()
     
     enrolled_student_ids = {e.student_id for e in enrollments}
+    students = {
+        u.id: u for u in db.query(User).filter(User.id.in_(enrolled_student_ids))
+    } if enrolled_student_ids else {}
+    records_by_student = {}
+    for r in records:
+        records_by_student.setdefault(r.student_id, r)
     
     # Build student attendance data
     students_data = []
     attended_count = 0
     
     for student_id in enrolled_student_ids:
-        student = db.query(User).filter(User.id == student_id).first()
+        student = students.get(student_id)
         if not student:
             continue
         
         # Find attendance record for this student
-        student_record = next((r for r in records if r.student_id == student_id), None)
+        student_record = records_by_student.get(student_id)
         
         status = student_record.status if student_record else 'absent'
         marked_at = student_record.marked_at.isoformat() if student_record else None
@@ -297,8 +307,8 @@ def export_attendance_csv(
     timetable_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role('TEACHER', 'ADMIN'))
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(require_role('TEACHER', 'ADMIN'))
 ):
     """
     Export attendance records as CSV.
@@ -326,10 +336,10 @@ def export_attendance_csv(
         timetable_ids = [t[0] for t in teacher_timetables]
         query = query.filter(AttendanceRecord.timetable_id.in_(timetable_ids))
     
-    if start_date:
-        query = query.filter(func.date(AttendanceRecord.marked_at) >= start_date)
-    if end_date:
-        query = query.filter(func.date(AttendanceRecord.marked_at) <= end_date)
+    query = query.filter(*marked_between(start_date, end_date)).options(
+        joinedload(AttendanceRecord.student),
+        joinedload(AttendanceRecord.timetable).joinedload(TimeTable.subject),
+    )
     
     records = query.all()
     
@@ -346,16 +356,14 @@ def export_attendance_csv(
         'Timetable ID',
         'Subject',
         'Status',
-        'Method',
-        'Marked At',
-        'Latitude',
-        'Longitude'
+        'Device Info',
+        'Marked At'
     ])
     
     # Write data rows
     for record in records:
-        student = db.query(User).filter(User.id == record.student_id).first()
-        timetable = db.query(TimeTable).filter(TimeTable.id == record.timetable_id).first()
+        student = record.student
+        timetable = record.timetable
         
         writer.writerow([
             record.id,
@@ -364,11 +372,9 @@ def export_attendance_csv(
             student.email if student else 'N/A',
             record.timetable_id,
             timetable.subject.name if timetable and timetable.subject else 'N/A',
-            record.status,
-            record.method,
-            record.marked_at.isoformat() if record.marked_at else '',
-            record.latitude if record.latitude else '',
-            record.longitude if record.longitude else ''
+            record.status.value if record.status else '',
+            record.device_info or '',
+            record.marked_at.isoformat() if record.marked_at else ''
         ])
     
     # Prepare response
@@ -389,8 +395,8 @@ def export_attendance_csv(
 def get_division_attendance(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role("TEACHER", "ADMIN")),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(require_role("TEACHER", "ADMIN")),
 ):
     role_value = current_user.role.value if hasattr(current_user.role, "value") else current_user.role
 
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
 from app.core.dependencies import get_db, require_admin, require_teacher_or_admin
@@ -12,6 +12,11 @@ from app.database.branches import Branch
 router = APIRouter(prefix="/api/v1/subjects", tags=["subjects"])
 
 
+def _subject_query(db: Session):
+    """Subjects with the course and branch the serializer reads."""
+    return db.query(Subject).options(joinedload(Subject.course), joinedload(Subject.branch))
+
+
 def _serialize_subject(subject: Subject) -> dict:
     return {
         "id": subject.id,
@@ -39,7 +44,7 @@ def list_subjects(
     db: Session = Depends(get_db),
     _: bool = Depends(require_teacher_or_admin),
 ):
-    query = db.query(Subject)
+    query = _subject_query(db)
     
     if course_id is not None:
         query = query.filter(Subject.course_id == course_id)
@@ -61,7 +66,7 @@ def list_subjects(
 
 @router.get("/{subject_id}")
 def get_subject(subject_id: int, db: Session = Depends(get_db), _: bool = Depends(require_teacher_or_admin)):
-    subject = db.query(Subject).filter(Subject.id == subject_id).first()
+    subject = _subject_query(db).filter(Subject.id == subject_id).first()
     if not subject:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found")
     return success_response(_serialize_subject(subject), "Subject retrieved successfully")
@@ -1,49 +1,61 @@
 from datetime import datetime, timezone, date
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from app.core.dependencies import get_current_user, get_db, require_admin
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+from app.core.dependencies import get_current_user, get_db, get_read_db, require_admin
+from app.core.principal_cache import CurrentUser
+from app.core.exceptions import ValidationError
 from app.core.response import success_response
 from app.database.student_enrollments import EnrollmentStatus, StudentEnrollment
-from app.schemas.timetable import TimeTableCreate, TimeTableOut, TimeTableUpdate
+from app.schemas.timetable import TimeTableCreate, TimeTableImportRequest, TimeTableOut, TimeTableUpdate
 from app.database.timetables import DayOfWeek, Timetable
-from app.database.user import User
 from app.database.qr_codes import QRCode, CodeStatus
 from app.database.otp_code import OTPCode
+from app.services.active_sessions import active_session_index
+from app.services.timetable_index import Slot, TimetableConflictIndex, term_of
 
 router = APIRouter(prefix="/api/v1/timetables", tags=["timetables"])
 
 
+def _timetable_query(db: Session):
+    """Timetables with the subject the serializer reads."""
+    return db.query(Timetable).options(joinedload(Timetable.subject))
+
+
 def _serialize_timetables(items: list[Timetable], db: Session = None) -> list[dict]:
+    active_qr: set[int] = set()
+    active_otp: set[int] = set()
+    if db is not None and items:
+        # One lookup per code type for the whole list, not per timetable.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        ids = [item.id for item in items]
+        active_qr = {
+            row[0] for row in db.query(QRCode.timetable_id).filter(
+                QRCode.timetable_id.in_(ids),
+                QRCode.expires_at > now,
+                QRCode.status == CodeStatus.ACTIVE,
+            ).distinct()
+        }
+        active_otp = {
+            row[0] for row in db.query(OTPCode.timetable_id).filter(
+                OTPCode.timetable_id.in_(ids),
+                OTPCode.expires_at > now,
+            ).distinct()
+        }
+
     result = []
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
     for item in items:
         data = TimeTableOut.model_validate(item).model_dump(mode="json")
         data["subject_name"] = item.subject.name if item.subject else None
-        
-        if db is not None:
-            active_qr = db.query(QRCode).filter(
-                QRCode.timetable_id == item.id,
-                QRCode.expires_at > now,
-                QRCode.status == CodeStatus.ACTIVE,
-            ).first()
-            data["has_active_qr"] = active_qr is not None
-            
-            active_otp = db.query(OTPCode).filter(
-                OTPCode.timetable_id == item.id,
-                OTPCode.expires_at > now,
-            ).first()
-            data["has_active_otp"] = active_otp is not None
-        else:
-            data["has_active_qr"] = False
-            data["has_active_otp"] = False
-            
+        data["has_active_qr"] = item.id in active_qr
+        data["has_active_otp"] = item.id in active_otp
         result.append(data)
     return result
 
 
-def _base_schedule_query(db: Session, current_user: User):
-    query = db.query(Timetable).filter(Timetable.is_active.is_(True))
+def _base_schedule_query(db: Session, current_user: CurrentUser):
+    query = _timetable_query(db).filter(Timetable.is_active.is_(True))
     if current_user.role.value == "TEACHER":
         query = query.filter(Timetable.teacher_id == current_user.id)
     elif current_user.role.value == "STUDENT":
@@ -65,7 +77,7 @@ def _base_schedule_query(db: Session, current_user: User):
 @router.get("/today")
 def get_today_timetable(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     day_map = {
         0: DayOfWeek.MON,
@@ -93,7 +105,7 @@ def get_today_timetable(
 def get_my_schedule(
     filter_date: Optional[date] = Query(None, description="Filter by specific date (YYYY-MM-DD)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     query = _base_schedule_query(db, current_user)
     
@@ -119,15 +131,41 @@ def get_my_schedule(
     return success_response(_serialize_timetables(items, db), "My schedule retrieved successfully")
 
 
+@router.get("/live")
+def get_live_timetables(
+    location_id: Optional[int] = Query(None),
+    teacher_id: Optional[int] = Query(None),
+    division_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if location_id is None and teacher_id is None and division_id is None:
+        raise ValidationError("Provide at least one of location_id, teacher_id or division_id")
+
+    live_ids = active_session_index.live(
+        db, location_id=location_id, teacher_id=teacher_id, division_id=division_id
+    )
+    if not live_ids:
+        return success_response([], "No session is in progress")
+
+    items = (
+        _timetable_query(db)
+        .filter(Timetable.id.in_(live_ids))
+        .order_by(Timetable.start_time.asc())
+        .all()
+    )
+    return success_response(_serialize_timetables(items, db), "Live sessions retrieved successfully")
+
+
 @router.get("")
-def list_all_timetables(db: Session = Depends(get_db)):
-    timetables = db.query(Timetable).all()
+def list_all_timetables(db: Session = Depends(get_read_db)):
+    timetables = _timetable_query(db).all()
     return success_response(_serialize_timetables(timetables, db), "Timetables retrieved successfully")
 
 
 @router.get("/{timetable_id}")
 def get_timetable(timetable_id: int, db: Session = Depends(get_db)):
-    timetable = db.query(Timetable).filter(Timetable.id == timetable_id).first()
+    timetable = _timetable_query(db).filter(Timetable.id == timetable_id).first()
     if not timetable:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Timetable not found"
@@ -136,50 +174,88 @@ def get_timetable(timetable_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/division/{division_id}")
-def list_timetables_by_division(division_id: int, db: Session = Depends(get_db)):
-    timetables = db.query(Timetable).filter(Timetable.division_id == division_id).all()
+def list_timetables_by_division(division_id: int, db: Session = Depends(get_read_db)):
+    timetables = _timetable_query(db).filter(Timetable.division_id == division_id).all()
     return success_response(_serialize_timetables(timetables, db), "Timetables retrieved successfully")
 
 
 @router.get("/teacher/{teacher_id}")
-def list_timetables_by_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    timetables = db.query(Timetable).filter(Timetable.teacher_id == teacher_id).all()
+def list_timetables_by_teacher(teacher_id: int, db: Session = Depends(get_read_db)):
+    timetables = _timetable_query(db).filter(Timetable.teacher_id == teacher_id).all()
     return success_response(_serialize_timetables(timetables, db), "Timetables retrieved successfully")
 
 
 @router.get("/location/{location_id}")
-def list_timetables_by_location(location_id: int, db: Session = Depends(get_db)):
-    timetables = db.query(Timetable).filter(Timetable.location_id == location_id).all()
+def list_timetables_by_location(location_id: int, db: Session = Depends(get_read_db)):
+    timetables = _timetable_query(db).filter(Timetable.location_id == location_id).all()
     return success_response(_serialize_timetables(timetables, db), "Timetables retrieved successfully")
 
 
-@router.post("")
-def create_timetable(timetable_in: TimeTableCreate, db: Session = Depends(get_db), _=Depends(require_admin)):
-    conflict = (
-        db.query(Timetable)
-        .filter(
-            Timetable.division_id == timetable_in.division_id,
-            Timetable.day_of_week == timetable_in.day_of_week,
-            Timetable.start_time == timetable_in.start_time,
-            Timetable.end_time == timetable_in.end_time,
-            Timetable.semester == timetable_in.semester,
-            Timetable.academic_year == timetable_in.academic_year,
-            Timetable.lecture_type == timetable_in.lecture_type,
-        )
-        .first()
+def _ensure_no_conflicts(db: Session, candidate) -> None:
+    if not candidate.is_active:
+        return
+    index = TimetableConflictIndex.load(
+        db, candidate.academic_year, term_of(candidate.semester), candidate.day_of_week
     )
-    if conflict:
+    conflicts = index.conflicts(Slot.from_timetable(candidate))
+    if conflicts:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Same schedule already exists for this division, day, and lecture type",
+            detail="; ".join(conflicts),
         )
+
+
+@router.post("")
+def create_timetable(timetable_in: TimeTableCreate, db: Session = Depends(get_db), _=Depends(require_admin)):
+    _ensure_no_conflicts(db, timetable_in)
     new_timetable = Timetable(**timetable_in.model_dump())
     db.add(new_timetable)
     db.commit()
+    active_session_index.invalidate()
     db.refresh(new_timetable)
     return success_response(_serialize_timetables([new_timetable], db)[0], "Timetable created successfully", 201)
 
 
+@router.post("/import")
+def import_timetables(payload: TimeTableImportRequest, db: Session = Depends(get_db), _=Depends(require_admin)):
+    """Validate and insert a batch of slots in a single transaction.
+
+    Every row is checked against the existing schedule of its term and against
+    the rows before it in the same payload. Nothing is written unless all
+    rows are clash-free.
+    """
+    indexes: dict[tuple[str, int], TimetableConflictIndex] = {}
+    errors = []
+    for position, item in enumerate(payload.items):
+        key = (item.academic_year, term_of(item.semester))
+        if key not in indexes:
+            indexes[key] = TimetableConflictIndex.load(db, *key)
+        slot = Slot.from_timetable(item)
+        conflicts = indexes[key].conflicts(slot) if item.is_active else []
+        if conflicts:
+            errors.append({"index": position, "errors": conflicts})
+        elif item.is_active:
+            indexes[key].add(slot)
+
+    if errors:
+        raise ValidationError("Timetable import rejected", data={"errors": errors})
+
+    if payload.dry_run:
+        return success_response(
+            {"imported": 0, "validated": len(payload.items), "dry_run": True},
+            "Timetable import validated successfully",
+        )
+
+    db.execute(insert(Timetable), [item.model_dump() for item in payload.items])
+    db.commit()
+    active_session_index.invalidate()
+    return success_response(
+        {"imported": len(payload.items), "validated": len(payload.items), "dry_run": False},
+        "Timetables imported successfully",
+        201,
+    )
+
+
 @router.put("/{timetable_id}")
 def update_timetable(
     timetable_id: int, timetable_in: TimeTableUpdate, db: Session = Depends(get_db), _=Depends(require_admin)
@@ -192,7 +268,9 @@ def update_timetable(
     update_data = timetable_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_timetable, key, value)
+    _ensure_no_conflicts(db, db_timetable)
     db.commit()
+    active_session_index.invalidate()
     db.refresh(db_timetable)
     return success_response(_serialize_timetables([db_timetable], db)[0], "Timetable updated successfully")
 
@@ -206,3 +284,4 @@ def delete_timetable(timetable_id: int, db: Session = Depends(get_db), _=Depends
         )
     db.delete(db_timetable)
     db.commit()
+    active_session_index.invalidate()
@@ -1,18 +1,26 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.core.dependencies import get_current_user, get_db, require_admin
+from app.core.dependencies import get_current_user, get_db, get_read_db, require_admin
+from app.core.exceptions import ValidationError
+from app.core.pagination import ListParams, list_params, list_response, paginate
+from app.core.principal_cache import principal_cache
 from app.core.response import success_response
 from app.schemas.auth import PasswordChangeRequest
 from app.schemas.user_preferences import UserPreferencesOut, UserPreferencesUpdate
 from app.schemas.user import UserCreate, UserUpdate, UserOut
 from app.database.user_preferences import UserPreferences
-from app.database.user import User
+from app.database.user import User, UserRole
 from app.database.password_reset_tokens import PasswordResetToken
 from app.database.notifications import Notification
 from app.database.student_enrollments import StudentEnrollment
-from app.security.password import hash_password, verify_password
+from app.security.password import password_hasher
+from app.services.bulk_import import detect_format, import_message, import_users
+from app.security.refresh_tokens import refresh_tokens
+from app.security.token_revocation import token_revocation
 
 logger = logging.getLogger(__name__)
 
@@ -47,9 +55,46 @@ def _serialize_prefs(prefs: UserPreferences) -> dict:
 
 
 @router.get("")
-def list_users(db: Session = Depends(get_db), _=Depends(require_admin)):
-    users = db.query(User).all()
-    return success_response([_serialize_user(u) for u in users], "Users retrieved successfully")
+def list_users(
+    role: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None, max_length=100, description="Matches username, email or name"),
+    params: ListParams = Depends(list_params(("id", "username", "email"))),
+    db: Session = Depends(get_read_db),
+    _=Depends(require_admin),
+):
+    query = db.query(User)
+    if role:
+        try:
+            query = query.filter(User.role == UserRole(role.upper()))
+        except ValueError:
+            raise ValidationError(f"Invalid role: {role}")
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if search:
+        pattern = f"%{search.strip()}%"
+        query = query.filter(or_(
+            User.username.ilike(pattern),
+            User.email.ilike(pattern),
+            User.first_name.ilike(pattern),
+            User.last_name.ilike(pattern),
+        ))
+    unfiltered = not (role or is_active is not None or search)
+    page = paginate(query, User, params, User.__tablename__ if unfiltered else None)
+    return list_response(page, _serialize_user, params, "Users retrieved successfully")
+
+
+@router.post("/import")
+def import_users_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = Query(None),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db),
+    _=Depends(require_admin),
+):
+    """Create users from a CSV or JSONL file; invalid rows are reported, not fatal."""
+    report = import_users(db, file.file, detect_format(file.filename, format), dry_run)
+    return success_response(report.as_dict(), import_message(report))
 
 
 @router.get("/{user_id}")
@@ -79,7 +124,7 @@ def create_user(user_in: UserCreate, db: Session = Depends(get_db), _=Depends(re
     new_user = User(
         email=user_in.email,
         username=user_in.username,
-        password_hash=hash_password(user_in.password, user_in.username),
+        password_hash=password_hasher.hash_sync(user_in.password, user_in.username),
         first_name=user_in.first_name,
         last_name=user_in.last_name,
         phone=user_in.phone,
@@ -109,13 +154,23 @@ def update_user(
         )
 
     update_data = user_in.model_dump(exclude_unset=True)
+    revoke_tokens = (
+        update_data.get("is_active") is False
+        or ("role" in update_data and update_data["role"] != db_user.role)
+    )
+    if revoke_tokens:
+        db_user.token_version = (db_user.token_version or 0) + 1
     for key, value in update_data.items():
         if key == "password":
-            db_user.password_hash = hash_password(value, db_user.username)
+            db_user.password_hash = password_hasher.hash_sync(value, db_user.username)
         else:
             setattr(db_user, key, value)
 
     db.commit()
+    principal_cache.invalidate(user_id)
+    if revoke_tokens:
+        token_revocation.revoke_below(user_id, db_user.token_version)
+        refresh_tokens.revoke_all(user_id)
     db.refresh(db_user)
     return success_response(_serialize_user(db_user), "User updated successfully")
 
@@ -137,11 +192,16 @@ def update_user_password(
     # Admins can change any user's password without verifying old password
     # Users changing their own password must verify old password
     if curr_user.role.value != "ADMIN":
-        if not verify_password(payload.old_password, db_user.password_hash, db_user.username):
+        verified, _ = password_hasher.verify_and_update_sync(
+            payload.old_password, db_user.password_hash, db_user.username
+        )
+        if not verified:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is invalid")
 
-    db_user.password_hash = hash_password(payload.new_password, db_user.username)
+    db_user.password_hash = password_hasher.hash_sync(payload.new_password, db_user.username)
     db.commit()
+    principal_cache.invalidate(user_id)
+    refresh_tokens.revoke_all(user_id)
 
     return success_response(None, "Password updated successfully")
 
@@ -210,8 +270,12 @@ def delete_user(
         db.query(Notification).filter(Notification.user_id == user_id).delete(synchronize_session=False)
         db.query(StudentEnrollment).filter(StudentEnrollment.student_id == user_id).delete(synchronize_session=False)
         
+        revoked_version = (db_user.token_version or 0) + 1
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate(user_id)
+        token_revocation.revoke_below(user_id, revoked_version)
+        refresh_tokens.revoke_all(user_id)
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(
@@ -1,6 +1,6 @@
 from datetime import datetime, time
 from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from app.database.timetables import LectureType, DayOfWeek
 
 
@@ -40,6 +40,12 @@ class TimeTableUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class TimeTableImportRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    items: list[TimeTableCreate] = Field(..., min_length=1, max_length=10000)
+    dry_run: bool = False
+
+
 class TimeTableOut(TimeTableBase):
     model_config = ConfigDict(from_attributes=True, extra="ignore")
     id: int
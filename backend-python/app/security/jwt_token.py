@@ -1,4 +1,7 @@
 import os
+import time
+from typing import Optional
+
 from jose import jwt
 from datetime import datetime, timedelta, timezone
 
@@ -13,12 +16,50 @@ def _secret_key() -> str:
 def _algorithm() -> str:
     return os.getenv("ALGORITHM") or os.getenv("JWT_ALGORITHM", "HS256")
 
+def refresh_token_ttl_seconds() -> int:
+    return int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7)) * 24 * 60 * 60
+
+
+def access_token_ttl_seconds() -> int:
+    return int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")) * 60
+
+
+def token_type(payload: dict) -> str:
+    """``typ`` of a decoded token: "access" or "refresh".
+
+    Tokens issued before ``typ`` was added carry only ``sub`` and ``exp``;
+    one that outlives any access token is a refresh token, anything else is
+    taken as an access token so sessions survive the deploy.
+    """
+    typ = payload.get("typ")
+    if typ:
+        return typ
+    remaining = int(payload.get("exp", 0)) - time.time()
+    return "refresh" if remaining > access_token_ttl_seconds() else "access"
+
+
+def access_token_claims(user, version: Optional[int] = None) -> dict:
+    """Claims that let role-gated endpoints authorise without a user lookup.
+
+    ``version`` overrides ``user.token_version`` for principals that do not
+    carry it (e.g. the cached ``CurrentUser`` used on refresh).
+    """
+    return {
+        "sub": str(user.id),
+        "role": user.role.value,
+        "branch_id": user.branch_id,
+        "ver": version if version is not None else (user.token_version or 0),
+    }
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     exp_min = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(
-        minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+        seconds=access_token_ttl_seconds()
     )
-    to_encode.update({"exp": exp_min})
+    # Both token kinds share a key; ``typ`` is what keeps a refresh token
+    # from being presented as a bearer token.
+    to_encode.update({"exp": exp_min, "typ": "access"})
     encoded_jwt = jwt.encode(
         to_encode, _secret_key(), algorithm=_algorithm()
     )
@@ -29,7 +70,7 @@ def create_access_token(data: dict) -> str:
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     exp_min = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(
-        days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+        seconds=refresh_token_ttl_seconds()
     )
     to_encode.update({"exp": exp_min})
     encoded_jwt = jwt.encode(
@@ -0,0 +1,202 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+
+logger = logging.getLogger("smartattendance.auth")
+
+FAILURES_KEY = "auth:login:failures:{scope}:{subject}"
+LOCK_KEY = "auth:login:lock:{scope}:{subject}"
+
+
+@dataclass(frozen=True)
+class ThrottleRule:
+    scope: str
+    max_failures: int
+
+
+class LoginThrottle:
+    """Sliding-window failed-login counters per account and per client IP.
+
+    Every failed attempt is recorded against both the account identifier
+    and the client IP. The IP limit is set high because a campus egresses
+    through a few NAT addresses; it still caps a credential-stuffing run
+    from one address. With ``ip_prefix_max_failures`` set, failures are also
+    counted per IP and the first ``ip_prefix_chars`` characters of the
+    identifier, an extra, tighter limit on a run that walks one slice of
+    usernames. Once a key has ``max_failures`` failures inside the window
+    it is locked for an exponentially growing period (doubling with each
+    further failure, capped at ``max_backoff_seconds``). ``retry_after`` is
+    checked before any password hashing, so throttled attempts cost one
+    Redis round trip instead of a pbkdf2 verification.
+
+    Redis holds the counters when configured so limits apply across
+    workers; otherwise, or when Redis errors, a bounded in-process store is
+    used.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int,
+        account_max_failures: int,
+        ip_max_failures: int,
+        base_backoff_seconds: int,
+        max_backoff_seconds: int,
+        ip_prefix_max_failures: int = 0,
+        ip_prefix_chars: int = 3,
+        max_local_keys: int = 50_000,
+    ) -> None:
+        self._window = window_seconds
+        self._rules = {
+            "account": ThrottleRule("account", account_max_failures),
+            "ip": ThrottleRule("ip", ip_max_failures),
+        }
+        if ip_prefix_max_failures > 0:
+            self._rules["ip_prefix"] = ThrottleRule("ip_prefix", ip_prefix_max_failures)
+        self._base_backoff = base_backoff_seconds
+        self._max_backoff = max_backoff_seconds
+        self._ip_prefix_chars = ip_prefix_chars
+        self._max_local_keys = max_local_keys
+        self._lock = threading.Lock()
+        self._failures: OrderedDict[tuple[str, str], deque[float]] = OrderedDict()
+        self._locked_until: dict[tuple[str, str], float] = {}
+
+    @staticmethod
+    def account_key(identifier: Optional[str]) -> str:
+        return (identifier or "").strip().lower()
+
+    def _subjects(self, account: str, ip: str) -> list[tuple[str, str]]:
+        subjects = [("account", account), ("ip", ip)]
+        if "ip_prefix" in self._rules:
+            subjects.append(("ip_prefix", f"{ip}:{account[: self._ip_prefix_chars]}"))
+        return subjects
+
+    def backoff_seconds(self, failures: int, max_failures: int) -> int:
+        if failures < max_failures:
+            return 0
+        exponent = min(failures - max_failures, 32)
+        return int(min(self._base_backoff * (2 ** exponent), self._max_backoff))
+
+    # -- public API ---------------------------------------------------------
+
+    def retry_after(self, account: str, ip: str) -> int:
+        """Seconds the caller must wait before another attempt; 0 if allowed."""
+        subjects = self._subjects(account, ip)
+        if redis_service.is_configured:
+            try:
+                pipe = redis_service.client.pipeline(transaction=False)
+                for scope, subject in subjects:
+                    pipe.pttl(LOCK_KEY.format(scope=scope, subject=subject))
+                remaining_ms = [ttl for ttl in pipe.execute() if ttl and ttl > 0]
+                return math.ceil(max(remaining_ms) / 1000) if remaining_ms else 0
+            except redis.RedisError:
+                logger.exception("Login throttle check failed; using local counters")
+        return self._retry_after_local(subjects)
+
+    def record_failure(self, account: str, ip: str) -> int:
+        """Count a failed attempt; returns the lockout it triggered (0 if none)."""
+        subjects = self._subjects(account, ip)
+        if redis_service.is_configured:
+            try:
+                return self._record_failure_redis(subjects)
+            except redis.RedisError:
+                logger.exception("Login throttle update failed; using local counters")
+        return self._record_failure_local(subjects)
+
+    def reset_account(self, account: str) -> None:
+        """Forget an account's failures after a successful login. IP counters
+        are kept so one valid credential cannot launder a stuffing run."""
+        if redis_service.is_configured:
+            try:
+                redis_service.client.delete(
+                    FAILURES_KEY.format(scope="account", subject=account),
+                    LOCK_KEY.format(scope="account", subject=account),
+                )
+            except redis.RedisError:
+                logger.exception("Login throttle reset failed for %s", account)
+        with self._lock:
+            self._failures.pop(("account", account), None)
+            self._locked_until.pop(("account", account), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._failures.clear()
+            self._locked_until.clear()
+
+    # -- Redis backend ------------------------------------------------------
+
+    def _record_failure_redis(self, subjects: list[tuple[str, str]]) -> int:
+        now = time.time()
+        member = f"{now:.6f}"
+        pipe = redis_service.client.pipeline(transaction=False)
+        for scope, subject in subjects:
+            key = FAILURES_KEY.format(scope=scope, subject=subject)
+            pipe.zremrangebyscore(key, 0, now - self._window)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.expire(key, self._window)
+        results = pipe.execute()
+
+        lockout = 0
+        pipe = redis_service.client.pipeline(transaction=False)
+        for index, (scope, subject) in enumerate(subjects):
+            failures = results[index * 4 + 2]
+            seconds = self.backoff_seconds(failures, self._rules[scope].max_failures)
+            if seconds:
+                pipe.set(LOCK_KEY.format(scope=scope, subject=subject), "1", ex=seconds)
+                lockout = max(lockout, seconds)
+        if lockout:
+            pipe.execute()
+        return lockout
+
+    # -- local backend ------------------------------------------------------
+
+    def _retry_after_local(self, subjects: list[tuple[str, str]]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            remaining = [self._locked_until.get(key, 0.0) - now for key in subjects]
+        longest = max(remaining)
+        return math.ceil(longest) if longest > 0 else 0
+
+    def _record_failure_local(self, subjects: list[tuple[str, str]]) -> int:
+        now = time.monotonic()
+        lockout = 0
+        with self._lock:
+            for key in subjects:
+                failures = self._failures.get(key)
+                if failures is None:
+                    # Beyond max_failures + 32 the backoff is already capped.
+                    failures = self._failures[key] = deque(
+                        maxlen=self._rules[key[0]].max_failures + 32
+                    )
+                self._failures.move_to_end(key)
+                while failures and now - failures[0] > self._window:
+                    failures.popleft()
+                failures.append(now)
+                seconds = self.backoff_seconds(len(failures), self._rules[key[0]].max_failures)
+                if seconds:
+                    self._locked_until[key] = now + seconds
+                    lockout = max(lockout, seconds)
+            while len(self._failures) > self._max_local_keys:
+                evicted, _ = self._failures.popitem(last=False)
+                self._locked_until.pop(evicted, None)
+        return lockout
+
+
+login_throttle = LoginThrottle(
+    window_seconds=settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    account_max_failures=settings.LOGIN_ACCOUNT_MAX_FAILURES,
+    ip_max_failures=settings.LOGIN_IP_MAX_FAILURES,
+    base_backoff_seconds=settings.LOGIN_BACKOFF_BASE_SECONDS,
+    max_backoff_seconds=settings.LOGIN_BACKOFF_MAX_SECONDS,
+    ip_prefix_max_failures=settings.LOGIN_IP_PREFIX_MAX_FAILURES,
+    ip_prefix_chars=settings.LOGIN_IP_PREFIX_CHARS,
+)
@@ -1,12 +1,31 @@
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
 from dotenv import load_dotenv
 load_dotenv()
 from passlib.context import CryptContext
 
+from app.core.exceptions import ServiceUnavailableError
+
+# The first scheme hashes new passwords; the rest are only verified and get
+# rehashed on the next successful login. argon2 needs ``argon2-cffi``.
+_default_scheme = os.getenv("SCHEME", "pbkdf2_sha256")
+_schemes = [_default_scheme] + [
+    scheme.strip()
+    for scheme in os.getenv("LEGACY_SCHEMES", "pbkdf2_sha256").split(",")
+    if scheme.strip() and scheme.strip() != _default_scheme
+]
+
 pwd_context = CryptContext(
-    schemes=[os.getenv("SCHEME", "pbkdf2_sha256")],
+    schemes=_schemes,
     deprecated="auto",
     pbkdf2_sha256__default_rounds=int(os.getenv("ROUNDS", "29000")),
+    # Hashes below the configured cost also count as outdated.
+    pbkdf2_sha256__min_rounds=int(os.getenv("ROUNDS", "29000")),
     pbkdf2_sha256__default_salt_size=int(os.getenv("SALT_SIZE", "16")),
 )
 
@@ -19,6 +38,138 @@ def verify_password(password: str, hashed_password: str, user: str) -> str:
     return pwd_context.verify(password + user, hashed_password)
 
 
+def hash_passwords(pairs: list[tuple[str, str]]) -> list[str]:
+    """Hash a batch of (password, user) pairs in one worker round trip."""
+    return [hash_password(password, user) for password, user in pairs]
+
+
+def verify_and_update_password(
+    password: str, hashed_password: str, user: str
+) -> tuple[bool, Optional[str]]:
+    """Verify, and return a replacement hash when the stored one is outdated."""
+    return pwd_context.verify_and_update(password + user, hashed_password)
+
+
+class PasswordHasherBusy(ServiceUnavailableError):
+    """Raised when the hashing queue is full; surfaces as a 503."""
+
+    def __init__(self) -> None:
+        super().__init__("Too many sign-in attempts in progress, please retry.", retry_after=2)
+
+
+class PasswordHasherPool:
+    """Runs password hashing off the request threads.
+
+    Work goes to a small process pool so the ~30 ms of CPU per hash neither
+    holds the GIL nor ties up the server's threadpool. Admission is bounded:
+    once ``max_pending`` jobs are in flight new ones are refused instead of
+    queueing without limit. With ``workers=0`` hashing runs on a thread.
+
+    Request handlers are plain ``def`` functions that call the ``*_sync``
+    methods: their database and Redis work stays in FastAPI's threadpool
+    and only the threadpool thread waits on the hash, never the event loop.
+    Each waiting login holds a threadpool thread, so ``limit_to_threads``
+    keeps ``max_pending`` to half the threadpool: a login storm is refused
+    with 503 while the other half still serves every other endpoint.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"completed": 0, "rejected": 0, "max_in_flight": 0, "total_ms": 0.0}
+
+    def limit_to_threads(self, threads: int) -> None:
+        """Cap admission at half of a threadpool of *threads* threads."""
+        with self._lock:
+            self._max_pending = min(self._max_pending, max(1, threads // 2))
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _admit(self) -> float:
+        with self._lock:
+            if self._in_flight >= self._max_pending:
+                self._stats["rejected"] += 1
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+        return time.perf_counter()
+
+    def _release(self, started: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._stats["completed"] += 1
+            self._stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+    def _call(self, fn, *args):
+        """Run *fn* on the pool; the calling (threadpool) thread waits on
+        the worker process."""
+        started = self._admit()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._release(started)
+
+    def hash_sync(self, password: str, user: str) -> str:
+        return self._call(hash_password, password, user)
+
+    def verify_and_update_sync(
+        self, password: str, hashed_password: str, user: str
+    ) -> tuple[bool, Optional[str]]:
+        return self._call(verify_and_update_password, password, hashed_password, user)
+
+    def hash_many_sync(self, pairs: list[tuple[str, str]], batch_size: int = 25) -> list[str]:
+        """Hash many passwords for bulk imports, in input order.
+
+        Pairs are sent in batches, with at most one batch per worker in
+        flight, so a sign-in queued behind an import waits for one batch
+        rather than the whole import.
+        """
+        batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(self._workers, 1)) as senders:
+            results = list(senders.map(lambda batch: self._call(hash_passwords, batch), batches))
+        return [hashed for batch in results for hashed in batch]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "workers": self._workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - max(self._workers, 1)),
+                "max_in_flight": self._stats["max_in_flight"],
+                "completed": completed,
+                "rejected": self._stats["rejected"],
+                "avg_ms": round(self._stats["total_ms"] / completed, 2) if completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasherPool(
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16")),
+)
+
+
 if __name__ == "__main__":
     plain_password = "123456789"
     user = "student1 "
@@ -1,30 +1,29 @@
 from typing import Callable
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends
+from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user
-from app.database.user import User, UserRole
+from app.core.dependencies import TokenClaims, authorize, get_db, get_token_claims
+from app.core.principal_cache import CurrentUser
+from app.database.user import UserRole
 
 
 def require_role(*roles: UserRole) -> Callable:
     """
     Dependency factory: ensures the current user has one of the required roles.
 
+    Tokens carrying a role claim are rejected without a user lookup.
+
     Usage:
         @router.delete("/{id}", dependencies=[Depends(require_role(UserRole.ADMIN))])
     """
-    def _checker(current_user: User = Depends(get_current_user)) -> User:
-        user_role_value = (
-            current_user.role.value
-            if hasattr(current_user.role, "value")
-            else current_user.role
+    allowed = [r.value if isinstance(r, UserRole) else r for r in roles]
+
+    def _checker(
+        claims: TokenClaims = Depends(get_token_claims), db: Session = Depends(get_db)
+    ) -> CurrentUser:
+        return authorize(
+            claims, db, allowed, f"Access denied. Required role(s): {', '.join(allowed)}."
         )
-        allowed = [r.value if isinstance(r, UserRole) else r for r in roles]
-        if user_role_value not in allowed:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required role(s): {', '.join(allowed)}.",
-            )
-        return current_user
 
     return _checker
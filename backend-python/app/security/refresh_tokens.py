@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from app.core.exceptions import ServiceUnavailableError
+from app.core.redis_service import redis_service
+from app.security.jwt_token import refresh_token_ttl_seconds, token_type
+
+logger = logging.getLogger("smartattendance.auth")
+
+FAMILY_KEY = "auth:refresh:family:{family_id}"
+REVOKED_BEFORE_KEY = "auth:refresh:revoked_before:{user_id}"
+
+# Check and rotate in one round trip. Returns 1 on success, 0 when the
+# family is unknown or expired, -1 on reuse of a rotated token and -2 when
+# every session of the user was revoked after this token was issued.
+_ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+local cutoff = redis.call('GET', KEYS[2])
+if cutoff and tonumber(cutoff) > tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[4]))
+return 1
+"""
+
+_REJECTIONS = {0: "expired", -1: "reuse", -2: "revoked"}
+
+
+class RefreshTokenRejected(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+
+def _hash_jti(jti: str) -> str:
+    return hashlib.sha256(jti.encode("utf-8")).hexdigest()
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RefreshTokenStore:
+    """Rotation state for refresh-token families.
+
+    Each login starts a family; every refresh replaces the family's current
+    token id and hands out a new one. Only a hash of the id is stored.
+    Presenting an id that was already rotated away means the token leaked,
+    so the whole family is dropped. Revoking all of a user's sessions is a
+    single write of a cut-off timestamp, compared against the ``ims``
+    (issued-at, ms) claim on the next refresh.
+
+    Redis is used when configured, with one script call per refresh;
+    otherwise the store is process-local.
+    """
+
+    def __init__(self, max_local_families: int = 100_000) -> None:
+        self._lock = threading.Lock()
+        self._families: dict[str, tuple[float, str]] = {}
+        self._revoked_before: dict[int, tuple[float, int]] = {}
+        self._max_local_families = max_local_families
+        self._script = None
+
+    def _rotate_script(self):
+        if self._script is None:
+            self._script = redis_service.client.register_script(_ROTATE_SCRIPT)
+        return self._script
+
+    def issue(self, user_id: int, version: int = 0, family_id: Optional[str] = None) -> dict:
+        """Claims for a new refresh token, starting a family unless one is given."""
+        jti = secrets.token_urlsafe(24)
+        claims = {
+            "sub": str(user_id),
+            "typ": "refresh",
+            "ver": version,
+            "fam": family_id or secrets.token_urlsafe(16),
+            "jti": jti,
+            "ims": _now_ms(),
+        }
+        if family_id is None:
+            self._store_family(claims["fam"], _hash_jti(jti))
+        return claims
+
+    def rotate(self, payload: dict) -> dict:
+        """Validate a decoded refresh token and return claims for its successor.
+
+        Raises ``RefreshTokenRejected`` when the token is expired, revoked or
+        has already been used.
+        """
+        if "typ" not in payload:
+            return self._adopt_legacy(payload)
+        try:
+            user_id = int(payload["sub"])
+            family_id = payload["fam"]
+            jti = payload["jti"]
+            issued_ms = int(payload["ims"])
+        except (KeyError, TypeError, ValueError):
+            raise RefreshTokenRejected("malformed")
+        if payload.get("typ") != "refresh":
+            raise RefreshTokenRejected("malformed")
+
+        successor = self.issue(user_id, int(payload.get("ver", 0)), family_id=family_id)
+        ttl = refresh_token_ttl_seconds()
+        if redis_service.is_configured:
+            try:
+                result = int(
+                    self._rotate_script()(
+                        keys=[
+                            FAMILY_KEY.format(family_id=family_id),
+                            REVOKED_BEFORE_KEY.format(user_id=user_id),
+                        ],
+                        args=[_hash_jti(jti), _hash_jti(successor["jti"]), issued_ms, ttl],
+                    )
+                )
+            except redis.RedisError:
+                logger.exception("Refresh-token rotation failed for family %s", family_id)
+                raise ServiceUnavailableError("Session store unavailable, please retry.")
+        else:
+            result = self._rotate_local(
+                user_id, family_id, _hash_jti(jti), _hash_jti(successor["jti"]), issued_ms, ttl
+            )
+
+        if result != 1:
+            reason = _REJECTIONS[result]
+            if reason == "reuse":
+                logger.warning(
+                    "Refresh token reuse detected for user %s; family %s revoked", user_id, family_id
+                )
+            raise RefreshTokenRejected(reason)
+        return successor
+
+    def _adopt_legacy(self, payload: dict) -> dict:
+        """Start a family for a refresh token issued before families existed.
+
+        Such a token has no id to rotate, so it keeps working until it
+        expires, as it always did, unless every session of the user has been
+        revoked since the deploy. Each use starts a new family.
+        """
+        if token_type(payload) != "refresh":
+            raise RefreshTokenRejected("malformed")
+        try:
+            user_id = int(payload["sub"])
+        except (KeyError, TypeError, ValueError):
+            raise RefreshTokenRejected("malformed")
+        if self._revoked_any(user_id):
+            raise RefreshTokenRejected("revoked")
+        return self.issue(user_id, int(payload.get("ver", 0)))
+
+    def _revoked_any(self, user_id: int) -> bool:
+        if redis_service.is_configured:
+            try:
+                return redis_service.client.exists(REVOKED_BEFORE_KEY.format(user_id=user_id)) > 0
+            except redis.RedisError:
+                logger.exception("Could not check session revocation for user %s", user_id)
+                raise ServiceUnavailableError("Session store unavailable, please retry.")
+        with self._lock:
+            cutoff = self._revoked_before.get(user_id)
+            return cutoff is not None and cutoff[0] > time.monotonic()
+
+    def revoke_family(self, family_id: str) -> None:
+        if redis_service.is_configured:
+            redis_service.delete(FAMILY_KEY.format(family_id=family_id))
+        with self._lock:
+            self._families.pop(family_id, None)
+
+    def revoke_all(self, user_id: int) -> None:
+        """Invalidate every refresh token issued to the user so far."""
+        cutoff = _now_ms()
+        ttl = refresh_token_ttl_seconds()
+        if redis_service.is_configured:
+            redis_service.set(REVOKED_BEFORE_KEY.format(user_id=user_id), str(cutoff), ex_seconds=ttl)
+        with self._lock:
+            self._revoked_before[user_id] = (time.monotonic() + ttl, cutoff)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._families.clear()
+            self._revoked_before.clear()
+
+    def _store_family(self, family_id: str, jti_hash: str) -> None:
+        ttl = refresh_token_ttl_seconds()
+        if redis_service.is_configured:
+            try:
+                redis_service.client.set(FAMILY_KEY.format(family_id=family_id), jti_hash, ex=ttl)
+            except redis.RedisError:
+                logger.exception("Could not start refresh-token family %s", family_id)
+                raise ServiceUnavailableError("Session store unavailable, please retry.")
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._families) >= self._max_local_families:
+                self._families = {
+                    key: entry for key, entry in self._families.items() if entry[0] > now
+                }
+            self._families[family_id] = (now + ttl, jti_hash)
+
+    def _rotate_local(
+        self, user_id: int, family_id: str, jti_hash: str, next_hash: str, issued_ms: int, ttl: int
+    ) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._families.get(family_id)
+            if entry is None or entry[0] <= now:
+                self._families.pop(family_id, None)
+                return 0
+            cutoff = self._revoked_before.get(user_id)
+            if cutoff is not None and cutoff[0] > now and cutoff[1] > issued_ms:
+                del self._families[family_id]
+                return -2
+            if entry[1] != jti_hash:
+                del self._families[family_id]
+                return -1
+            self._families[family_id] = (now + ttl, next_hash)
+            return 1
+
+
+refresh_tokens = RefreshTokenStore()
@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from app.core.redis_service import redis_service
+
+MIN_TOKEN_VERSION_KEY = "auth:min_token_version:{user_id}"
+
+
+def _access_token_ttl_seconds() -> int:
+    return int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")) * 60
+
+
+class TokenRevocationStore:
+    """Minimum accepted access-token version per user.
+
+    Entries only need to outlive the access tokens they revoke, so they are
+    written with the access-token lifetime as TTL. Redis is used when
+    configured; otherwise the store is process-local.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local: dict[int, tuple[float, int]] = {}
+
+    def revoke_below(self, user_id: int, version: int) -> None:
+        ttl = _access_token_ttl_seconds()
+        if redis_service.is_configured:
+            redis_service.set(MIN_TOKEN_VERSION_KEY.format(user_id=user_id), str(version), ex_seconds=ttl)
+        with self._lock:
+            self._local[user_id] = (time.monotonic() + ttl, version)
+
+    def min_version(self, user_id: int) -> int:
+        if redis_service.is_configured:
+            raw: Optional[str] = redis_service.get(MIN_TOKEN_VERSION_KEY.format(user_id=user_id))
+            if raw is not None:
+                return int(raw)
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return 0
+            expires_at, version = entry
+            if expires_at <= time.monotonic():
+                del self._local[user_id]
+                return 0
+            return version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+token_revocation = TokenRevocationStore()
@@ -0,0 +1,138 @@
+"""
+Process-local index answering "which timetable slot is running right now".
+
+The index holds every active slot bucketed per (location|teacher|division,
+day) and is rebuilt lazily, either after a timetable write in this process
+calls ``invalidate()`` or once the configured TTL lapses (which bounds how
+long other workers can serve a stale schedule).
+"""
+
+import threading
+import time as time_module
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.timetables import DayOfWeek, Timetable
+from app.services.timetable_index import IntervalBucket, Slot, seconds_of_day
+
+WEEKDAYS = (
+    DayOfWeek.MON,
+    DayOfWeek.TUE,
+    DayOfWeek.WED,
+    DayOfWeek.THU,
+    DayOfWeek.FRI,
+    DayOfWeek.SAT,
+    DayOfWeek.SUN,
+)
+
+
+def campus_now() -> datetime:
+    """Current wall-clock time on campus, which is what timetable times use."""
+    return datetime.now(ZoneInfo(settings.CAMPUS_TIMEZONE)).replace(tzinfo=None)
+
+
+class ActiveSessionIndex:
+    def __init__(self, ttl_seconds: int) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._buckets: dict[tuple[str, int, DayOfWeek], IntervalBucket] = {}
+        self._slots: dict[int, Slot] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built_at = None
+
+    def live(
+        self,
+        db: Session,
+        *,
+        location_id: Optional[int] = None,
+        teacher_id: Optional[int] = None,
+        division_id: Optional[int] = None,
+        at: Optional[datetime] = None,
+    ) -> list[int]:
+        """Return ids of slots in progress at *at* matching every given filter."""
+        self._ensure_fresh(db)
+        at = at or campus_now()
+        day = WEEKDAYS[at.weekday()]
+        moment = seconds_of_day(at.time())
+
+        matches: Optional[set[int]] = None
+        for kind, owner in (
+            ("location", location_id),
+            ("teacher", teacher_id),
+            ("division", division_id),
+        ):
+            if owner is None:
+                continue
+            bucket = self._buckets.get((kind, owner, day))
+            found = (
+                {slot.timetable_id for slot in bucket.overlapping(moment, moment + 1)}
+                if bucket
+                else set()
+            )
+            matches = found if matches is None else matches & found
+        return sorted(matches or ())
+
+    def is_live(
+        self,
+        db: Session,
+        timetable_id: int,
+        at: Optional[datetime] = None,
+        grace_seconds: int = 0,
+    ) -> bool:
+        """Whether *timetable_id* is scheduled around *at*, give or take the grace period."""
+        self._ensure_fresh(db)
+        slot = self._slots.get(timetable_id)
+        if slot is None:
+            return False
+        at = at or campus_now()
+        if WEEKDAYS[at.weekday()] != slot.day_of_week:
+            return False
+        moment = seconds_of_day(at.time())
+        return slot.start - grace_seconds <= moment < slot.end + grace_seconds
+
+    def _ensure_fresh(self, db: Session) -> None:
+        now = time_module.monotonic()
+        if self._built_at is not None and now - self._built_at < self._ttl_seconds:
+            return
+        with self._lock:
+            if self._built_at is not None and now - self._built_at < self._ttl_seconds:
+                return
+            rows = (
+                db.query(
+                    Timetable.id,
+                    Timetable.division_id,
+                    Timetable.teacher_id,
+                    Timetable.location_id,
+                    Timetable.batch_id,
+                    Timetable.semester,
+                    Timetable.day_of_week,
+                    Timetable.start_time,
+                    Timetable.end_time,
+                )
+                .filter(Timetable.is_active.is_(True))
+                .all()
+            )
+            buckets: dict[tuple[str, int, DayOfWeek], IntervalBucket] = {}
+            slots: dict[int, Slot] = {}
+            for row in rows:
+                slot = Slot.from_timetable(row)
+                slots[slot.timetable_id] = slot
+                for kind, owner in (
+                    ("location", slot.location_id),
+                    ("teacher", slot.teacher_id),
+                    ("division", slot.division_id),
+                ):
+                    buckets.setdefault((kind, owner, slot.day_of_week), IntervalBucket()).add(slot)
+            self._buckets = buckets
+            self._slots = slots
+            self._built_at = time_module.monotonic()
+
+
+active_session_index = ActiveSessionIndex(settings.ACTIVE_SESSION_INDEX_TTL_SECONDS)
@@ -0,0 +1,224 @@
+"""
+Set-based absentee marking for finished sessions.
+
+Both entry points issue a single ``INSERT ... SELECT`` that anti-joins active
+enrollments against the attendance already recorded for the session day, so
+the database never ships the session's history back to Python.
+
+The automatic sweep only closes session days that actually ran, i.e. a QR or
+OTP code was generated for them or somebody marked: a timetable slot on a
+holiday or a cancelled lecture must not turn the whole division absent.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, exists, func, insert, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+from app.database.otp_code import OTPCode
+from app.database.qr_codes import QRCode
+from app.database.student_enrollments import EnrollmentStatus, StudentEnrollment
+from app.database.timetables import Timetable
+from app.services.active_sessions import WEEKDAYS, campus_now
+
+ABSENT_DEVICE_INFO = "system:marked_absent"
+# How far back find_ended_sessions looks, however old the window start is.
+MAX_SWEEP_DAYS = 7
+
+_INSERT_COLUMNS = [
+    "timetable_id",
+    "student_id",
+    "enrollment_id",
+    "teacher_id",
+    "division_id",
+    "batch_id",
+    "location_id",
+    "marked_at",
+    "session_date",
+    "status",
+    "device_info",
+    "created_at",
+    "updated_at",
+]
+
+
+def insert_attendance(db: Session):
+    """``INSERT INTO attendance_records`` that silently skips rows whose
+    (timetable, student, session_date) is already recorded."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(AttendanceRecord).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(AttendanceRecord).on_conflict_do_nothing()
+    return insert(AttendanceRecord)
+
+
+def _not_marked(timetable_id_column, target_date: date):
+    return ~exists().where(
+        AttendanceRecord.timetable_id == timetable_id_column,
+        AttendanceRecord.student_id == StudentEnrollment.student_id,
+        AttendanceRecord.session_date == target_date,
+    )
+
+
+def _utc_bounds(day: date) -> tuple[datetime, datetime]:
+    """Naive-UTC ``[start, end)`` of a campus calendar day."""
+    campus = ZoneInfo(settings.CAMPUS_TIMEZONE)
+
+    def midnight(d: date) -> datetime:
+        return datetime.combine(d, time.min, campus).astimezone(timezone.utc).replace(tzinfo=None)
+
+    return midnight(day), midnight(day + timedelta(days=1))
+
+
+def _session_ran(day: date):
+    """True when the timetable had a code issued or a mark on *day*."""
+    start, end = _utc_bounds(day)
+    return or_(
+        exists().where(
+            QRCode.timetable_id == Timetable.id,
+            QRCode.created_at >= start,
+            QRCode.created_at < end,
+        ),
+        exists().where(
+            OTPCode.timetable_id == Timetable.id,
+            OTPCode.created_at >= start,
+            OTPCode.created_at < end,
+        ),
+        exists().where(
+            AttendanceRecord.timetable_id == Timetable.id,
+            AttendanceRecord.session_date == day,
+        ),
+    )
+
+
+def _absent_values(now: datetime, target_date: date) -> list:
+    return [
+        literal(now, AttendanceRecord.marked_at.type),
+        literal(target_date, AttendanceRecord.session_date.type),
+        literal(AttendanceStatus.ABSENT, AttendanceRecord.status.type),
+        literal(ABSENT_DEVICE_INFO, AttendanceRecord.device_info.type),
+        literal(now, AttendanceRecord.created_at.type),
+        literal(now, AttendanceRecord.updated_at.type),
+    ]
+
+
+def mark_session_absentees(
+    db: Session,
+    timetable: Timetable,
+    target_date: date,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Insert ABSENT rows for every active enrollee without a record that day.
+
+    The caller owns the transaction.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    enrolled = and_(
+        StudentEnrollment.division_id == timetable.division_id,
+        StudentEnrollment.status == EnrollmentStatus.ACTIVE,
+    )
+
+    absentees = select(
+        literal(timetable.id, AttendanceRecord.timetable_id.type),
+        StudentEnrollment.student_id,
+        StudentEnrollment.id,
+        literal(timetable.teacher_id, AttendanceRecord.teacher_id.type),
+        literal(timetable.division_id, AttendanceRecord.division_id.type),
+        literal(timetable.batch_id, AttendanceRecord.batch_id.type),
+        literal(timetable.location_id, AttendanceRecord.location_id.type),
+        *_absent_values(now, target_date),
+    ).where(enrolled, _not_marked(timetable.id, target_date))
+
+    result = db.execute(insert_attendance(db).from_select(_INSERT_COLUMNS, absentees))
+    total_enrolled = db.query(func.count(StudentEnrollment.id)).filter(enrolled).scalar() or 0
+    marked_absent = result.rowcount or 0
+    return {
+        "marked_absent": marked_absent,
+        "skipped_already_marked": total_enrolled - marked_absent,
+        "total_enrolled": total_enrolled,
+    }
+
+
+def find_ended_sessions(db: Session, since: datetime, until: datetime) -> list[tuple[date, int]]:
+    """``(session day, id)`` of division-wide sessions whose end_time fell in
+    ``(since, until]``.
+
+    Both bounds are campus wall-clock times. The window may span midnight
+    and is walked one day at a time, looking back at most
+    ``MAX_SWEEP_DAYS``. Batch sessions are skipped: enrollments are not
+    linked to batches, so the absent set for them cannot be derived. So are
+    sessions that did not run that day (no code issued, nobody marked).
+    """
+    since = max(since, until - timedelta(days=MAX_SWEEP_DAYS))
+    found: list[tuple[date, int]] = []
+    day = since.date()
+    while day <= until.date():
+        query = db.query(Timetable.id).filter(
+            Timetable.is_active.is_(True),
+            Timetable.batch_id.is_(None),
+            Timetable.day_of_week == WEEKDAYS[day.weekday()],
+            _session_ran(day),
+        )
+        if day == until.date():
+            query = query.filter(Timetable.end_time <= until.time())
+        if day == since.date() and since > datetime.combine(day, time.min):
+            query = query.filter(Timetable.end_time > since.time())
+        found.extend((day, row[0]) for row in query.order_by(Timetable.id).all())
+        day += timedelta(days=1)
+    return found
+
+
+def close_sessions(db: Session, session_ids: list[int], target_date: date) -> int:
+    """Mark absentees for all *session_ids* with one statement and return the
+    number of rows inserted. The caller owns the transaction."""
+    if not session_ids:
+        return 0
+    stamp = datetime.now(timezone.utc).replace(tzinfo=None)
+    absentees = (
+        select(
+            Timetable.id,
+            StudentEnrollment.student_id,
+            StudentEnrollment.id,
+            Timetable.teacher_id,
+            Timetable.division_id,
+            Timetable.batch_id,
+            Timetable.location_id,
+            *_absent_values(stamp, target_date),
+        )
+        .select_from(Timetable)
+        .join(StudentEnrollment, StudentEnrollment.division_id == Timetable.division_id)
+        .where(
+            Timetable.id.in_(session_ids),
+            StudentEnrollment.status == EnrollmentStatus.ACTIVE,
+            _not_marked(Timetable.id, target_date),
+        )
+    )
+    result = db.execute(insert_attendance(db).from_select(_INSERT_COLUMNS, absentees))
+    return result.rowcount or 0
+
+
+def close_recently_ended_sessions(
+    db: Session,
+    within_minutes: int,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Mark absentees for every session that ended in the last
+    *within_minutes*, campus wide, in one pass. The caller owns the transaction."""
+    campus_time = now or campus_now()
+    found = find_ended_sessions(
+        db, campus_time - timedelta(minutes=within_minutes), campus_time
+    )
+    by_day: dict[date, list[int]] = {}
+    for session_date, timetable_id in found:
+        by_day.setdefault(session_date, []).append(timetable_id)
+    return {
+        "sessions_closed": len(found),
+        "timetable_ids": [timetable_id for _, timetable_id in found],
+        "marked_absent": sum(close_sessions(db, ids, day) for day, ids in by_day.items()),
+    }
@@ -0,0 +1,271 @@
+"""
+Monthly range partitions of ``attendance_records`` on ``marked_at``.
+
+The table is partitioned by migration c4d5e6f7a8b9 on Postgres. This module
+keeps partitions ahead of the calendar and moves closed academic years out
+of the live table:
+
+    python -m app.services.attendance_partitions ensure --months-ahead 3
+    python -m app.services.attendance_partitions archive --academic-year 2024-2025
+
+Partitions are named ``attendance_records_yYYYYmMM`` and cover one UTC
+month (``marked_at`` is stored as naive UTC). Archived partitions are
+detached and moved to the ``ATTENDANCE_ARCHIVE_SCHEMA`` schema, where they
+remain queryable and can be dumped and dropped independently. Everything
+here is a no-op on databases other than Postgres and on a table that has
+not been partitioned, so SQLite tests and older databases are unaffected.
+"""
+
+import argparse
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+
+logger = logging.getLogger("smartattendance.partitions")
+
+TABLE = "attendance_records"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+# Serialises partition DDL across processes starting at the same time.
+_ADVISORY_LOCK_ID = 7_461_002
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def academic_year_bounds(academic_year: str) -> tuple[date, date]:
+    """``"2024-2025"`` -> [2024-07-01, 2025-07-01) when the year starts in July."""
+    match = re.fullmatch(r"(\d{4})-(\d{4})", academic_year.strip())
+    if not match or int(match.group(2)) != int(match.group(1)) + 1:
+        raise ValueError(f"Academic year must look like 2024-2025, got {academic_year!r}")
+    start = date(int(match.group(1)), settings.ACADEMIC_YEAR_START_MONTH, 1)
+    return start, add_months(start, 12)
+
+
+def marked_between(start: Optional[date] = None, end: Optional[date] = None) -> list:
+    """Filter conditions for records marked on ``start``..``end`` inclusive.
+
+    Plain range comparisons on ``marked_at`` (not ``date(marked_at)``), so the
+    planner can prune partitions and use the marked_at indexes.
+    """
+    from app.database.attendance_records import AttendanceRecord
+
+    conditions = []
+    if start is not None:
+        conditions.append(AttendanceRecord.marked_at >= datetime.combine(start, time.min))
+    if end is not None:
+        conditions.append(AttendanceRecord.marked_at < datetime.combine(end + timedelta(days=1), time.min))
+    return conditions
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND c.relnamespace = current_schema()::regnamespace"
+            ),
+            {"table": TABLE},
+        ).scalar()
+    )
+
+
+def list_partitions(conn: Connection) -> list[date]:
+    """Months that currently have an attached partition, oldest first."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = current_schema()::regnamespace"
+        ),
+        {"table": TABLE},
+    ).scalars()
+    months = []
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _default_partition_has_rows(conn: Connection, lower: date, upper: date) -> bool:
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is None:
+        return False
+    return bool(
+        conn.execute(
+            text(
+                f'SELECT 1 FROM "{DEFAULT_PARTITION}" '
+                "WHERE marked_at >= :lower AND marked_at < :upper LIMIT 1"
+            ),
+            {"lower": lower, "upper": upper},
+        ).scalar()
+    )
+
+
+def create_partition(conn: Connection, month: date) -> None:
+    """Create the month's partition.
+
+    Postgres refuses ``PARTITION OF`` while the DEFAULT partition holds rows
+    in the new range, so in that case the partition is built as a plain
+    table, the rows are moved out of the default partition and the table is
+    attached.
+    """
+    lower = month_start(month)
+    upper = add_months(lower, 1)
+    name = partition_name(lower)
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    if _default_partition_has_rows(conn, lower, upper):
+        conn.execute(
+            text(f'CREATE TABLE "{name}" (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        )
+        moved = conn.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+                "WHERE marked_at >= :lower AND marked_at < :upper RETURNING *) "
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ),
+            {"lower": lower, "upper": upper},
+        ).rowcount
+        conn.execute(text(f'ALTER TABLE {TABLE} ATTACH PARTITION "{name}" {bounds}'))
+        logger.warning(
+            "attendance rows moved out of the default partition",
+            extra={"partition": name, "rows": moved},
+        )
+    else:
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {TABLE} {bounds}'))
+    # Uniqueness per session day cannot be declared on the parent without
+    # including marked_at, so each partition carries its own index.
+    conn.execute(
+        text(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "{name}_session_day_key" '
+            f'ON "{name}" (timetable_id, student_id, session_date)'
+        )
+    )
+
+
+def ensure_partitions(
+    conn: Connection, months_ahead: Optional[int] = None, today: Optional[date] = None
+) -> list[str]:
+    """Create any missing partitions from the current month to ``months_ahead``.
+
+    Each month is created in its own savepoint, so a month that fails is
+    logged and skipped without losing the others. Returns the names of
+    partitions created.
+    """
+    if not is_partitioned(conn):
+        return []
+    months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or datetime.now(timezone.utc).date())
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+    existing = set(list_partitions(conn))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        try:
+            with conn.begin_nested():
+                create_partition(conn, month)
+        except Exception:
+            logger.exception(
+                "attendance partition could not be created; rows for that month stay in the default partition",
+                extra={"partition": partition_name(month)},
+            )
+            continue
+        created.append(partition_name(month))
+    if created:
+        logger.info("attendance partitions created", extra={"partitions": created})
+    return created
+
+
+def archive_academic_year(conn: Connection, academic_year: str, dry_run: bool = False) -> list[str]:
+    """Detach the year's partitions and move them to the archive schema.
+
+    Refuses to archive a year that has not ended yet.
+    """
+    start, end = academic_year_bounds(academic_year)
+    if end > month_start(datetime.now(timezone.utc).date()):
+        raise ValueError(f"Academic year {academic_year} has not ended")
+    if not is_partitioned(conn):
+        return []
+
+    months = [m for m in list_partitions(conn) if start <= m < end]
+    names = [partition_name(m) for m in months]
+    if dry_run or not names:
+        return names
+
+    schema = settings.ATTENDANCE_ARCHIVE_SCHEMA
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+    conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+    for name in names:
+        conn.execute(text(f'ALTER TABLE {TABLE} DETACH PARTITION "{name}"'))
+        conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"'))
+    logger.info(
+        "attendance partitions archived",
+        extra={"academic_year": academic_year, "partitions": names, "schema": schema},
+    )
+    return names
+
+
+def ensure_partitions_on_startup() -> None:
+    """Best-effort partition top-up when the API starts."""
+    from app.database.database import engine
+
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            ensure_partitions(conn)
+    except Exception:
+        logger.exception("Could not create attendance partitions")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database.database import engine
+
+    parser = argparse.ArgumentParser(description="Maintain attendance_records partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=None)
+
+    archive = commands.add_parser("archive", help="detach a closed academic year")
+    archive.add_argument("--academic-year", required=True, help="e.g. 2024-2025")
+    archive.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args(argv)
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            print(f"{TABLE} is not partitioned on this database; nothing to do.")
+            return
+        if args.command == "ensure":
+            created = ensure_partitions(conn, args.months_ahead)
+            print("Created: " + (", ".join(created) or "none"))
+        else:
+            names = archive_academic_year(conn, args.academic_year, args.dry_run)
+            verb = "Would archive" if args.dry_run else "Archived"
+            print(f"{verb}: " + (", ".join(names) or "none"))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from collections import defaultdict
 
 from fastapi import WebSocket
 
+from app.core.metrics import WEBSOCKET_CONNECTIONS
+
 
 class AttendanceWebSocketManager:
     def __init__(self) -> None:
@@ -20,6 +22,9 @@ class AttendanceWebSocketManager:
         if not sockets:
             self._connections.pop(timetable_id, None)
 
+    def connection_count(self) -> int:
+        return sum(len(sockets) for sockets in self._connections.values())
+
     async def broadcast(self, timetable_id: int, payload: dict) -> None:
         sockets = list(self._connections.get(timetable_id, set()))
         if not sockets:
@@ -38,3 +43,4 @@ class AttendanceWebSocketManager:
 
 
 attendance_ws_manager = AttendanceWebSocketManager()
+WEBSOCKET_CONNECTIONS.set_function(attendance_ws_manager.connection_count)
@@ -0,0 +1,419 @@
+"""
+Bulk import of users and student enrollments from CSV or JSONL uploads.
+
+The upload is read row by row and handled in chunks of ``IMPORT_CHUNK_SIZE``
+rows. For each chunk the rows are validated with the same schemas as the
+single-record endpoints. Uniqueness and foreign keys are then checked with
+one ``IN`` query per column, and duplicates within the file are checked
+against everything read so far. Passwords are hashed in batches on the
+password process pool. The valid rows go in with a single executemany
+``INSERT`` and one commit.
+
+Rows are counted before anything is written, so a file over
+``IMPORT_MAX_ROWS`` is refused whole. Invalid rows are skipped and reported
+by line number; the rest of the file is still imported. If the password
+pool is saturated mid-import the run stops after the chunks already
+committed and the report is marked ``truncated``; uploading the same file
+again imports the rest (the committed rows are reported as existing). With
+``dry_run`` nothing is hashed or written, so a file can be checked before
+the real run.
+
+Everything here is blocking; the upload routes are plain ``def`` handlers
+and run in FastAPI's threadpool.
+"""
+
+import abc
+import codecs
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import IO, Any, Iterable, Iterator, Optional
+
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.database.branches import Branch
+from app.database.courses import Course
+from app.database.divisions import Division
+from app.database.student_enrollments import EnrollmentStatus, EnrollmentYear, StudentEnrollment
+from app.database.user import User, UserRole
+from app.schemas.enrollment import EnrollmentCreate
+from app.schemas.user import UserCreate
+from app.security.password import PasswordHasherBusy, password_hasher
+
+logger = logging.getLogger("smartattendance.imports")
+
+FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool
+    total_rows: int = 0
+    valid_rows: int = 0
+    inserted: int = 0
+    error_count: int = 0
+    truncated: bool = False
+    errors: list = field(default_factory=list)
+
+    def reject(self, line: int, messages: list[str]) -> None:
+        self.error_count += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line, "errors": messages})
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "valid_rows": self.valid_rows,
+            "inserted": self.inserted,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+            "truncated": self.truncated,
+        }
+
+
+def import_message(report: ImportReport) -> str:
+    if report.truncated:
+        return "Import stopped early while password hashing was busy; upload the file again to import the remaining rows"
+    return "Import checked" if report.dry_run else "Import finished"
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    fmt = (explicit or (filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt in ("ndjson", "json"):
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValidationError("Import file must be CSV or JSONL")
+    return fmt
+
+
+def iter_rows(fileobj: IO[bytes], fmt: str) -> Iterator[tuple[int, Any]]:
+    """Yield ``(line_number, row)`` from a binary file without loading it whole.
+
+    CSV rows are dicts keyed by the header line. A JSONL line that is not a
+    JSON object is yielded as-is and rejected during validation. A file that
+    is not UTF-8 (e.g. a cp1252 export from Excel) or not parseable as CSV
+    raises ``ValidationError``; ``count_rows`` reads the whole file first, so
+    that happens before anything is written.
+    """
+    try:
+        yield from _read_rows(fileobj, fmt)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ValidationError("Import file must be UTF-8 CSV/JSONL", data={"reason": str(exc)}) from exc
+
+
+def _read_rows(fileobj: IO[bytes], fmt: str) -> Iterator[tuple[int, Any]]:
+    text = codecs.getreader("utf-8-sig")(fileobj)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, exc
+
+
+def count_rows(fileobj: IO[bytes], fmt: str) -> int:
+    """Count the rows of a seekable upload and rewind it."""
+    total = sum(1 for _ in iter_rows(fileobj, fmt))
+    fileobj.seek(0)
+    return total
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(row: Any) -> dict:
+    """Strip strings and drop empty cells so schema defaults apply."""
+    if isinstance(row, json.JSONDecodeError):
+        raise ValueError(f"invalid JSON: {row.msg}")
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            raise ValueError("row has more cells than the header")
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                continue
+        if value is not None:
+            cleaned[key.strip()] = value
+    return cleaned
+
+
+def _messages(exc: PydanticValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def _existing(db: Session, column, values: Iterable) -> set:
+    values = {v for v in values if v is not None}
+    if not values:
+        return set()
+    return set(db.execute(select(column).where(column.in_(values))).scalars())
+
+
+class _Importer(abc.ABC):
+    """Runs the chunk loop shared by both imports."""
+
+    def __init__(self, db: Session, dry_run: bool) -> None:
+        self.db = db
+        self.report = ImportReport(dry_run=dry_run)
+
+    def run(self, rows: Iterable[tuple[int, Any]]) -> ImportReport:
+        for chunk in _chunks(rows, settings.IMPORT_CHUNK_SIZE):
+            self.report.total_rows += len(chunk)
+            valid = self.check(self.validate(chunk))
+            self.report.valid_rows += len(valid)
+            if valid and not self.report.dry_run:
+                try:
+                    self.insert(valid)
+                except PasswordHasherBusy:
+                    # Nothing from this chunk was written; earlier chunks stay.
+                    logger.warning("import stopped: password hashing is saturated")
+                    self.report.valid_rows -= len(valid)
+                    self.report.truncated = True
+                    break
+        return self.report
+
+    def validate(self, chunk: list) -> list[tuple[int, Any]]:
+        valid = []
+        for line, row in chunk:
+            try:
+                valid.append((line, self.parse(_clean(row))))
+            except PydanticValidationError as exc:
+                self.report.reject(line, _messages(exc))
+            except ValueError as exc:
+                self.report.reject(line, [str(exc)])
+        return valid
+
+    @abc.abstractmethod
+    def parse(self, row: dict):
+        """Validate one cleaned row; raise ``ValueError`` or pydantic errors."""
+
+    @abc.abstractmethod
+    def check(self, rows: list) -> list:
+        """Return the rows that pass uniqueness and foreign-key checks."""
+
+    @abc.abstractmethod
+    def rows_for_insert(self, rows: list) -> list[dict]:
+        """Column values for the executemany ``INSERT``."""
+
+    def insert(self, rows: list) -> None:
+        table = self.table
+        values = self.rows_for_insert(rows)
+        try:
+            self.db.execute(insert(table), values)
+            self.db.commit()
+        except IntegrityError as exc:
+            # A concurrent write took a key between the check and the insert;
+            # the whole chunk is rolled back and reported.
+            self.db.rollback()
+            logger.warning("import chunk rejected", extra={"table": table.__tablename__, "error": str(exc.orig)})
+            for line, _ in rows:
+                self.report.reject(line, ["conflicts with a record created during the import"])
+            self.report.valid_rows -= len(rows)
+            return
+        self.report.inserted += len(values)
+
+
+class UserImporter(_Importer):
+    table = User
+
+    def __init__(self, db: Session, dry_run: bool) -> None:
+        super().__init__(db, dry_run)
+        self.seen = {"email": set(), "username": set(), "phone": set()}
+
+    def parse(self, row: dict) -> UserCreate:
+        return UserCreate.model_validate(row)
+
+    def check(self, rows: list[tuple[int, UserCreate]]) -> list[tuple[int, UserCreate]]:
+        taken = {
+            name: _existing(self.db, getattr(User, name), (getattr(user, name) for _, user in rows))
+            for name in self.seen
+        }
+        valid = []
+        for line, user in rows:
+            messages = []
+            for name, seen in self.seen.items():
+                value = getattr(user, name)
+                if value is None:
+                    continue
+                if value in taken[name]:
+                    messages.append(f"{name}: already exists")
+                elif value in seen:
+                    messages.append(f"{name}: duplicated earlier in the file")
+            if messages:
+                self.report.reject(line, messages)
+                continue
+            for name, seen in self.seen.items():
+                if getattr(user, name) is not None:
+                    seen.add(getattr(user, name))
+            valid.append((line, user))
+        return valid
+
+    def rows_for_insert(self, rows: list[tuple[int, UserCreate]]) -> list[dict]:
+        hashes = password_hasher.hash_many_sync(
+            [(user.password, user.username) for _, user in rows],
+            batch_size=settings.IMPORT_HASH_BATCH_SIZE,
+        )
+        values = []
+        for (_, user), password_hash in zip(rows, hashes):
+            data = user.model_dump(exclude={"password"})
+            data["password_hash"] = password_hash
+            values.append(data)
+        return values
+
+
+class EnrollmentImporter(_Importer):
+    """Enrollment rows name the student by ``student_id``, ``student_username``
+    or ``student_email``; ``current_year`` may be 1-4 or I-IV and ``status``
+    defaults to active."""
+
+    table = StudentEnrollment
+
+    def __init__(self, db: Session, dry_run: bool) -> None:
+        super().__init__(db, dry_run)
+        self.seen_numbers: set[str] = set()
+        self.seen_students: set[int] = set()
+
+    def parse(self, row: dict) -> dict:
+        year = row.get("current_year")
+        if isinstance(year, str):
+            if year.isdigit():
+                row["current_year"] = int(year)
+            elif year.upper() in EnrollmentYear.__members__:
+                row["current_year"] = EnrollmentYear[year.upper()].value
+        row.setdefault("status", EnrollmentStatus.ACTIVE.value)
+        student_ref = {k: row.get(k) for k in ("student_username", "student_email") if row.get(k)}
+        if "student_id" not in row:
+            if not student_ref:
+                raise ValueError("student_id, student_username or student_email is required")
+            row["student_id"] = 0
+        return {"enrollment": EnrollmentCreate.model_validate(row), "student_ref": student_ref}
+
+    def _resolve_students(self, rows: list) -> dict:
+        usernames = {r["student_ref"].get("student_username") for _, r in rows} - {None}
+        emails = {r["student_ref"].get("student_email") for _, r in rows} - {None}
+        ids = {r["enrollment"].student_id for _, r in rows if not r["student_ref"]}
+        conditions = []
+        if ids:
+            conditions.append(User.id.in_(ids))
+        if usernames:
+            conditions.append(User.username.in_(usernames))
+        if emails:
+            conditions.append(User.email.in_(emails))
+        students = {}
+        if conditions:
+            query = select(User.id, User.username, User.email, User.role).where(or_(*conditions))
+            for user_id, username, email, role in self.db.execute(query):
+                for key in (("student_id", user_id), ("student_username", username), ("student_email", email)):
+                    students[key] = (user_id, role)
+        return students
+
+    def check(self, rows: list) -> list:
+        students = self._resolve_students(rows)
+        enrollments = [r["enrollment"] for _, r in rows]
+        numbers_taken = _existing(self.db, StudentEnrollment.enrollment_number, (e.enrollment_number for e in enrollments))
+        known = {
+            "course_id": _existing(self.db, Course.id, (e.course_id for e in enrollments)),
+            "branch_id": _existing(self.db, Branch.id, (e.branch_id for e in enrollments)),
+            "division_id": _existing(self.db, Division.id, (e.division_id for e in enrollments)),
+        }
+
+        resolved = []
+        student_ids = set()
+        for line, row in rows:
+            enrollment, ref = row["enrollment"], row["student_ref"]
+            key = next(iter(ref.items())) if ref else ("student_id", enrollment.student_id)
+            match = students.get(key)
+            if match is not None:
+                enrollment.student_id = match[0]
+                student_ids.add(match[0])
+            resolved.append((line, enrollment, match))
+        already_enrolled = _existing(self.db, StudentEnrollment.student_id, student_ids)
+
+        valid = []
+        for line, enrollment, match in resolved:
+            messages = []
+            if match is None:
+                messages.append("student: not found")
+            elif match[1] != UserRole.STUDENT:
+                messages.append("student: user is not a student")
+            elif enrollment.student_id in already_enrolled:
+                messages.append("student: already enrolled")
+            elif enrollment.student_id in self.seen_students:
+                messages.append("student: duplicated earlier in the file")
+            for name, ids in known.items():
+                if getattr(enrollment, name) not in ids:
+                    messages.append(f"{name}: not found")
+            if enrollment.enrollment_number in numbers_taken:
+                messages.append("enrollment_number: already exists")
+            elif enrollment.enrollment_number in self.seen_numbers:
+                messages.append("enrollment_number: duplicated earlier in the file")
+            if messages:
+                self.report.reject(line, messages)
+                continue
+            self.seen_numbers.add(enrollment.enrollment_number)
+            self.seen_students.add(enrollment.student_id)
+            valid.append((line, enrollment))
+        return valid
+
+    def rows_for_insert(self, rows: list[tuple[int, EnrollmentCreate]]) -> list[dict]:
+        return [enrollment.model_dump() for _, enrollment in rows]
+
+
+def _log_finished(kind: str, report: ImportReport) -> None:
+    logger.info(
+        "import finished",
+        extra={
+            "import_kind": kind,
+            "dry_run": report.dry_run,
+            "total_rows": report.total_rows,
+            "inserted": report.inserted,
+            "error_count": report.error_count,
+        },
+    )
+
+
+def _check_row_limit(fileobj: IO[bytes], fmt: str) -> None:
+    if count_rows(fileobj, fmt) > settings.IMPORT_MAX_ROWS:
+        raise ValidationError(f"Import files are limited to {settings.IMPORT_MAX_ROWS} rows")
+
+
+def import_users(db: Session, fileobj: IO[bytes], fmt: str, dry_run: bool = False) -> ImportReport:
+    _check_row_limit(fileobj, fmt)
+    report = UserImporter(db, dry_run).run(iter_rows(fileobj, fmt))
+    _log_finished("users", report)
+    return report
+
+
+def import_enrollments(db: Session, fileobj: IO[bytes], fmt: str, dry_run: bool = False) -> ImportReport:
+    _check_row_limit(fileobj, fmt)
+    report = EnrollmentImporter(db, dry_run).run(iter_rows(fileobj, fmt))
+    _log_finished("enrollments", report)
+    return report
+
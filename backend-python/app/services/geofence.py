@@ -0,0 +1,357 @@
+"""
+Precompiled location geofences and a grid index over them.
+
+Every location with coordinates and a radius is compiled once into a
+``Geofence`` holding its centre in radians, ``cos(latitude)`` and a bounding
+box in degrees. Checking a point is then a few comparisons for points
+outside the box, a flat-earth (equirectangular) distance for the rest, and
+the haversine formula only within ``BOUNDARY_BAND`` of the edge, where the
+approximation could land on the wrong side.
+
+``GeofenceIndex`` buckets the fences into a grid of
+``GEOFENCE_GRID_CELL_DEGREES`` cells to answer "which rooms is this point
+inside". It is process-local and rebuilt lazily. A location write calls
+``invalidate()``, which drops this process's copy and bumps a version
+counter in Redis. Other workers compare that counter at most once per
+``VERSION_CHECK_SECONDS``, so an edited fence takes effect everywhere
+within about a second. ``GEOFENCE_INDEX_TTL_SECONDS`` bounds the staleness
+when Redis is not configured or unreachable.
+
+``verify_batch`` checks many (location, point) pairs at once, vectorised
+with numpy when it is installed. Marks record their distance from the fence
+centre in the audit log (never the coordinates), so past marks can be
+re-checked against the current radii:
+
+    python -m app.services.geofence audit --days 30
+"""
+
+import argparse
+import logging
+import math
+import threading
+import time as time_module
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Sequence
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+from app.database.audit_log import AuditLog
+from app.database.locations import Location
+
+try:
+    import numpy as np
+except ImportError:  # numpy not installed; verify_batch loops instead
+    np = None
+
+logger = logging.getLogger("smartattendance.geofence")
+
+EARTH_RADIUS_M = 6_371_000
+# The equirectangular distance is trusted unless it is within this fraction
+# of the radius (plus BOUNDARY_SLACK_M) from the edge. Its error grows with
+# distance and latitude but stays well under 1% for campus-sized fences.
+BOUNDARY_BAND = 0.01
+BOUNDARY_SLACK_M = 1.0
+# Fences spanning more grid cells than this are checked for every point.
+MAX_CELLS_PER_FENCE = 1024
+# Bumped on every location write; workers rebuild when it changes.
+VERSION_KEY = "geofence:version"
+VERSION_CHECK_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class Geofence:
+    location_id: int
+    name: str
+    latitude: float
+    longitude: float
+    radius: int
+    lat_rad: float
+    lon_rad: float
+    cos_lat: float
+    inner: float
+    outer: float
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+    # The box would cross the antimeridian or a pole, where the flat-earth
+    # approximation breaks down; such fences always use haversine.
+    wraps: bool
+
+    @classmethod
+    def compile(cls, location_id: int, name: str, latitude: float, longitude: float, radius: int) -> "Geofence":
+        lat_rad = math.radians(latitude)
+        cos_lat = math.cos(lat_rad)
+        margin = radius * BOUNDARY_BAND + BOUNDARY_SLACK_M
+        outer = radius + margin
+        dlat = math.degrees(outer / EARTH_RADIUS_M)
+        min_lon, max_lon, wraps = -180.0, 180.0, True
+        if cos_lat > 1e-9 and abs(latitude) + dlat < 90.0:
+            dlon = dlat / cos_lat
+            if longitude - dlon >= -180.0 and longitude + dlon <= 180.0:
+                min_lon, max_lon, wraps = longitude - dlon, longitude + dlon, False
+        return cls(
+            location_id=location_id,
+            name=name,
+            latitude=latitude,
+            longitude=longitude,
+            radius=radius,
+            lat_rad=lat_rad,
+            lon_rad=math.radians(longitude),
+            cos_lat=cos_lat,
+            inner=max(radius - margin, 0.0),
+            outer=outer,
+            min_lat=max(latitude - dlat, -90.0),
+            max_lat=min(latitude + dlat, 90.0),
+            min_lon=min_lon,
+            max_lon=max_lon,
+            wraps=wraps,
+        )
+
+    def distance(self, latitude: float, longitude: float) -> float:
+        """Great-circle distance in metres from the centre (haversine)."""
+        phi = math.radians(latitude)
+        a = (
+            math.sin((phi - self.lat_rad) / 2) ** 2
+            + self.cos_lat * math.cos(phi) * math.sin((math.radians(longitude) - self.lon_rad) / 2) ** 2
+        )
+        return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        if not (self.min_lat <= latitude <= self.max_lat and self.min_lon <= longitude <= self.max_lon):
+            return False
+        if self.wraps:
+            return self.distance(latitude, longitude) <= self.radius
+        y = math.radians(latitude) - self.lat_rad
+        x = (math.radians(longitude) - self.lon_rad) * self.cos_lat
+        approx = EARTH_RADIUS_M * math.sqrt(x * x + y * y)
+        if approx <= self.inner:
+            return True
+        if approx > self.outer:
+            return False
+        return self.distance(latitude, longitude) <= self.radius
+
+
+def _contains_many(fence: Geofence, latitudes, longitudes):
+    """``fence.contains`` over numpy arrays of coordinates."""
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    approx = EARTH_RADIUS_M * np.hypot((lon - fence.lon_rad) * fence.cos_lat, lat - fence.lat_rad)
+    if fence.wraps:
+        approx = np.full_like(approx, fence.inner + 1.0)
+    inside = approx <= fence.inner
+    band = ~inside & (approx <= fence.outer)
+    if band.any():
+        phi = lat[band]
+        a = (
+            np.sin((phi - fence.lat_rad) / 2) ** 2
+            + fence.cos_lat * np.cos(phi) * np.sin((lon[band] - fence.lon_rad) / 2) ** 2
+        )
+        inside[band] = EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) <= fence.radius
+    return inside
+
+
+def verify_batch(
+    fences: dict[int, Geofence],
+    location_ids: Sequence[Optional[int]],
+    latitudes: Sequence[Optional[float]],
+    longitudes: Sequence[Optional[float]],
+) -> list[Optional[bool]]:
+    """Whether each point lies inside its location's fence.
+
+    ``None`` where the location has no fence or the point has no
+    coordinates. Points are grouped per location and each group is checked
+    in one vectorised pass when numpy is available.
+    """
+    groups: dict[int, list[int]] = {}
+    for position, (location_id, lat, lon) in enumerate(zip(location_ids, latitudes, longitudes)):
+        if location_id in fences and lat is not None and lon is not None:
+            groups.setdefault(location_id, []).append(position)
+
+    results: list[Optional[bool]] = [None] * len(location_ids)
+    for location_id, positions in groups.items():
+        fence = fences[location_id]
+        if np is None:
+            for position in positions:
+                results[position] = fence.contains(latitudes[position], longitudes[position])
+            continue
+        lat = np.fromiter((latitudes[p] for p in positions), dtype=float, count=len(positions))
+        lon = np.fromiter((longitudes[p] for p in positions), dtype=float, count=len(positions))
+        for position, inside in zip(positions, _contains_many(fence, lat, lon).tolist()):
+            results[position] = inside
+    return results
+
+
+def fence_check(fence: Optional[Geofence], latitude: Optional[float], longitude: Optional[float]) -> dict:
+    """What the audit log keeps of a mark's position: its distance in metres
+    from the fence centre and whether it was inside. Both None without a
+    fence or coordinates."""
+    if fence is None or latitude is None or longitude is None:
+        return {"distance_m": None, "inside": None}
+    return {
+        "distance_m": round(fence.distance(latitude, longitude), 1),
+        "inside": fence.contains(latitude, longitude),
+    }
+
+
+class GeofenceIndex:
+    def __init__(self, ttl_seconds: int, cell_degrees: float) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._cell_degrees = cell_degrees
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._fences: dict[int, Geofence] = {}
+        self._cells: dict[tuple[int, int], list[Geofence]] = {}
+        self._oversized: list[Geofence] = []
+        self._built_version: Optional[str] = None
+        self._version: Optional[str] = None
+        self._version_checked_at: Optional[float] = None
+
+    def invalidate(self) -> None:
+        """Drop this process's index and tell the other workers to drop theirs."""
+        with self._lock:
+            self._built_at = None
+        if redis_service.is_configured:
+            try:
+                redis_service.client.incr(VERSION_KEY)
+            except redis.RedisError:
+                logger.exception("Could not publish geofence change; other workers catch up on TTL")
+
+    def get(self, db: Session, location_id: int) -> Optional[Geofence]:
+        """The fence of *location_id*, or None when it has no coordinates or radius."""
+        self._ensure_fresh(db)
+        return self._fences.get(location_id)
+
+    def containing(self, db: Session, latitude: float, longitude: float) -> list[Geofence]:
+        """Fences that contain the point, nearest centre first."""
+        self._ensure_fresh(db)
+        candidates = self._cells.get(self._cell(latitude, longitude), []) + self._oversized
+        found = [fence for fence in candidates if fence.contains(latitude, longitude)]
+        return sorted(found, key=lambda fence: fence.distance(latitude, longitude))
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self._cell_degrees), math.floor(longitude / self._cell_degrees)
+
+    def _shared_version(self, now: float) -> Optional[str]:
+        """The Redis version counter, re-read at most every VERSION_CHECK_SECONDS."""
+        if not redis_service.is_configured:
+            return None
+        if self._version_checked_at is None or now - self._version_checked_at >= VERSION_CHECK_SECONDS:
+            self._version_checked_at = now
+            try:
+                self._version = redis_service.client.get(VERSION_KEY)
+            except redis.RedisError:
+                logger.exception("Could not read geofence version; keeping the last one seen")
+        return self._version
+
+    def _is_fresh(self, now: float, version: Optional[str]) -> bool:
+        return (
+            self._built_at is not None
+            and now - self._built_at < self._ttl_seconds
+            and version == self._built_version
+        )
+
+    def _ensure_fresh(self, db: Session) -> None:
+        now = time_module.monotonic()
+        version = self._shared_version(now)
+        if self._is_fresh(now, version):
+            return
+        with self._lock:
+            if self._is_fresh(now, version):
+                return
+            rows = (
+                db.query(Location.id, Location.name, Location.latitude, Location.longitude, Location.radius)
+                .filter(
+                    Location.latitude.isnot(None),
+                    Location.longitude.isnot(None),
+                    Location.radius.isnot(None),
+                )
+                .all()
+            )
+            fences: dict[int, Geofence] = {}
+            cells: dict[tuple[int, int], list[Geofence]] = {}
+            oversized: list[Geofence] = []
+            for row in rows:
+                fence = Geofence.compile(row.id, row.name, row.latitude, row.longitude, row.radius)
+                fences[fence.location_id] = fence
+                low_lat, low_lon = self._cell(fence.min_lat, fence.min_lon)
+                high_lat, high_lon = self._cell(fence.max_lat, fence.max_lon)
+                if (high_lat - low_lat + 1) * (high_lon - low_lon + 1) > MAX_CELLS_PER_FENCE:
+                    oversized.append(fence)
+                    continue
+                for lat_cell in range(low_lat, high_lat + 1):
+                    for lon_cell in range(low_lon, high_lon + 1):
+                        cells.setdefault((lat_cell, lon_cell), []).append(fence)
+            self._fences = fences
+            self._cells = cells
+            self._oversized = oversized
+            self._built_version = version
+            self._built_at = time_module.monotonic()
+
+
+geofence_index = GeofenceIndex(settings.GEOFENCE_INDEX_TTL_SECONDS, settings.GEOFENCE_GRID_CELL_DEGREES)
+
+
+def audit_marks(db: Session, since: datetime, until: Optional[datetime] = None) -> dict:
+    """Re-check the distances of marks logged since *since* against the
+    current fence radii. A fence whose centre moved is not detected. Marks
+    without a distance or whose location has no fence count as
+    unverifiable."""
+    query = db.query(AuditLog.entity_id, AuditLog.details).filter(
+        AuditLog.action == "ATTENDANCE_MARKED",
+        AuditLog.created_at >= since,
+    )
+    if until is not None:
+        query = query.filter(AuditLog.created_at < until)
+
+    record_ids: list[Optional[str]] = []
+    results: list[Optional[bool]] = []
+    for entity_id, details in query.yield_per(5000):
+        details = details or {}
+        location_id = details.get("location_id")
+        fence = geofence_index.get(db, location_id) if location_id is not None else None
+        distance = details.get("distance_m")
+        record_ids.append(entity_id)
+        results.append(None if fence is None or distance is None else distance <= fence.radius)
+
+    outside = [record_id for record_id, inside in zip(record_ids, results) if inside is False]
+    return {
+        "checked": len(results),
+        "inside": sum(1 for inside in results if inside),
+        "outside": len(outside),
+        "unverifiable": sum(1 for inside in results if inside is None),
+        "outside_record_ids": outside,
+    }
+
+
+def _print_report(report: dict, show: Iterable[str]) -> None:
+    print(
+        f"Checked {report['checked']} marks: {report['inside']} inside, "
+        f"{report['outside']} outside, {report['unverifiable']} unverifiable"
+    )
+    for record_id in show:
+        print(f"  outside: attendance record {record_id}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Location geofence tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    audit = commands.add_parser("audit", help="re-check logged marks against current fences")
+    audit.add_argument("--days", type=int, default=30, help="how far back to look")
+    audit.add_argument("--list", type=int, default=20, help="outside marks to print")
+
+    args = parser.parse_args(argv)
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=args.days)
+    with SessionLocal() as db:
+        report = audit_marks(db, since)
+    _print_report(report, report["outside_record_ids"][: args.list])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Background worker that marks absentees once sessions end.
+
+The loop sleeps until the next timetable end_time (plus a grace period for
+late marks), sweeps every session that ended since the previous run and
+closes them in small batches. Batches run in worker threads behind a
+semaphore and the whole run is capped by a time budget; whatever does not
+fit is carried over to the next run, so load stays flat instead of spiking
+when hundreds of sessions end at once.
+"""
+
+import asyncio
+import logging
+import time as time_module
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis_service import redis_service
+from app.database.timetables import Timetable
+from app.services.active_sessions import WEEKDAYS, campus_now
+from app.services.attendance_closing import close_sessions, find_ended_sessions
+
+logger = logging.getLogger("smartattendance.auto_close")
+
+LOCK_KEY = "attendance:auto-close:{boundary}"
+
+
+class SessionAutoCloser:
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        grace_minutes: int = settings.AUTO_CLOSE_GRACE_MINUTES,
+        max_sleep_seconds: int = settings.AUTO_CLOSE_MAX_SLEEP_SECONDS,
+        batch_size: int = settings.AUTO_CLOSE_BATCH_SIZE,
+        max_concurrency: int = settings.AUTO_CLOSE_MAX_CONCURRENCY,
+        time_budget_seconds: int = settings.AUTO_CLOSE_TIME_BUDGET_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._grace = timedelta(minutes=grace_minutes)
+        self._max_sleep_seconds = max_sleep_seconds
+        self._batch_size = max(1, batch_size)
+        self._max_concurrency = max(1, max_concurrency)
+        self._time_budget_seconds = time_budget_seconds
+        self._swept_until: Optional[datetime] = None
+        self._backlog: dict[tuple[date, int], None] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "runs": 0,
+            "sessions_closed": 0,
+            "students_marked_absent": 0,
+            "batches_failed": 0,
+            "budget_exhausted_runs": 0,
+            "backlog": 0,
+            "last_run_at": None,
+            "last_run_duration_ms": None,
+            "last_run_sessions": 0,
+            "next_wake_at": None,
+        }
+
+    def _session(self) -> Session:
+        if self._session_factory is None:
+            from app.database.database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="session-auto-closer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            delay = await asyncio.to_thread(self._seconds_until_next_boundary, campus_now())
+            self.metrics["next_wake_at"] = (campus_now() + timedelta(seconds=delay)).isoformat()
+            await asyncio.sleep(delay)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Auto-close run failed")
+
+    def _seconds_until_next_boundary(self, now: datetime) -> float:
+        """Sleep until the next session end (plus grace), but never longer
+        than the configured maximum so missed boundaries are still picked up."""
+        cutoff = now - self._grace
+        db = self._session()
+        try:
+            next_end = (
+                db.query(Timetable.end_time)
+                .filter(
+                    Timetable.is_active.is_(True),
+                    Timetable.day_of_week == WEEKDAYS[now.weekday()],
+                    Timetable.end_time > cutoff.time(),
+                )
+                .order_by(Timetable.end_time.asc())
+                .first()
+            )
+        finally:
+            db.close()
+        if next_end is None or cutoff.date() != now.date():
+            return float(self._max_sleep_seconds)
+        wake = datetime.combine(now.date(), next_end[0]) + self._grace
+        return min(max((wake - now).total_seconds(), 1.0), float(self._max_sleep_seconds))
+
+    # -- sweeping -----------------------------------------------------------
+
+    async def run_once(self, now: Optional[datetime] = None) -> dict:
+        started = time_module.perf_counter()
+        now = now or campus_now()
+        until = now - self._grace
+        since = self._swept_until or until - timedelta(seconds=self._max_sleep_seconds)
+
+        if redis_service.is_configured:
+            claimed = await asyncio.to_thread(
+                redis_service.set_if_absent,
+                LOCK_KEY.format(boundary=until.strftime("%Y%m%d%H%M")),
+                "1",
+                max(self._time_budget_seconds * 2, 60),
+            )
+            if claimed is False:
+                # Another worker owns this boundary. The watermark stays put,
+                # so this worker's next run still covers the window.
+                return {"skipped": True}
+            # None means Redis is unreachable: sweep anyway, closing is an
+            # idempotent anti-join insert.
+
+        found = await asyncio.to_thread(self._find, since, until)
+        self._swept_until = until
+        for key in found:
+            self._backlog[key] = None
+
+        pending = list(self._backlog)
+        batches = [pending[i:i + self._batch_size] for i in range(0, len(pending), self._batch_size)]
+        deadline = time_module.monotonic() + self._time_budget_seconds
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        budget_hit = False
+
+        async def run_batch(batch: list[tuple[date, int]]) -> tuple[int, int]:
+            nonlocal budget_hit
+            async with semaphore:
+                if time_module.monotonic() >= deadline:
+                    budget_hit = True
+                    return 0, 0
+                try:
+                    marked = await asyncio.to_thread(self._close_batch, batch)
+                except Exception:
+                    logger.exception("Auto-close batch failed: %s", batch)
+                    self.metrics["batches_failed"] += 1
+                    return 0, 0
+                for key in batch:
+                    self._backlog.pop(key, None)
+                return len(batch), marked
+
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        sessions_closed = sum(closed for closed, _ in results)
+        marked_absent = sum(marked for _, marked in results)
+
+        duration_ms = round((time_module.perf_counter() - started) * 1000, 2)
+        self.metrics["runs"] += 1
+        self.metrics["sessions_closed"] += sessions_closed
+        self.metrics["students_marked_absent"] += marked_absent
+        self.metrics["budget_exhausted_runs"] += int(budget_hit)
+        self.metrics["backlog"] = len(self._backlog)
+        self.metrics["last_run_at"] = now.isoformat()
+        self.metrics["last_run_duration_ms"] = duration_ms
+        self.metrics["last_run_sessions"] = sessions_closed
+        if sessions_closed or self._backlog:
+            logger.info(
+                "Auto-close closed %s sessions (%s absent) in %sms, backlog %s",
+                sessions_closed, marked_absent, duration_ms, len(self._backlog),
+            )
+        return {
+            "sessions_closed": sessions_closed,
+            "marked_absent": marked_absent,
+            "backlog": len(self._backlog),
+        }
+
+    def _find(self, since: datetime, until: datetime) -> list[tuple[date, int]]:
+        db = self._session()
+        try:
+            return find_ended_sessions(db, since, until)
+        finally:
+            db.close()
+
+    def _close_batch(self, batch: list[tuple[date, int]]) -> int:
+        by_date: dict[date, list[int]] = {}
+        for session_date, timetable_id in batch:
+            by_date.setdefault(session_date, []).append(timetable_id)
+        db = self._session()
+        try:
+            marked = sum(close_sessions(db, ids, session_date) for session_date, ids in by_date.items())
+            db.commit()
+            return marked
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+session_auto_closer = SessionAutoCloser()
@@ -0,0 +1,172 @@
+"""
+In-memory interval index used to detect timetable clashes.
+
+An index covers one term of an academic year: the odd semesters (1, 3, 5,
+7) run together in the first half of the year and the even ones in the
+second, so slots of different terms never clash. Within a term slots are
+bucketed per (division, day), (teacher, day) and (location, day). Division
+buckets are also split by semester, since a division only has one
+semester's schedule; teachers and rooms are shared by divisions of every
+semester running that term.
+Each bucket keeps its intervals sorted by start time together with the
+longest interval it holds, so an overlap probe only has to bisect into the
+window ``[start - longest, end)`` instead of scanning the whole day.
+"""
+
+import bisect
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database.timetables import DayOfWeek, Timetable
+
+
+def term_of(semester: int) -> int:
+    """1 for the odd-semester term, 0 for the even one."""
+    return semester % 2
+
+
+def seconds_of_day(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+@dataclass(frozen=True)
+class Slot:
+    timetable_id: Optional[int]
+    division_id: int
+    teacher_id: int
+    location_id: int
+    batch_id: Optional[int]
+    semester: int
+    day_of_week: DayOfWeek
+    start: int
+    end: int
+
+    @classmethod
+    def from_timetable(cls, item) -> "Slot":
+        """Build a slot from a ``Timetable`` row or a ``TimeTableCreate`` payload."""
+        return cls(
+            timetable_id=getattr(item, "id", None),
+            division_id=item.division_id,
+            teacher_id=item.teacher_id,
+            location_id=item.location_id,
+            batch_id=item.batch_id,
+            semester=item.semester,
+            day_of_week=item.day_of_week,
+            start=seconds_of_day(item.start_time),
+            end=seconds_of_day(item.end_time),
+        )
+
+
+@dataclass
+class IntervalBucket:
+    starts: list[int] = field(default_factory=list)
+    slots: list[Slot] = field(default_factory=list)
+    longest: int = 0
+
+    def add(self, slot: Slot) -> None:
+        pos = bisect.bisect_right(self.starts, slot.start)
+        self.starts.insert(pos, slot.start)
+        self.slots.insert(pos, slot)
+        self.longest = max(self.longest, slot.end - slot.start)
+
+    def overlapping(self, start: int, end: int) -> Iterable[Slot]:
+        lo = bisect.bisect_right(self.starts, start - self.longest)
+        hi = bisect.bisect_left(self.starts, end)
+        for slot in self.slots[lo:hi]:
+            if slot.end > start:
+                yield slot
+
+
+class TimetableConflictIndex:
+    """Per-term clash detector for division, teacher and room bookings."""
+
+    def __init__(self) -> None:
+        self._divisions: dict[tuple[tuple[int, int], DayOfWeek], IntervalBucket] = {}
+        self._teachers: dict[tuple[int, DayOfWeek], IntervalBucket] = {}
+        self._locations: dict[tuple[int, DayOfWeek], IntervalBucket] = {}
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        academic_year: str,
+        term: int,
+        day_of_week: Optional[DayOfWeek] = None,
+    ) -> "TimetableConflictIndex":
+        """Index every active slot of one term (see ``term_of``) of an
+        academic year with a single query."""
+        query = db.query(
+            Timetable.id,
+            Timetable.division_id,
+            Timetable.teacher_id,
+            Timetable.location_id,
+            Timetable.batch_id,
+            Timetable.semester,
+            Timetable.day_of_week,
+            Timetable.start_time,
+            Timetable.end_time,
+        ).filter(
+            Timetable.academic_year == academic_year,
+            Timetable.semester % 2 == term,
+            Timetable.is_active.is_(True),
+        )
+        if day_of_week is not None:
+            query = query.filter(Timetable.day_of_week == day_of_week)
+
+        index = cls()
+        for row in query.all():
+            index.add(Slot.from_timetable(row))
+        return index
+
+    def add(self, slot: Slot) -> None:
+        for buckets, owner in self._buckets_for(slot):
+            buckets.setdefault((owner, slot.day_of_week), IntervalBucket()).add(slot)
+
+    def conflicts(self, slot: Slot) -> list[str]:
+        """Return a human readable reason for every clash of *slot*."""
+        if slot.end <= slot.start:
+            return ["end_time must be after start_time"]
+
+        reasons: list[str] = []
+        for other in self._overlapping(self._divisions, (slot.division_id, slot.semester), slot):
+            # Practical batches of one division may run side by side.
+            if slot.batch_id and other.batch_id and slot.batch_id != other.batch_id:
+                continue
+            reasons.append(self._describe("Division", slot.division_id, other))
+        for other in self._overlapping(self._teachers, slot.teacher_id, slot):
+            reasons.append(self._describe("Teacher", slot.teacher_id, other))
+        for other in self._overlapping(self._locations, slot.location_id, slot):
+            reasons.append(self._describe("Location", slot.location_id, other))
+        return reasons
+
+    def _buckets_for(self, slot: Slot):
+        return (
+            (self._divisions, (slot.division_id, slot.semester)),
+            (self._teachers, slot.teacher_id),
+            (self._locations, slot.location_id),
+        )
+
+    @staticmethod
+    def _overlapping(buckets: dict, owner, slot: Slot) -> Iterable[Slot]:
+        bucket = buckets.get((owner, slot.day_of_week))
+        if bucket is None:
+            return
+        for other in bucket.overlapping(slot.start, slot.end):
+            if slot.timetable_id is not None and other.timetable_id == slot.timetable_id:
+                continue
+            yield other
+
+    @staticmethod
+    def _describe(kind: str, owner: int, other: Slot) -> str:
+        target = f"timetable {other.timetable_id}" if other.timetable_id else "another imported slot"
+        return (
+            f"{kind} {owner} is already booked on {other.day_of_week.value} "
+            f"{_format(other.start)}-{_format(other.end)} ({target})"
+        )
+
+
+def _format(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
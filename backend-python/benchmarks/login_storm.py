@@ -0,0 +1,100 @@
+"""
+Login-storm benchmark: fire N logins at a running API within a time window.
+
+    python benchmarks/login_storm.py --base-url http://localhost:8000 \
+        --username student{n} --users 200 --password student123 --logins 500 --seconds 10
+
+Logins are released at an even rate over the window (the morning rush) and
+the script reports status counts, latency percentiles and the password-hash
+pool metrics from /health before and after the run.
+
+Each login uses the next of ``--users`` usernames (``{n}`` in ``--username``
+is replaced by 1..users; the accounts must exist, since unknown usernames
+are refused without hashing) and comes from one of ``--ips`` addresses sent in
+X-Forwarded-For, so the storm exercises the hasher rather than the per-account
+and per-IP limits. Run the API with TRUSTED_PROXY_HOPS=1 so the header is used.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+async def _login(
+    client: httpx.AsyncClient, payload: dict, ip: str, delay: float, latencies: list, statuses: Counter
+):
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    try:
+        response = await client.post("/api/v1/auth/login", json=payload, headers={"X-Forwarded-For": ip})
+        statuses[response.status_code] += 1
+    except httpx.HTTPError as exc:
+        statuses[type(exc).__name__] += 1
+    latencies.append((time.perf_counter() - started) * 1000)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _hash_metrics(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/health")
+    return response.json().get("data", {}).get("password_hashing", {})
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="student{n}", help="{n} is replaced by 1..--users")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--ips", type=int, default=250, help="distinct client addresses")
+    parser.add_argument("--password", default="student123")
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    payloads = [
+        {"username": args.username.replace("{n}", str(n + 1)), "password": args.password}
+        for n in range(max(args.users, 1))
+    ]
+    ips = [f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}" for n in range(1, max(args.ips, 1) + 1)]
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    limits = httpx.Limits(max_connections=args.logins, max_keepalive_connections=args.logins)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        before = await _hash_metrics(client)
+        interval = args.seconds / max(args.logins, 1)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _login(client, payloads[i % len(payloads)], ips[i % len(ips)], i * interval, latencies, statuses)
+                for i in range(args.logins)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        after = await _hash_metrics(client)
+
+    print(f"{args.logins} logins in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print("status codes:", dict(statuses))
+    if latencies:
+        print(
+            "latency ms: "
+            f"p50={statistics.median(latencies):.1f} "
+            f"p95={_percentile(latencies, 95):.1f} "
+            f"p99={_percentile(latencies, 99):.1f} "
+            f"max={max(latencies):.1f}"
+        )
+    print("hash pool before:", before)
+    print("hash pool after: ", after)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
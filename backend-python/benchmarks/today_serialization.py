@@ -0,0 +1,272 @@
+"""
+Serialisation benchmark for the /attendance/today payload.
+
+    python benchmarks/today_serialization.py --records 5000 --repeat 20
+
+Seeds an in-memory SQLite database with one day of attendance (``--records``
+marks spread over ``--sessions`` timetables) and builds the original
+response body (every record in both ``items`` and ``all_records``) two ways,
+reporting the median time of each stage and records per second:
+
+* ``orm``: ``joinedload`` records, the per-record serializers, FastAPI's
+  ``jsonable_encoder`` pass and stdlib ``json``;
+* ``projection``: the ``RECORD_WITH_STUDENT_COLUMNS`` column query and
+  ``FastJSONResponse`` (orjson).
+
+It checks that both produce the same document before timing anything, then
+times the endpoint itself in each ``view``, grouped per session.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as clock, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# The app engine is never used; the benchmark seeds its own in-memory database.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/today_serialization.db")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import joinedload, sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.principal_cache import CurrentUser  # noqa: E402
+from app.core.response import FastJSONResponse, success_response  # noqa: E402
+from app.database.attendance_records import AttendanceRecord, AttendanceStatus  # noqa: E402
+from app.database.branches import Branch  # noqa: E402
+from app.database.courses import Course  # noqa: E402
+from app.database.database import Base  # noqa: E402
+from app.database.divisions import Division  # noqa: E402
+from app.database.locations import Location, RoomType  # noqa: E402
+from app.database.student_enrollments import (  # noqa: E402
+    EnrollmentStatus,
+    EnrollmentYear,
+    StudentEnrollment,
+)
+from app.database.subjects import Subject  # noqa: E402
+from app.database.timetables import DayOfWeek, LectureType, Timetable  # noqa: E402
+from app.database.user import User, UserRole  # noqa: E402
+from app.routers.attendance import (  # noqa: E402
+    RECORD_WITH_STUDENT_COLUMNS,
+    _records_with_student,
+    _serialize_record,
+    get_today_attendance,
+)
+
+STATUSES = [AttendanceStatus.PRESENT] * 7 + [AttendanceStatus.LATE] * 2 + [AttendanceStatus.ABSENT]
+
+
+def _seed(db, records: int, sessions: int) -> None:
+    course = Course(name="Course", code="C1", duration_years=4, total_semesters=8, college_code="ENGG")
+    db.add(course)
+    db.flush()
+    branch = Branch(name="Branch", code="B1", branch_code="BR1", course_id=course.id)
+    db.add(branch)
+    db.flush()
+    division = Division(name="A", branch_id=branch.id, year=1, semester=1, academic_year="2026-2027", capacity=500)
+    subject = Subject(name="Subject", code="S1", course_id=course.id, branch_id=branch.id, semester=1, is_active=True)
+    teacher = User(email="t@bench", username="teacher", password_hash="x", role=UserRole.TEACHER)
+    location = Location(name="Room", latitude=12.97, longitude=77.59, radius=100, room_type=RoomType.CLASSROOM)
+    db.add_all([division, subject, teacher, location])
+    db.flush()
+
+    timetables = [
+        Timetable(
+            subject_id=subject.id,
+            teacher_id=teacher.id,
+            division_id=division.id,
+            location_id=location.id,
+            lecture_type=LectureType.THEORY,
+            day_of_week=DayOfWeek.MON,
+            start_time=clock(8 + n % 10, 0),
+            end_time=clock(9 + n % 10, 0),
+            semester=1,
+            academic_year="2026-2027",
+            is_active=True,
+        )
+        for n in range(sessions)
+    ]
+    db.add_all(timetables)
+    db.flush()
+
+    students = -(-records // sessions)
+    db.execute(insert(User), [
+        {
+            "email": f"s{n}@bench",
+            "username": f"s{n}",
+            "password_hash": "x",
+            "first_name": f"First{n}",
+            "last_name": f"Last{n}",
+            "role": UserRole.STUDENT,
+        }
+        for n in range(students)
+    ])
+    student_ids = [row.id for row in db.query(User.id).filter(User.role == UserRole.STUDENT).order_by(User.id)]
+    db.execute(insert(StudentEnrollment), [
+        {
+            "student_id": student_id,
+            "course_id": course.id,
+            "branch_id": branch.id,
+            "division_id": division.id,
+            "current_year": EnrollmentYear.I,
+            "current_semester": 1,
+            "enrollment_number": f"E{student_id}",
+            "enrollment_date": date.today(),
+            "academic_year": "2026-2027",
+            "status": EnrollmentStatus.ACTIVE,
+        }
+        for student_id in student_ids
+    ])
+    enrollment_ids = dict(db.query(StudentEnrollment.student_id, StudentEnrollment.id))
+
+    morning = datetime.combine(date.today(), clock(0, 0))
+    rows = []
+    for n in range(records):
+        timetable = timetables[n % sessions]
+        student_id = student_ids[n // sessions]
+        rows.append({
+            "timetable_id": timetable.id,
+            "student_id": student_id,
+            "enrollment_id": enrollment_ids[student_id],
+            "teacher_id": teacher.id,
+            "division_id": division.id,
+            "marked_at": morning + timedelta(seconds=n, microseconds=n % 1000),
+            "session_date": morning.date(),
+            "status": STATUSES[n % len(STATUSES)],
+            "device_info": "Mozilla/5.0 (Linux; Android 14)",
+        })
+    db.execute(insert(AttendanceRecord), rows)
+    db.commit()
+
+
+def _legacy_body(records: list[dict]) -> dict:
+    present = [r for r in records if r["status"] in (AttendanceStatus.PRESENT, "present")]
+    late = [r for r in records if r["status"] in (AttendanceStatus.LATE, "late")]
+    return success_response({
+        "date": date.today().isoformat(),
+        "total": len(records),
+        "present_count": len(present),
+        "absent_count": len(records) - len(present) - len(late),
+        "late_count": len(late),
+        "items": present + late,
+        "all_records": records,
+    })
+
+
+def _orm_rows(db) -> list[dict]:
+    records = (
+        db.query(AttendanceRecord)
+        .options(
+            joinedload(AttendanceRecord.student),
+            joinedload(AttendanceRecord.timetable).joinedload(Timetable.subject),
+        )
+        .order_by(AttendanceRecord.marked_at.desc())
+        .all()
+    )
+    rows = []
+    for r in records:
+        row = _serialize_record(r, include_timetable=True)
+        row["student"] = {
+            "id": r.student.id,
+            "first_name": r.student.first_name,
+            "last_name": r.student.last_name,
+            "enrollment_no": None,
+            "email": r.student.email,
+        }
+        rows.append(row)
+    return rows
+
+
+def _projection_rows(db) -> list[dict]:
+    query = _records_with_student(db).order_by(AttendanceRecord.marked_at.desc())
+    return RECORD_WITH_STUDENT_COLUMNS.all(query)
+
+
+def _orm_encode(body: dict) -> bytes:
+    return json.dumps(jsonable_encoder(body), separators=(",", ":")).encode()
+
+
+def _projection_encode(body: dict) -> bytes:
+    return FastJSONResponse(body).body
+
+
+PATHS = {
+    "orm": (_orm_rows, _orm_encode),
+    "projection": (_projection_rows, _projection_encode),
+}
+
+
+def _run(Session, fetch, encode) -> tuple[float, float, int]:
+    db = Session()
+    try:
+        started = time.perf_counter()
+        body = _legacy_body(fetch(db))
+        built = time.perf_counter()
+        size = len(encode(body))
+        return built - started, time.perf_counter() - built, size
+    finally:
+        db.close()
+
+
+def _median_ms(timings: list[float]) -> float:
+    return statistics.median(timings) * 1000
+
+
+def _time_views(Session, repeat: int, records: int) -> None:
+    admin = CurrentUser(
+        id=0, role=UserRole.ADMIN, branch_id=None, is_active=True, username="admin", first_name=None, last_name=None
+    )
+    print(f"\n{'view':<12}{'total ms':>10}{'records/s':>12}{'bytes':>10}")
+    for view in ("full", "compact", "summary"):
+        timings, size = [], 0
+        for _ in range(repeat):
+            with Session() as db:
+                started = time.perf_counter()
+                size = len(get_today_attendance(view=view, group_by="session", current_user=admin, db=db).body)
+                timings.append(time.perf_counter() - started)
+        total_ms = _median_ms(timings)
+        print(f"{view:<12}{total_ms:>10.1f}{records / (total_ms / 1000):>12,.0f}{size:>10,}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        _seed(db, args.records, args.sessions)
+
+    documents = {}
+    for name, (fetch, encode) in PATHS.items():
+        with Session() as db:
+            documents[name] = json.loads(encode(_legacy_body(fetch(db))))
+    if documents["orm"] != documents["projection"]:
+        raise SystemExit("the two paths produced different documents")
+
+    print(f"{args.records} records, median of {args.repeat} runs")
+    print(f"{'path':<12}{'rows ms':>10}{'encode ms':>11}{'total ms':>10}{'records/s':>12}{'bytes':>10}")
+    for name, (fetch, encode) in PATHS.items():
+        runs = [_run(Session, fetch, encode) for _ in range(args.repeat)]
+        rows_ms = statistics.median(r[0] for r in runs) * 1000
+        encode_ms = statistics.median(r[1] for r in runs) * 1000
+        total_ms = statistics.median(r[0] + r[1] for r in runs) * 1000
+        print(
+            f"{name:<12}{rows_ms:>10.1f}{encode_ms:>11.1f}{total_ms:>10.1f}"
+            f"{args.records / (total_ms / 1000):>12,.0f}{runs[0][2]:>10,}"
+        )
+    _time_views(Session, args.repeat, args.records)
+
+
+if __name__ == "__main__":
+    main()
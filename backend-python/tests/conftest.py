@@ -1,12 +1,24 @@
+import os
+from contextlib import contextmanager
 from datetime import date, datetime, time, timedelta, timezone
 
+# Hash inline in tests so monkeypatched password contexts are honoured.
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+# Any relationship a serializer reads must be loaded by the endpoint's query.
+os.environ.setdefault("DB_STRICT_LOADING", "true")
+
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.core.dependencies import get_db
+from app.core.dependencies import get_db, get_read_db
+from app.core.idempotency import idempotency_store
+from app.core.principal_cache import principal_cache
+from app.core.query_profiler import count_queries
+from app.core.rate_limit import rate_limiter
 from app.database.batches import Batch
 from app.database.branches import Branch
 from app.database.courses import Course
@@ -24,6 +36,11 @@ from app.database.timetables import DayOfWeek, LectureType, Timetable
 from app.database.subjects import Subject
 from app.database.user import User, UserRole
 from app.main import app
+from app.security.login_throttle import login_throttle
+from app.security.refresh_tokens import refresh_tokens
+from app.security.token_revocation import token_revocation
+from app.services.active_sessions import active_session_index
+from app.services.geofence import geofence_index
 from app.security.jwt_token import create_access_token
 from app.security.password import hash_password
 
@@ -41,6 +58,14 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
+    active_session_index.invalidate()
+    geofence_index.invalidate()
+    principal_cache.clear()
+    token_revocation.clear()
+    refresh_tokens.clear()
+    login_throttle.clear()
+    rate_limiter.clear()
+    idempotency_store.clear()
     session = TestingSessionLocal()
     try:
         yield session
@@ -51,15 +76,44 @@ def db():
 
 @pytest.fixture(scope="function")
 def client(db):
+    # Each request gets its own session, as in production, so relationships
+    # are not served from the fixtures' identity map and strict loading
+    # catches anything the endpoint did not load itself.
     def override_get_db():
-        yield db
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+        db.expire_all()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def max_queries():
+    """Fail the test if the block runs more than ``limit`` SQL statements.
+
+        with max_queries(3):
+            client.get("/api/v1/timetables", headers=...)
+    """
+
+    @contextmanager
+    def _limit(limit: int):
+        with count_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"Expected at most {limit} queries, ran {stats.count}:\n"
+            + "\n".join(stats.statements)
+        )
+
+    return _limit
+
+
 @pytest.fixture
 def admin_user(db):
     user = User(
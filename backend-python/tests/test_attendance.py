@@ -268,3 +268,352 @@ def test_list_all_attendance_non_admin_forbidden(client, student_token):
     )
     
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_mark_attendance_outside_session_window(
+    client, student_token, timetable, valid_qr_code, enrollment, db, monkeypatch
+):
+    """Codes are rejected outside the scheduled slot when the window is enforced."""
+    from app.core.config import settings
+    from app.services.active_sessions import WEEKDAYS, active_session_index, campus_now
+
+    monkeypatch.setattr(settings, "ENFORCE_SESSION_WINDOW", True)
+    timetable.day_of_week = WEEKDAYS[(campus_now().weekday() + 1) % 7]
+    db.commit()
+    active_session_index.invalidate()
+
+    response = client.post(
+        "/api/v1/attendance/mark",
+        headers={"Authorization": f"Bearer {student_token}"},
+        json={
+            "timetable_id": timetable.id,
+            "method": "qr",
+            "code": valid_qr_code.code,
+            "latitude": 12.9716,
+            "longitude": 77.5946,
+        }
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_mark_absent_students(
+    client, teacher_token, timetable, enrollment, db
+):
+    """Enrolled students without a record are marked absent exactly once."""
+    from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+
+    response = client.post(
+        f"/api/v1/attendance/mark-absent/{timetable.id}",
+        headers={"Authorization": f"Bearer {teacher_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert data["marked_absent"] == 1
+    assert data["total_enrolled"] == 1
+
+    repeat = client.post(
+        f"/api/v1/attendance/mark-absent/{timetable.id}",
+        headers={"Authorization": f"Bearer {teacher_token}"},
+    )
+    assert repeat.json()["data"]["marked_absent"] == 0
+    assert repeat.json()["data"]["skipped_already_marked"] == 1
+
+    records = db.query(AttendanceRecord).filter(AttendanceRecord.timetable_id == timetable.id).all()
+    assert [r.status for r in records] == [AttendanceStatus.ABSENT]
+
+
+def test_close_recently_ended_sessions(db, timetable, enrollment, valid_qr_code):
+    """Sessions whose end_time fell inside the window are closed in one pass."""
+    from datetime import timedelta
+    from app.services.active_sessions import WEEKDAYS, campus_now
+    from app.services.attendance_closing import close_recently_ended_sessions
+
+    now = campus_now().replace(hour=10, minute=5)
+    timetable.day_of_week = WEEKDAYS[now.weekday()]
+    db.commit()
+
+    result = close_recently_ended_sessions(db, within_minutes=10, now=now)
+    db.commit()
+    assert result["timetable_ids"] == [timetable.id]
+    assert result["marked_absent"] == 1
+
+    later = close_recently_ended_sessions(db, within_minutes=10, now=now + timedelta(minutes=30))
+    assert later["sessions_closed"] == 0
+
+
+def test_sessions_that_did_not_run_are_not_closed(db, timetable, enrollment):
+    """A slot with no code issued and no marks (holiday, cancelled lecture)
+    is left open rather than turning the division absent."""
+    from app.database.attendance_records import AttendanceRecord
+    from app.services.active_sessions import WEEKDAYS, campus_now
+    from app.services.attendance_closing import close_recently_ended_sessions
+
+    now = campus_now().replace(hour=10, minute=5)
+    timetable.day_of_week = WEEKDAYS[now.weekday()]
+    db.commit()
+
+    result = close_recently_ended_sessions(db, within_minutes=10, now=now)
+    assert result["sessions_closed"] == 0
+    assert db.query(AttendanceRecord).count() == 0
+
+
+def test_session_auto_closer_run_once(db, timetable, enrollment, valid_qr_code):
+    """The background sweep closes sessions that ended since its last run."""
+    import asyncio
+    from app.services.active_sessions import WEEKDAYS, campus_now
+    from sqlalchemy.orm import sessionmaker
+    from app.services.session_closer import SessionAutoCloser
+
+    now = campus_now().replace(hour=10, minute=7)
+    timetable.day_of_week = WEEKDAYS[now.weekday()]
+    db.commit()
+
+    closer = SessionAutoCloser(
+        session_factory=sessionmaker(bind=db.get_bind()),
+        grace_minutes=5,
+        max_sleep_seconds=300,
+        batch_size=10,
+        max_concurrency=1,
+        time_budget_seconds=30,
+    )
+    result = asyncio.run(closer.run_once(now=now))
+
+    assert result == {"sessions_closed": 1, "marked_absent": 1, "backlog": 0}
+    assert closer.metrics["runs"] == 1
+    assert closer.metrics["students_marked_absent"] == 1
+
+
+def _auto_closer(db):
+    from sqlalchemy.orm import sessionmaker
+    from app.services.session_closer import SessionAutoCloser
+
+    return SessionAutoCloser(
+        session_factory=sessionmaker(bind=db.get_bind()),
+        grace_minutes=5,
+        max_sleep_seconds=300,
+        batch_size=10,
+        max_concurrency=1,
+        time_budget_seconds=30,
+    )
+
+
+def test_session_auto_closer_sweeps_when_redis_is_down_but_not_when_locked(
+    db, timetable, enrollment, valid_qr_code, monkeypatch
+):
+    import asyncio
+    from app.core.redis_service import RedisService
+    from app.services.active_sessions import WEEKDAYS, campus_now
+
+    now = campus_now().replace(hour=10, minute=7)
+    timetable.day_of_week = WEEKDAYS[now.weekday()]
+    db.commit()
+    monkeypatch.setattr(RedisService, "is_configured", property(lambda self: True))
+
+    monkeypatch.setattr(RedisService, "set_if_absent", lambda self, *args: False)
+    locked = _auto_closer(db)
+    assert asyncio.run(locked.run_once(now=now)) == {"skipped": True}
+    assert locked._swept_until is None
+
+    monkeypatch.setattr(RedisService, "set_if_absent", lambda self, *args: None)
+    result = asyncio.run(_auto_closer(db).run_once(now=now))
+    assert result["sessions_closed"] == 1
+
+
+def test_session_auto_closer_covers_sessions_ending_before_midnight(db, timetable, enrollment, valid_qr_code):
+    import asyncio
+    from datetime import time, timedelta
+    from app.database.attendance_records import AttendanceRecord
+    from app.services.active_sessions import WEEKDAYS, campus_now
+
+    before_midnight = campus_now().replace(hour=23, minute=50, second=0, microsecond=0)
+    timetable.day_of_week = WEEKDAYS[before_midnight.weekday()]
+    timetable.start_time = time(23, 0)
+    timetable.end_time = time(23, 55)
+    db.commit()
+
+    closer = _auto_closer(db)
+    closer._swept_until = before_midnight - timedelta(minutes=5)
+    result = asyncio.run(closer.run_once(now=before_midnight + timedelta(minutes=20)))
+
+    assert result["sessions_closed"] == 1
+    record = db.query(AttendanceRecord).one()
+    assert record.session_date == before_midnight.date()
+
+
+def test_mark_attendance_replays_idempotent_retry(
+    client, student_token, timetable, valid_qr_code, enrollment, db
+):
+    """A retry with the same Idempotency-Key gets the original response."""
+    request = dict(
+        headers={"Authorization": f"Bearer {student_token}", "Idempotency-Key": "retry-1"},
+        json={
+            "timetable_id": timetable.id,
+            "method": "qr",
+            "code": valid_qr_code.code,
+            "latitude": 12.9716,
+            "longitude": 77.5946,
+        },
+    )
+    first = client.post("/api/v1/attendance/mark", **request)
+    retry = client.post("/api/v1/attendance/mark", **request)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert retry.status_code == status.HTTP_200_OK
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+
+    db.refresh(valid_qr_code)
+    assert valid_qr_code.used_count == 1
+
+    other_key = dict(request, headers={**request["headers"], "Idempotency-Key": "retry-2"})
+    assert client.post("/api/v1/attendance/mark", **other_key).status_code == status.HTTP_409_CONFLICT
+
+
+def test_session_day_is_unique_and_absentee_sweep_skips_marked(
+    client, student_token, timetable, valid_qr_code, enrollment, db
+):
+    from app.database.attendance_records import AttendanceRecord, campus_date
+    from app.services.attendance_closing import mark_session_absentees
+
+    response = client.post(
+        "/api/v1/attendance/mark",
+        headers={"Authorization": f"Bearer {student_token}"},
+        json={
+            "timetable_id": timetable.id,
+            "method": "qr",
+            "code": valid_qr_code.code,
+            "latitude": 12.9716,
+            "longitude": 77.5946,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    record = db.query(AttendanceRecord).one()
+    assert record.session_date == campus_date(record.marked_at)
+
+    result = mark_session_absentees(db, timetable, record.session_date)
+    db.commit()
+    assert result["marked_absent"] == 0
+    assert db.query(AttendanceRecord).count() == 1
+
+
+def test_list_all_attendance_cursor_pages(client, admin_token, db, timetable, enrollment, student_user, teacher_user):
+    from datetime import timedelta
+
+    from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+
+    start = datetime(2026, 3, 2, 9, 0)
+    for day in range(3):
+        db.add(AttendanceRecord(
+            timetable_id=timetable.id,
+            student_id=student_user.id,
+            enrollment_id=enrollment.id,
+            teacher_id=teacher_user.id,
+            division_id=timetable.division_id,
+            marked_at=start + timedelta(days=day),
+            status=AttendanceStatus.PRESENT,
+        ))
+    db.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    first = client.get("/api/v1/attendance", params={"limit": 2}, headers=headers).json()["data"]
+    second = client.get(
+        "/api/v1/attendance", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers
+    ).json()["data"]
+
+    assert first["total"] == 3
+    assert [r["marked_at"][:10] for r in first["items"]] == ["2026-03-04", "2026-03-03"]
+    assert [r["marked_at"][:10] for r in second["items"]] == ["2026-03-02"]
+    assert second["has_more"] is False
+
+
+def test_today_attendance_rows_match_record_serializer(
+    client, teacher_token, db, timetable, enrollment, student_user, teacher_user
+):
+    from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+    from app.routers.attendance import _serialize_record
+
+    record = AttendanceRecord(
+        timetable_id=timetable.id,
+        student_id=student_user.id,
+        enrollment_id=enrollment.id,
+        teacher_id=teacher_user.id,
+        division_id=timetable.division_id,
+        marked_at=datetime.now().replace(microsecond=120),
+        status=AttendanceStatus.LATE,
+        device_info="pixel",
+    )
+    db.add(record)
+    db.commit()
+
+    response = client.get("/api/v1/attendance/today", headers={"Authorization": f"Bearer {teacher_token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert (data["total"], data["present_count"], data["late_count"]) == (1, 0, 1)
+    assert data["late_ids"] == [record.id]
+    row = data["records"][0]
+    assert row["student"] == {
+        "id": student_user.id,
+        "first_name": student_user.first_name,
+        "last_name": student_user.last_name,
+        "enrollment_no": None,
+        "email": student_user.email,
+    }
+    expected = _serialize_record(db.get(AttendanceRecord, record.id), include_timetable=True)
+    assert {key: value for key, value in row.items() if key != "student"} == expected
+
+
+def test_today_attendance_views_and_groups(
+    client, admin_token, db, timetable, enrollment, student_user, teacher_user
+):
+    from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+    from app.database.user import User, UserRole
+
+    records = []
+    for number, status_ in enumerate([AttendanceStatus.PRESENT, AttendanceStatus.ABSENT, AttendanceStatus.PRESENT]):
+        other = User(
+            email=f"s{number}@test.com", username=f"s{number}", password_hash="x", role=UserRole.STUDENT
+        )
+        db.add(other)
+        db.flush()
+        records.append(AttendanceRecord(
+            timetable_id=timetable.id,
+            student_id=other.id,
+            enrollment_id=enrollment.id,
+            teacher_id=teacher_user.id,
+            division_id=timetable.division_id,
+            marked_at=datetime.now().replace(second=number),
+            status=status_,
+        ))
+    db.add_all(records)
+    db.commit()
+    present_ids = sorted(r.id for r in records if r.status == AttendanceStatus.PRESENT)
+
+    def today(**params):
+        response = client.get(
+            "/api/v1/attendance/today", params=params, headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()["data"]
+
+    full = today()
+    assert [r["id"] for r in full["records"]] == [r.id for r in reversed(records)]
+    assert sorted(full["present_ids"]) == present_ids
+    assert sorted(r["id"] for r in full["items"]) == present_ids
+
+    compact = today(view="compact", group_by="teacher")
+    assert "records" not in compact and "items" not in compact
+    assert compact["absent_ids"] == [records[1].id]
+    (group,) = compact["groups"]
+    assert group["teacher_id"] == teacher_user.id
+    assert sorted(group["present_ids"]) == present_ids
+
+    summary = today(view="summary", group_by="session")
+    assert (summary["total"], summary["present_count"], summary["absent_count"]) == (3, 2, 1)
+    assert "present_ids" not in summary
+    assert summary["groups"] == [
+        {"timetable_id": timetable.id, "total": 3, "present_count": 2, "absent_count": 1, "late_count": 0}
+    ]
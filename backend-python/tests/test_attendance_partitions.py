@@ -0,0 +1,105 @@
+# tests/test_attendance_partitions.py
+# Partition maintenance helpers and the marked_at bounds on read paths.
+
+import contextlib
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+from app.services import attendance_partitions
+from app.services.attendance_partitions import (
+    academic_year_bounds,
+    add_months,
+    archive_academic_year,
+    ensure_partitions,
+    partition_name,
+)
+
+
+def test_month_arithmetic_and_names():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "attendance_records_y2026m03"
+
+
+def test_academic_year_bounds(monkeypatch):
+    monkeypatch.setattr(attendance_partitions.settings, "ACADEMIC_YEAR_START_MONTH", 7)
+    assert academic_year_bounds("2024-2025") == (date(2024, 7, 1), date(2025, 7, 1))
+    with pytest.raises(ValueError):
+        academic_year_bounds("2024-2026")
+
+
+def test_partition_maintenance_is_a_noop_on_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}")
+    with engine.begin() as conn:
+        assert ensure_partitions(conn) == []
+        assert archive_academic_year(conn, "2020-2021") == []
+    engine.dispose()
+
+
+def test_one_failing_month_does_not_block_the_others(monkeypatch):
+    class FakeConnection:
+        savepoints = 0
+
+        def execute(self, *args, **kwargs):
+            return None
+
+        @contextlib.contextmanager
+        def begin_nested(self):
+            self.savepoints += 1
+            yield
+
+    def create_partition(conn, month):
+        if month == date(2026, 4, 1):
+            raise RuntimeError("default partition holds rows for this month")
+
+    monkeypatch.setattr(attendance_partitions, "is_partitioned", lambda conn: True)
+    monkeypatch.setattr(attendance_partitions, "list_partitions", lambda conn: [date(2026, 3, 1)])
+    monkeypatch.setattr(attendance_partitions, "create_partition", create_partition)
+    conn = FakeConnection()
+
+    created = ensure_partitions(conn, months_ahead=3, today=date(2026, 3, 15))
+
+    assert created == ["attendance_records_y2026m05", "attendance_records_y2026m06"]
+    assert conn.savepoints == 3
+
+
+def test_archive_refuses_an_open_year():
+    this_year = datetime.now(timezone.utc).year
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn, pytest.raises(ValueError):
+        archive_academic_year(conn, f"{this_year}-{this_year + 1}")
+
+
+def test_history_defaults_to_lookback_window(
+    client, db, student_token, student_user, teacher_user, timetable, enrollment, monkeypatch
+):
+    monkeypatch.setattr(attendance_partitions.settings, "ATTENDANCE_HISTORY_LOOKBACK_DAYS", 30)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for marked_at in (now, now - timedelta(days=90)):
+        db.add(AttendanceRecord(
+            timetable_id=timetable.id,
+            student_id=student_user.id,
+            enrollment_id=enrollment.id,
+            teacher_id=teacher_user.id,
+            division_id=timetable.division_id,
+            marked_at=marked_at,
+            status=AttendanceStatus.PRESENT,
+        ))
+    db.commit()
+    headers = {"Authorization": f"Bearer {student_token}"}
+
+    recent = client.get(f"/api/v1/attendance/history/{student_user.id}", headers=headers)
+    full = client.get(
+        f"/api/v1/attendance/history/{student_user.id}",
+        params={"start_date": (now - timedelta(days=120)).date().isoformat()},
+        headers=headers,
+    )
+
+    assert recent.json()["data"]["total"] == 1
+    assert recent.json()["data"]["lookback_days"] == 30
+    assert recent.json()["data"]["start_date"] == (date.today() - timedelta(days=30)).isoformat()
+    assert full.json()["data"]["total"] == 2
+    assert full.json()["data"]["lookback_days"] is None
@@ -105,3 +105,283 @@ def test_is_admin_endpoint_non_admin(client, student_token):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert data.get("data", {}).get("is_admin") is False
+
+
+def test_login_token_carries_role_claims(client, teacher_user):
+    """Access tokens embed role, branch and token version."""
+    from app.security.jwt_token import decode_token
+
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"username": "teacher", "password": "teacher123"},
+    )
+
+    claims = decode_token(response.json()["data"]["access_token"])
+    assert claims["role"] == "TEACHER"
+    assert claims["ver"] == 0
+    assert "branch_id" in claims
+
+
+def test_role_claim_rejects_without_user_lookup(client):
+    """A role claim outside the allowed set is refused before the user is loaded."""
+    from app.security.jwt_token import create_access_token
+
+    token = create_access_token({"sub": "999999", "role": "STUDENT", "branch_id": None, "ver": 0})
+    response = client.get(
+        "/api/v1/users",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_demoted_user_token_is_revoked(client, db, admin_token, teacher_user):
+    """Changing a user's role invalidates access tokens issued before the change."""
+    from app.security.jwt_token import access_token_claims, create_access_token
+
+    old_token = create_access_token(access_token_claims(teacher_user))
+    response = client.put(
+        f"/api/v1/users/{teacher_user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"role": "STUDENT"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    revoked = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": f"Bearer {old_token}"},
+    )
+    assert revoked.status_code == status.HTTP_401_UNAUTHORIZED
+
+    db.refresh(teacher_user)
+    fresh_token = create_access_token(access_token_claims(teacher_user))
+    accepted = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": f"Bearer {fresh_token}"},
+    )
+    assert accepted.status_code == status.HTTP_200_OK
+
+
+def test_login_upgrades_deprecated_hash(client, db, student_user, monkeypatch):
+    """A hash in a deprecated scheme is replaced on successful login."""
+    from passlib.context import CryptContext
+
+    import app.security.password as password_module
+
+    legacy_context = CryptContext(schemes=["pbkdf2_sha256", "sha256_crypt"], deprecated="auto")
+    monkeypatch.setattr(password_module, "pwd_context", legacy_context)
+    student_user.password_hash = CryptContext(schemes=["sha256_crypt"]).hash("student123student")
+    db.commit()
+
+    response = client.post(
+        "/api/v1/auth/login", json={"username": "student", "password": "student123"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    db.refresh(student_user)
+    assert student_user.password_hash.startswith("$pbkdf2-sha256$")
+
+
+def test_password_hasher_rejects_when_saturated():
+    """Admission is refused once max_pending jobs are in flight."""
+    from app.security.password import PasswordHasherBusy, PasswordHasherPool
+
+    pool = PasswordHasherPool(workers=0, max_pending=0)
+    with pytest.raises(PasswordHasherBusy):
+        pool.hash_sync("secret", "user")
+    assert pool.metrics()["rejected"] == 1
+
+
+def test_password_hasher_admits_at_most_half_the_threadpool():
+    from app.security.password import PasswordHasherPool
+
+    pool = PasswordHasherPool(workers=0, max_pending=64)
+    pool.limit_to_threads(40)
+    assert pool._max_pending == 20
+    pool.limit_to_threads(100)
+    assert pool._max_pending == 20
+
+
+def test_password_hasher_process_pool_round_trip():
+    """Hashes produced in worker processes verify like inline ones."""
+    from app.security.password import PasswordHasherPool, verify_password
+
+    pool = PasswordHasherPool(workers=1, max_pending=4)
+    try:
+        hashed = pool.hash_sync("secret", "user")
+        verified, upgraded = pool.verify_and_update_sync("secret", hashed, "user")
+        pairs = [("one", "a"), ("two", "b"), ("three", "c")]
+        batch = pool.hash_many_sync(pairs, batch_size=2)
+    finally:
+        pool.shutdown()
+    assert verified is True
+    assert upgraded is None
+    assert all(verify_password(p, h, u) for (p, u), h in zip(pairs, batch))
+    assert pool.metrics()["completed"] == 4
+
+
+def _login_tokens(client, username="student", password="student123"):
+    response = client.post("/api/v1/auth/login", json={"username": username, "password": password})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()["data"]
+
+
+def test_refresh_rotates_and_detects_reuse(client, student_user):
+    """A rotated refresh token cannot be replayed; replay kills the family."""
+    first = _login_tokens(client)["refresh_token"]
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == status.HTTP_200_OK
+    second = response.json()["data"]["refresh_token"]
+    assert second != first
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert replay.status_code == status.HTTP_401_UNAUTHORIZED
+
+    # The legitimate successor is revoked along with the family.
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_access_token_is_not_a_refresh_token(client, student_user):
+    access = _login_tokens(client)["access_token"]
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": access})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def _legacy_token(user, lifetime):
+    """A token as issued before ``typ`` and refresh families existed."""
+    from datetime import datetime, timezone
+    from jose import jwt
+    from app.security.jwt_token import _algorithm, _secret_key
+
+    return jwt.encode(
+        {"sub": str(user.id), "exp": datetime.now(timezone.utc) + lifetime},
+        _secret_key(),
+        algorithm=_algorithm(),
+    )
+
+
+def test_tokens_issued_before_typ_keep_working_until_they_expire(client, student_user):
+    from datetime import timedelta
+
+    access = _legacy_token(student_user, timedelta(minutes=10))
+    refresh = _legacy_token(student_user, timedelta(days=6))
+
+    me = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {access}"})
+    assert me.status_code == status.HTTP_200_OK
+    bearer = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {refresh}"})
+    assert bearer.status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": access})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": refresh})
+    assert response.status_code == status.HTTP_200_OK
+    successor = response.json()["data"]["refresh_token"]
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": successor})
+    assert response.status_code == status.HTTP_200_OK
+
+    client.post(
+        "/api/v1/auth/logout-all",
+        headers={"Authorization": f"Bearer {response.json()['data']['access_token']}"},
+    )
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": refresh})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logout_revokes_refresh_family(client, student_user):
+    tokens = _login_tokens(client)
+    response = client.post(
+        "/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_refresh_token_is_not_a_bearer_token(client, student_user):
+    tokens = _login_tokens(client)
+    client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+
+    response = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logout_all_revokes_every_session(client, student_user):
+    first = _login_tokens(client)
+    second = _login_tokens(client)
+
+    response = client.post(
+        "/api/v1/auth/logout-all",
+        headers={"Authorization": f"Bearer {first['access_token']}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    for tokens in (first, second):
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    fresh = _login_tokens(client)
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": fresh["refresh_token"]})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_login_locks_account_after_repeated_failures(client, student_user, monkeypatch):
+    """Throttled attempts are refused before any password verification."""
+    for _ in range(5):
+        response = client.post(
+            "/api/v1/auth/login", json={"username": "student", "password": "wrongpassword"}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    from app.security.password import password_hasher
+
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("password verified while throttled")
+
+    monkeypatch.setattr(password_hasher, "verify_and_update_sync", fail_if_called)
+    response = client.post(
+        "/api/v1/auth/login", json={"username": "Student", "password": "student123"}
+    )
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_login_success_resets_account_failures(client, student_user):
+    for _ in range(4):
+        client.post("/api/v1/auth/login", json={"username": "student", "password": "wrongpassword"})
+    _login_tokens(client)
+    for _ in range(4):
+        response = client.post(
+            "/api/v1/auth/login", json={"username": "student", "password": "wrongpassword"}
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_ip_limit_counts_every_username_and_prefix_limit_is_extra():
+    """The per-IP budget is shared by all usernames; the optional prefix
+    limit only adds a tighter one for a slice of usernames."""
+    from app.security.login_throttle import LoginThrottle
+
+    throttle = LoginThrottle(
+        window_seconds=900,
+        account_max_failures=50,
+        ip_max_failures=6,
+        base_backoff_seconds=60,
+        max_backoff_seconds=900,
+        ip_prefix_max_failures=3,
+        ip_prefix_chars=3,
+    )
+    for n in range(3):
+        throttle.record_failure(f"stu{n}", "10.0.0.1")
+    assert throttle.retry_after("stuart", "10.0.0.1") > 0
+    assert throttle.retry_after("alice", "10.0.0.1") == 0
+    assert throttle.retry_after("stuart", "10.0.0.2") == 0
+
+    for prefix in ("aaa", "bbb", "ccc"):
+        throttle.record_failure(prefix, "10.0.0.1")
+    assert throttle.retry_after("zed", "10.0.0.1") > 0
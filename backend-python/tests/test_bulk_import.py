@@ -0,0 +1,148 @@
+# tests/test_bulk_import.py
+# Bulk user and enrollment imports from CSV/JSONL uploads.
+
+import json
+
+from app.database.student_enrollments import StudentEnrollment
+from app.database.user import User
+from app.security.password import verify_password
+
+USERS_CSV = (
+    "email,username,first_name,password,role\n"
+    "a1@test.com,a1,Asha,pw-a1,student\n"
+    "a2@test.com,a2,Ravi,pw-a2,\n"
+    "not-an-email,a3,Bad,pw-a3,student\n"
+    "a1@test.com,a4,Dup,pw-a4,student\n"
+    "student@test.com,a5,Taken,pw-a5,student\n"
+)
+
+
+def _upload(client, path, token, name, body, **params):
+    return client.post(
+        path,
+        params=params,
+        files={"file": (name, body.encode(), "text/plain")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_user_import_reports_rows_and_inserts_valid_ones(client, db, admin_token, student_user):
+    response = _upload(client, "/api/v1/users/import", admin_token, "users.csv", USERS_CSV)
+
+    assert response.status_code == 200
+    report = response.json()["data"]
+    assert report["total_rows"] == 5
+    assert report["inserted"] == 2
+    assert {e["row"]: e["errors"][0].split(":")[0] for e in report["errors"]} == {
+        4: "email",
+        5: "email",
+        6: "email",
+    }
+    imported = db.query(User).filter(User.username == "a2").one()
+    assert imported.role.value == "STUDENT"
+    assert verify_password("pw-a2", imported.password_hash, "a2")
+
+
+def test_user_import_dry_run_writes_nothing(client, db, admin_token):
+    response = _upload(client, "/api/v1/users/import", admin_token, "users.csv", USERS_CSV, dry_run=True)
+
+    report = response.json()["data"]
+    assert report["dry_run"] is True
+    assert report["valid_rows"] == 3
+    assert report["inserted"] == 0
+    assert db.query(User).count() == 1
+
+
+def test_user_import_requires_admin(client, student_token):
+    response = _upload(client, "/api/v1/users/import", student_token, "users.csv", USERS_CSV)
+    assert response.status_code == 403
+
+
+def test_unknown_import_format_is_rejected(client, admin_token):
+    response = _upload(client, "/api/v1/users/import", admin_token, "users.xlsx", USERS_CSV)
+    assert response.status_code == 422
+
+
+def test_over_limit_import_writes_nothing(client, db, admin_token, monkeypatch):
+    from app.services import bulk_import
+
+    monkeypatch.setattr(bulk_import.settings, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(bulk_import.settings, "IMPORT_MAX_ROWS", 4)
+    response = _upload(client, "/api/v1/users/import", admin_token, "users.csv", USERS_CSV)
+
+    assert response.status_code == 422
+    assert db.query(User).count() == 1
+
+
+def test_non_utf8_upload_is_a_validation_error(client, db, admin_token):
+    cp1252 = "email,username,first_name,password\nete@test.com,ete,\u00e9t\u00e9,pw-ete\n".encode("cp1252")
+    response = client.post(
+        "/api/v1/users/import",
+        files={"file": ("users.csv", cp1252, "text/csv")},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.status_code == 422
+    assert db.query(User).count() == 1
+
+
+def test_busy_hasher_returns_partial_report(client, db, admin_token, monkeypatch):
+    from app.security.password import PasswordHasherBusy, password_hasher
+    from app.services import bulk_import
+
+    calls = []
+    hash_many_sync = password_hasher.hash_many_sync
+
+    def busy_after_first_chunk(pairs, batch_size=25):
+        calls.append(pairs)
+        if len(calls) > 1:
+            raise PasswordHasherBusy()
+        return hash_many_sync(pairs, batch_size)
+
+    monkeypatch.setattr(bulk_import.settings, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(password_hasher, "hash_many_sync", busy_after_first_chunk)
+    # Chunks: a1+a2 (written), a3+a4 (both invalid), a5 (refused by the hasher).
+    response = _upload(client, "/api/v1/users/import", admin_token, "users.csv", USERS_CSV)
+
+    assert response.status_code == 200
+    report = response.json()["data"]
+    assert report["truncated"] is True
+    assert report["inserted"] == 2
+    assert db.query(User).count() == 3
+
+
+def test_enrollment_import_jsonl_resolves_students(
+    client, db, admin_token, student_user, teacher_user, course, branch, division
+):
+    base = {
+        "course_id": course.id,
+        "branch_id": branch.id,
+        "division_id": division.id,
+        "current_year": "II",
+        "current_semester": 3,
+        "enrollment_date": "2026-07-01",
+        "academic_year": "2026-2027",
+    }
+    lines = [
+        {**base, "student_username": "student", "enrollment_number": "E100"},
+        {**base, "student_username": "teacher", "enrollment_number": "E101"},
+        {**base, "student_id": student_user.id, "enrollment_number": "E102"},
+        {**base, "student_email": "nobody@test.com", "enrollment_number": "E100"},
+        "not an object",
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{broken\n"
+
+    response = _upload(client, "/api/v1/enrollments/import", admin_token, "rows.jsonl", body)
+
+    report = response.json()["data"]
+    assert report["inserted"] == 1
+    errors = {e["row"]: e["errors"] for e in report["errors"]}
+    assert errors[2] == ["student: user is not a student"]
+    assert errors[3] == ["student: duplicated earlier in the file"]
+    assert errors[4] == ["student: not found", "enrollment_number: duplicated earlier in the file"]
+    assert errors[5] == ["row must be an object"]
+    assert errors[6][0].startswith("invalid JSON")
+    enrollment = db.query(StudentEnrollment).one()
+    assert enrollment.student_id == student_user.id
+    assert enrollment.current_year.value == 2
+    assert enrollment.status.value == "active"
@@ -0,0 +1,119 @@
+# tests/test_database.py
+# Engine and pool configuration.
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core import read_replica
+from app.core.config import settings
+from app.core.read_replica import ReplicaHealth
+from app.database import database
+from app.database.courses import Course
+from app.database.database import engine_options, watch_pool_saturation
+
+PG_URL = "postgresql://user:pass@db:5432/smartattendance"
+
+
+def test_postgres_options_carry_timeouts_and_keepalives(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = engine_options(PG_URL, pool_size=7, max_overflow=3)
+
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_timeout"] == settings.DB_POOL_TIMEOUT_SECONDS
+    connect_args = options["connect_args"]
+    assert connect_args["application_name"] == settings.DB_APPLICATION_NAME
+    assert connect_args["keepalives"] == 1
+    assert connect_args["options"] == "-c statement_timeout=5000"
+
+
+def test_pgbouncer_mode_skips_startup_options_and_prepared_statements(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+
+    psycopg2_args = engine_options(
+        "postgresql+psycopg2://user:pass@db/smartattendance", pool_size=5, max_overflow=0
+    )["connect_args"]
+    psycopg3_args = engine_options(
+        "postgresql+psycopg://user:pass@db/smartattendance", pool_size=5, max_overflow=0
+    )["connect_args"]
+
+    assert "options" not in psycopg2_args
+    assert "prepare_threshold" not in psycopg2_args
+    assert psycopg3_args["prepare_threshold"] is None
+
+
+def test_non_postgres_urls_get_no_connect_args():
+    assert "connect_args" not in engine_options("sqlite:////tmp/x.db", pool_size=2, max_overflow=0)
+
+
+def test_pool_saturation_is_logged(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_POOL_SATURATION_LOG_SECONDS", 60)
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=1)
+    watch_pool_saturation(test_engine, "test", max_overflow=1)
+
+    with caplog.at_level(logging.WARNING, logger="smartattendance.db"):
+        first = test_engine.connect()
+        assert not caplog.records
+        second = test_engine.connect()
+        first.close()
+        second.close()
+
+    assert [r.getMessage() for r in caplog.records] == ["db pool saturated"]
+    assert caplog.records[0].checked_out == 2
+    test_engine.dispose()
+
+
+def test_replica_bypassed_when_lagging_or_unreachable():
+    lags = iter([2.0, 30.0, RuntimeError("down"), None])
+
+    def probe():
+        value = next(lags)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    health = ReplicaHealth(probe=probe, check_interval=0, max_lag=10)
+
+    assert health.usable() is True
+    assert health.usable() is False
+    assert health.usable() is False
+    assert health.usable() is False
+
+
+def test_replica_probe_is_cached_between_checks():
+    calls = []
+    health = ReplicaHealth(probe=lambda: calls.append(1) or 0.0, check_interval=60, max_lag=10)
+
+    assert health.usable() and health.usable()
+    assert len(calls) == 1
+    health.mark_unhealthy()
+    assert health.usable() is False
+    assert len(calls) == 1
+
+
+def test_read_session_falls_back_to_primary(monkeypatch):
+    replica_sessions = []
+    monkeypatch.setattr(database, "ReadSessionLocal", lambda: replica_sessions.append(1))
+    monkeypatch.setattr(read_replica.replica_health, "usable", lambda: False)
+
+    session = read_replica.open_read_session()
+    try:
+        assert session.get_bind() is database.engine
+        assert not replica_sessions
+    finally:
+        session.close()
+
+
+def test_read_session_refuses_writes(monkeypatch):
+    monkeypatch.setattr(database, "ReadSessionLocal", None)
+    session = read_replica.open_read_session()
+    session.add(Course(name="Physics", code="PHY", duration_years=3))
+    try:
+        with pytest.raises(read_replica.ReadOnlySessionError):
+            session.flush()
+    finally:
+        session.close()
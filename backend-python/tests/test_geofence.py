@@ -0,0 +1,144 @@
+# tests/test_geofence.py
+# Compiled geofences, the grid index over locations and batch verification.
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.database.audit_log import AuditLog
+from app.core.redis_service import RedisService, redis_service
+from app.services import geofence
+from app.services.geofence import Geofence, GeofenceIndex, audit_marks, verify_batch
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin(math.radians(lat2 - lat1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 6_371_000 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_fast_path_agrees_with_haversine_near_the_edge():
+    rng = random.Random(7)
+    for centre_lat, centre_lon, radius in [(12.9716, 77.5946, 100), (59.33, 18.06, 40), (-33.86, 151.2, 2500)]:
+        fence = Geofence.compile(1, "room", centre_lat, centre_lon, radius)
+        reach = math.degrees(radius * 1.2 / 6_371_000)
+        for _ in range(2000):
+            lat = centre_lat + rng.uniform(-reach, reach)
+            lon = centre_lon + rng.uniform(-reach, reach) / math.cos(math.radians(centre_lat))
+            assert fence.contains(lat, lon) == (_haversine(lat, lon, centre_lat, centre_lon) <= radius)
+
+
+def test_batch_verification_matches_single_checks():
+    fences = {
+        1: Geofence.compile(1, "a", 12.9716, 77.5946, 100),
+        2: Geofence.compile(2, "b", 12.9800, 77.6000, 30),
+    }
+    rng = random.Random(3)
+    location_ids = [rng.choice([1, 2, 3]) for _ in range(500)] + [1]
+    latitudes = [12.975 + rng.uniform(-0.01, 0.01) for _ in range(500)] + [None]
+    longitudes = [77.597 + rng.uniform(-0.01, 0.01) for _ in range(500)] + [77.5946]
+
+    results = verify_batch(fences, location_ids, latitudes, longitudes)
+
+    for location_id, lat, lon, inside in zip(location_ids, latitudes, longitudes, results):
+        expected = fences[location_id].contains(lat, lon) if location_id in fences and lat is not None else None
+        assert inside is expected
+
+
+def test_validate_point_uses_index_rebuilt_on_location_writes(client, admin_token, location):
+    response = client.get("/api/v1/locations/validate-point", params={"lat": 12.9717, "lon": 77.5946})
+    assert response.status_code == 200
+    (match,) = response.json()["data"]["locations"]
+    assert match["id"] == location.id
+    assert 11 < match["distance_meters"] < 12
+
+    moved = client.put(
+        f"/api/v1/locations/{location.id}", json={"latitude": 13.5}, headers=_auth(admin_token)
+    )
+    assert moved.status_code == 200
+    response = client.get("/api/v1/locations/validate-point", params={"lat": 12.9717, "lon": 77.5946})
+    assert response.json()["data"] == {"valid": False, "locations": []}
+
+    created = client.post(
+        "/api/v1/locations",
+        json={"name": "Annex", "latitude": 12.9717, "longitude": 77.5947, "radius": 50},
+        headers=_auth(admin_token),
+    )
+    assert created.status_code == 200
+    response = client.get("/api/v1/locations/validate-point", params={"lat": 12.9717, "lon": 77.5946})
+    assert [m["name"] for m in response.json()["data"]["locations"]] == ["Annex"]
+
+
+def test_location_edit_reaches_other_workers_through_redis(db, location, monkeypatch):
+    class FakeRedis:
+        values = {}
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def incr(self, key):
+            self.values[key] = str(int(self.values.get(key, 0)) + 1)
+
+    monkeypatch.setattr(RedisService, "is_configured", property(lambda self: True))
+    monkeypatch.setattr(redis_service, "_client", FakeRedis())
+    monkeypatch.setattr(geofence, "VERSION_CHECK_SECONDS", 0)
+    editor, other = GeofenceIndex(3600, 0.01), GeofenceIndex(3600, 0.01)
+    assert other.get(db, location.id).radius == location.radius
+
+    location.radius = 5
+    db.commit()
+    editor.invalidate()
+
+    assert other.get(db, location.id).radius == 5
+
+
+def test_audit_reports_logged_marks_outside_their_fence(db, location):
+    logged_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    for entity_id, details in [
+        ("1", {"location_id": location.id, "distance_m": 0.0, "inside": True}),
+        ("2", {"location_id": location.id, "distance_m": 2049.6, "inside": True}),
+        ("3", {"location_id": location.id, "distance_m": None, "inside": None}),
+        ("4", {"timetable_id": 1, "method": "qr"}),
+    ]:
+        db.add(AuditLog(
+            action="ATTENDANCE_MARKED",
+            entity_type="attendance_record",
+            entity_id=entity_id,
+            details=details,
+            created_at=logged_at,
+        ))
+    db.commit()
+
+    report = audit_marks(db, logged_at - timedelta(minutes=1))
+
+    assert (report["checked"], report["inside"], report["outside"], report["unverifiable"]) == (4, 1, 1, 2)
+    assert report["outside_record_ids"] == ["2"]
+
+
+def test_mark_audit_keeps_the_distance_not_the_coordinates(
+    client, db, student_token, timetable, valid_qr_code, enrollment
+):
+    response = client.post(
+        "/api/v1/attendance/mark",
+        headers=_auth(student_token),
+        json={
+            "timetable_id": timetable.id,
+            "method": "qr",
+            "code": valid_qr_code.code,
+            "latitude": 12.9717,
+            "longitude": 77.5946,
+        },
+    )
+    assert response.status_code == 200
+
+    details = db.query(AuditLog.details).filter(AuditLog.action == "ATTENDANCE_MARKED").scalar()
+    assert "latitude" not in details and "longitude" not in details
+    assert details["inside"] is True
+    assert 10 < details["distance_m"] < 12
@@ -0,0 +1,102 @@
+# tests/test_list_endpoints.py
+# Shared paging, sorting, filtering and field projection on CRUD lists.
+
+from datetime import datetime, timedelta, timezone
+
+from app.database.batches import Batch
+from app.database.qr_codes import QRCode
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _batches(db, division, count):
+    for number in range(1, count + 1):
+        db.add(Batch(
+            division_id=division.id,
+            name=f"B{number:02d}",
+            batch_number=number,
+            semester=1,
+            academic_year="2025-2026",
+        ))
+    db.commit()
+
+
+def test_list_is_paged_by_cursor(client, db, division):
+    _batches(db, division, 5)
+
+    first = client.get("/api/v1/batches", params={"limit": 2}).json()
+    assert [b["name"] for b in first["data"]] == ["B01", "B02"]
+    assert first["meta"]["has_more"] is True
+    assert first["meta"]["total"] is None
+
+    rest = client.get("/api/v1/batches", params={"limit": 3, "cursor": first["meta"]["next_cursor"]}).json()
+    assert [b["name"] for b in rest["data"]] == ["B03", "B04", "B05"]
+    assert rest["meta"]["has_more"] is False
+
+
+def test_list_sort_fields_and_total(client, db, division):
+    _batches(db, division, 3)
+
+    response = client.get(
+        "/api/v1/batches",
+        params={"sort": "-name", "fields": "id,name", "include_total": "exact", "limit": 2},
+    ).json()
+
+    assert [set(b) for b in response["data"]] == [{"id", "name"}, {"id", "name"}]
+    assert [b["name"] for b in response["data"]] == ["B03", "B02"]
+    assert response["meta"]["total"] == 3
+
+
+def test_list_rejects_unknown_sort_fields_and_large_limits(client, db, division):
+    _batches(db, division, 1)
+
+    assert client.get("/api/v1/batches", params={"sort": "semester"}).status_code == 422
+    assert client.get("/api/v1/batches", params={"fields": "id,secret"}).status_code == 422
+    assert client.get("/api/v1/batches", params={"limit": 10_000}).status_code == 422
+
+
+def test_user_list_filters_by_role_and_search(client, admin_token, admin_user, teacher_user, student_user):
+    students = client.get("/api/v1/users", params={"role": "student"}, headers=_auth(admin_token)).json()
+    assert [u["username"] for u in students["data"]] == ["student"]
+
+    found = client.get("/api/v1/users", params={"search": "TEACH"}, headers=_auth(admin_token)).json()
+    assert [u["username"] for u in found["data"]] == ["teacher"]
+
+
+def test_code_lists_are_not_public(client, db, timetable, teacher_token, student_token):
+    from app.database.user import User, UserRole
+    from app.security.jwt_token import create_access_token
+
+    other = User(email="other@test.com", username="other", password_hash="x", role=UserRole.TEACHER)
+    db.add(other)
+    db.commit()
+    other_token = create_access_token({"sub": str(other.id)})
+    path = "/api/v1/codes/otp"
+    params = {"timetable_id": timetable.id, "sort": "-created_at", "limit": 1}
+
+    assert client.get(path, params=params).status_code == 401
+    assert client.get(path, params=params, headers=_auth(student_token)).status_code == 403
+    assert client.get(path, params=params, headers=_auth(other_token)).status_code == 403
+    assert client.get(path, headers=_auth(teacher_token)).status_code == 403
+    assert client.get(path, params=params, headers=_auth(teacher_token)).status_code == 200
+
+
+def test_qr_codes_are_listed_newest_first(client, db, timetable, teacher_token):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for minutes in (3, 1, 2):
+        db.add(QRCode(
+            timetable_id=timetable.id,
+            code=f"code-{minutes}",
+            created_at=now - timedelta(minutes=minutes),
+            expires_at=now + timedelta(minutes=5),
+        ))
+    db.commit()
+
+    response = client.get(
+        f"/api/v1/codes/qr/timetable/{timetable.id}", params={"limit": 2}, headers=_auth(teacher_token)
+    ).json()
+
+    assert [c["code"] for c in response["data"]] == ["code-1", "code-2"]
+    assert response["meta"]["has_more"] is True
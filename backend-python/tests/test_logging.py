@@ -0,0 +1,40 @@
+# tests/test_logging.py
+# Request log sampling tests
+
+import logging
+
+from app.core.logging_setup import RequestLogSampler
+
+
+def _sampler(**overrides):
+    options = dict(slow_ms=500, success_rate=1.0, hot_path_rate=0.0, hot_paths=["/health"])
+    options.update(overrides)
+    return RequestLogSampler(**options)
+
+
+def test_errors_and_slow_requests_are_always_logged():
+    sampler = _sampler()
+
+    assert sampler.level_and_rate("/health", 500, 5) == (logging.ERROR, 1.0)
+    assert sampler.level_and_rate("/health", 200, 750) == (logging.WARNING, 1.0)
+    assert sampler.level_and_rate("/health", 404, 5) == (logging.INFO, 1.0)
+
+
+def test_hot_path_success_is_sampled():
+    sampler = _sampler()
+
+    level, rate = sampler.level_and_rate("/health", 200, 5)
+    assert (level, rate) == (logging.INFO, 0.0)
+    assert not sampler.should_log(rate)
+    assert sampler.level_and_rate("/api/v1/users", 200, 5) == (logging.INFO, 1.0)
+
+
+def test_request_log_carries_structured_fields(client, caplog):
+    with caplog.at_level(logging.INFO, logger="smartattendance.request"):
+        client.get("/")
+
+    records = [r for r in caplog.records if r.name == "smartattendance.request"]
+    assert records
+    assert records[-1].path == "/"
+    assert records[-1].status_code == 200
+    assert records[-1].sample_rate == 1.0
@@ -0,0 +1,56 @@
+# tests/test_metrics.py
+# Prometheus /metrics endpoint tests
+
+from fastapi import status
+
+from app.core.config import settings
+from app.core.metrics import MARK_OUTCOMES, REQUEST_LATENCY
+
+
+def _sample(metric, suffix, **labels):
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name.endswith(suffix) and all(
+                sample.labels.get(key) == value for key, value in labels.items()
+            ):
+                return sample.value
+    return 0.0
+
+
+def test_metrics_endpoint_exposes_request_histogram(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    before = _sample(REQUEST_LATENCY, "_count", method="GET", route="/", status="2xx")
+    client.get("/")
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "http_requests_in_flight" in response.text
+    assert "websocket_connections" in response.text
+    assert "db_pool_checked_out" in response.text
+    assert _sample(REQUEST_LATENCY, "_count", method="GET", route="/", status="2xx") == before + 1
+
+
+def test_metrics_endpoint_is_not_public(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == status.HTTP_403_FORBIDDEN
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == status.HTTP_403_FORBIDDEN
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_mark_outcomes_are_counted_by_reason(
+    client, student_token, timetable, expired_qr_code, enrollment
+):
+    before = _sample(MARK_OUTCOMES, "_total", outcome="expired_code")
+    client.post(
+        "/api/v1/attendance/mark",
+        headers={"Authorization": f"Bearer {student_token}"},
+        json={"timetable_id": timetable.id, "method": "qr", "code": expired_qr_code.code},
+    )
+
+    assert _sample(MARK_OUTCOMES, "_total", outcome="expired_code") == before + 1
@@ -63,3 +63,40 @@ def test_mark_notification_as_read(client, teacher_token, timetable, student_tok
     )
     assert read_response.status_code == status.HTTP_200_OK
     assert read_response.json()["data"]["is_read"] is True
+
+
+def test_notifications_keyset_pages(client, db, teacher_token, teacher_user):
+    from datetime import datetime, timedelta
+
+    from app.database.notifications import Notification
+
+    base = datetime(2026, 1, 1, 9, 0)
+    # Two rows share a timestamp so the id tiebreak is exercised.
+    stamps = [base, base, base + timedelta(minutes=1), base + timedelta(minutes=2), base + timedelta(minutes=3)]
+    for index, stamp in enumerate(stamps):
+        db.add(Notification(user_id=teacher_user.id, title=f"n{index}", message="m", created_at=stamp))
+    db.commit()
+    headers = {"Authorization": f"Bearer {teacher_token}"}
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "include_total": "none"}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/api/v1/notifications", params=params, headers=headers).json()["data"]
+        assert data["total"] is None
+        seen.extend(item["title"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not data["has_more"]:
+            break
+
+    assert seen == ["n4", "n3", "n2", "n1", "n0"]
+
+    legacy = client.get("/api/v1/notifications", params={"page": 2, "limit": 2}, headers=headers).json()["data"]
+    assert [item["title"] for item in legacy["items"]] == ["n2", "n1"]
+    assert legacy["total"] == 5
+    assert legacy["pages"] == 3
+
+    bad = client.get("/api/v1/notifications", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert bad.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,156 @@
+# tests/test_query_budgets.py
+# Query-count budgets for hot endpoints; a new N+1 fails here first.
+
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app.core.principal_cache import principal_cache
+from app.core.query_profiler import redact_parameters
+from app.database.access_points import AccessPoint
+from app.database.attendance_records import AttendanceRecord, AttendanceStatus
+from app.database.batches import Batch
+from app.database.branches import Branch
+from app.database.courses import Course
+from app.database.divisions import Division
+from app.database.locations import Location
+from app.database.notifications import Notification
+from app.database.otp_code import OTPCode
+from app.database.qr_codes import QRCode
+from app.database.student_enrollments import EnrollmentStatus, EnrollmentYear, StudentEnrollment
+from app.database.subjects import Subject
+from app.database.timetables import DayOfWeek, LectureType, Timetable
+from app.database.user import User, UserRole
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("path, budget", [
+    ("/api/v1/auth/me", 2),
+    ("/api/v1/timetables", 4),
+])
+def test_endpoint_query_budget(client, admin_token, timetable, enrollment, max_queries, path, budget):
+    with max_queries(budget):
+        response = client.get(path, headers=_auth(admin_token))
+    assert response.status_code == 200
+
+
+def test_division_list_does_not_grow_with_rows(client, admin_token, branch, division, db, max_queries):
+    for name in ("B", "C", "D"):
+        db.add(Division(
+            name=name, branch_id=branch.id, year=1, semester=1,
+            academic_year="2025-2026", capacity=60,
+        ))
+    db.commit()
+
+    with max_queries(2):
+        response = client.get("/api/v1/divisions", headers=_auth(admin_token))
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 4
+    assert all(d["course_name"] for d in response.json()["data"])
+
+
+def test_server_timing_reports_db_time(client, admin_token):
+    response = client.get("/api/v1/auth/me", headers=_auth(admin_token))
+    timing = response.headers["server-timing"]
+    assert "db;dur=" in timing
+    assert 'desc="' in timing
+    assert "app;dur=" in timing
+
+
+def test_redact_parameters_keeps_types_only():
+    assert redact_parameters({"email": "a@b.c", "id": 4}) == {"email": "str", "id": "int"}
+    assert redact_parameters(("secret", 1.5)) == ["str", "float"]
+    assert redact_parameters([{"a": 1}, {"a": 2}]) == "<2 parameter sets>"
+
+
+def _seed_catalog(db, n: int, teacher, admin) -> None:
+    """One row of everything the list endpoints serve, linked like real data."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    course = Course(name=f"Course {n}", code=f"C{n}", duration_years=4, total_semesters=8, college_code="ENGG")
+    db.add(course)
+    db.flush()
+    branch = Branch(name=f"Branch {n}", code=f"B{n}", branch_code=f"BR{n}", course_id=course.id)
+    location = Location(name=f"Room {n}", latitude=12.97, longitude=77.59, radius=50)
+    student = User(
+        email=f"s{n}@test.com", username=f"s{n}", password_hash="x",
+        first_name="S", last_name=str(n), role=UserRole.STUDENT,
+    )
+    db.add_all([branch, location, student])
+    db.flush()
+    division = Division(name=f"D{n}", branch_id=branch.id, year=1, semester=1, academic_year="2025-2026", capacity=60)
+    subject = Subject(name=f"Subject {n}", code=f"S{n}", course_id=course.id, branch_id=branch.id, semester=1)
+    db.add_all([
+        division,
+        subject,
+        AccessPoint(location_id=location.id, name=f"AP {n}", mac_address=f"00:00:00:00:00:{n:02x}"),
+        Notification(user_id=admin.id, title="t", message="m"),
+    ])
+    db.flush()
+    timetable = Timetable(
+        subject_id=subject.id, teacher_id=teacher.id, division_id=division.id, location_id=location.id,
+        lecture_type=LectureType.THEORY, day_of_week=DayOfWeek.MON, start_time=time(9, 0),
+        end_time=time(10, 0), semester=1, academic_year="2025-2026", is_active=True,
+    )
+    enrollment = StudentEnrollment(
+        student_id=student.id, course_id=course.id, branch_id=branch.id, division_id=division.id,
+        current_year=EnrollmentYear.I, current_semester=1, enrollment_number=f"E{n}",
+        enrollment_date=date.today(), academic_year="2025-2026", status=EnrollmentStatus.ACTIVE,
+    )
+    db.add_all([
+        timetable,
+        enrollment,
+        Batch(name=f"Batch {n}", division_id=division.id, batch_number=1, semester=1, academic_year="2025-2026"),
+    ])
+    db.flush()
+    db.add_all([
+        QRCode(timetable_id=timetable.id, code=f"qr{n}", expires_at=now + timedelta(minutes=5)),
+        OTPCode(timetable_id=timetable.id, code=f"{n:06d}", expires_at=now + timedelta(minutes=5)),
+        AttendanceRecord(
+            timetable_id=timetable.id, student_id=student.id, enrollment_id=enrollment.id,
+            teacher_id=teacher.id, division_id=division.id, location_id=location.id,
+            status=AttendanceStatus.PRESENT,
+        ),
+    ])
+    db.commit()
+
+
+# Every list endpoint, with the queries it may run (including the auth
+# lookup). Each must cost the same with 2 rows as with 6.
+LIST_ENDPOINT_BUDGETS = [
+    ("/api/v1/users", 2),
+    ("/api/v1/enrollments", 1),
+    ("/api/v1/courses", 1),
+    ("/api/v1/branches", 1),
+    ("/api/v1/divisions", 1),
+    ("/api/v1/batches", 1),
+    ("/api/v1/subjects", 2),
+    ("/api/v1/locations", 1),
+    ("/api/v1/access-points", 1),
+    ("/api/v1/timetables", 3),
+    ("/api/v1/codes/qr", 2),
+    ("/api/v1/codes/otp", 2),
+    ("/api/v1/notifications", 3),
+    ("/api/v1/attendance", 3),
+    ("/api/v1/reports/export/csv", 2),
+]
+
+
+@pytest.mark.parametrize("path, budget", LIST_ENDPOINT_BUDGETS)
+def test_list_endpoint_queries_do_not_grow_with_rows(
+    client, db, admin_user, admin_token, teacher_user, max_queries, path, budget
+):
+    for n in (1, 2):
+        _seed_catalog(db, n, teacher_user, admin_user)
+    with max_queries(budget) as small:
+        assert client.get(path, headers=_auth(admin_token)).status_code == 200
+
+    for n in range(3, 7):
+        _seed_catalog(db, n, teacher_user, admin_user)
+    principal_cache.clear()
+    with max_queries(budget) as large:
+        assert client.get(path, headers=_auth(admin_token)).status_code == 200
+
+    assert large.count == small.count
@@ -0,0 +1,184 @@
+# tests/test_rate_limit.py
+# GCRA rate limiter tests
+
+from fastapi import status
+
+from app.core.rate_limit import (
+    LocalRateLimitBackend,
+    RateLimit,
+    RateLimiter,
+    parse_limits,
+    parse_role_limits,
+)
+
+
+def test_gcra_allows_burst_then_rejects():
+    backend = LocalRateLimitBackend(max_keys=10)
+    rate = RateLimit("general", limit=5, period_seconds=60, burst=5)
+
+    decisions = [backend.hit("1.2.3.4", rate) for _ in range(6)]
+
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert decisions[0].remaining == 4
+    assert decisions[4].remaining == 0
+    # One emission interval (60 / 5 = 12 s) must pass before the next request.
+    assert 11 < decisions[5].retry_after <= 12
+
+
+def test_local_backend_evicts_least_recently_used_keys():
+    backend = LocalRateLimitBackend(max_keys=2)
+    rate = RateLimit("general", limit=1, period_seconds=60, burst=1)
+
+    assert backend.hit("a", rate).allowed
+    assert backend.hit("b", rate).allowed
+    assert backend.hit("c", rate).allowed  # evicts "a"
+
+    assert backend.hit("a", rate).allowed
+    assert not backend.hit("c", rate).allowed
+
+
+def test_limits_resolve_by_route_and_role():
+    limiter = RateLimiter(
+        backend=LocalRateLimitBackend(max_keys=10),
+        routes=[("/api/v1/auth", "auth")],
+        limits=parse_limits("general=120/60,auth=60/60/10"),
+        role_limits=parse_role_limits("ADMIN:general=600/60"),
+    )
+
+    assert limiter.resolve("/api/v1/auth/login").bucket == "auth"
+    assert limiter.resolve("/api/v1/auth/login").burst == 10
+    assert limiter.resolve("/api/v1/users").limit == 120
+    assert limiter.resolve("/api/v1/users", role="ADMIN").limit == 600
+    assert limiter.resolve("/api/v1/users", role="STUDENT").limit == 120
+
+
+def test_parse_limits_skips_invalid_entries():
+    assert set(parse_limits("general=120/60,broken=abc,zero=0/60")) == {"general"}
+
+
+def test_middleware_returns_429_with_retry_after(client, monkeypatch):
+    from app.core import rate_limit
+
+    limiter = RateLimiter(
+        backend=LocalRateLimitBackend(max_keys=10),
+        routes=[],
+        limits=parse_limits("general=2/60"),
+    )
+    monkeypatch.setattr(rate_limit.rate_limiter, "check", limiter.check)
+
+    assert client.get("/").status_code == status.HTTP_200_OK
+    response = client.get("/")
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    response = client.get("/")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["data"] == {"bucket": "general", "limit": 2}
+
+
+def test_mark_bucket_matches_whole_path_segments():
+    from app.core.rate_limit import ROUTE_BUCKETS
+
+    limiter = RateLimiter(
+        backend=LocalRateLimitBackend(max_keys=10),
+        routes=ROUTE_BUCKETS,
+        limits=parse_limits("general=120/60,mark=10/60/5"),
+    )
+
+    assert limiter.resolve("/api/v1/attendance/mark").bucket == "mark"
+    assert limiter.resolve("/api/v1/attendance/mark-absent/3").bucket == "general"
+
+
+def test_authenticated_requests_are_limited_per_user(client, student_token, teacher_token, monkeypatch):
+    """Students behind one NAT address do not share a bucket."""
+    from app.core import rate_limit
+
+    limiter = RateLimiter(
+        backend=LocalRateLimitBackend(max_keys=10),
+        routes=[],
+        limits=parse_limits("general=1/60"),
+    )
+    monkeypatch.setattr(rate_limit.rate_limiter, "check", limiter.check)
+
+    student = {"Authorization": f"Bearer {student_token}"}
+    teacher = {"Authorization": f"Bearer {teacher_token}"}
+    assert client.get("/", headers=student).status_code == status.HTTP_200_OK
+    assert client.get("/", headers=teacher).status_code == status.HTTP_200_OK
+    assert client.get("/", headers=student).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_refreshes_are_limited_per_token_family(client, student_user, monkeypatch):
+    """A class refreshing behind one NAT address does not share a bucket."""
+    from app.core import rate_limit
+    from app.security.jwt_token import create_refresh_token
+    from app.security.refresh_tokens import refresh_tokens
+
+    limiter = RateLimiter(
+        backend=LocalRateLimitBackend(max_keys=10),
+        routes=rate_limit.ROUTE_BUCKETS,
+        limits=parse_limits("general=120/60,auth=1/60,refresh=1/60"),
+    )
+    monkeypatch.setattr(rate_limit.rate_limiter, "check", limiter.check)
+    first, second = (create_refresh_token(refresh_tokens.issue(student_user.id)) for _ in range(2))
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.json()["data"]["bucket"] == "refresh"
+
+
+def test_blocking_backend_is_checked_off_the_event_loop(client, monkeypatch):
+    import asyncio
+
+    from app.core import rate_limit
+
+    class RecordingBackend(LocalRateLimitBackend):
+        blocking = True
+        on_loop = []
+
+        def hit(self, key, rate):
+            try:
+                asyncio.get_running_loop()
+                self.on_loop.append(True)
+            except RuntimeError:
+                self.on_loop.append(False)
+            return super().hit(key, rate)
+
+    backend = RecordingBackend(max_keys=10)
+    monkeypatch.setattr(rate_limit.rate_limiter, "backend", backend)
+
+    assert client.get("/").status_code == status.HTTP_200_OK
+    assert backend.on_loop == [False]
+
+
+def test_client_ip_uses_trusted_forwarded_hop(monkeypatch):
+    from starlette.requests import Request
+
+    from app.core import client_ip as client_ip_module
+    from app.core.config import settings
+
+    def make_request(peer, forwarded):
+        return Request(
+            {
+                "type": "http",
+                "client": (peer, 1234),
+                "headers": [(b"x-forwarded-for", forwarded.encode())],
+            }
+        )
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "172.16.0.0/12")
+    client_ip_module._trusted_networks.cache_clear()
+    try:
+        # The left-most entry is client-supplied; nginx appends the real peer.
+        request = make_request("172.18.0.5", "6.6.6.6, 203.0.113.7")
+        assert client_ip_module.client_ip(request) == "203.0.113.7"
+
+        # Headers from untrusted peers are ignored.
+        request = make_request("198.51.100.1", "203.0.113.7")
+        assert client_ip_module.client_ip(request) == "198.51.100.1"
+    finally:
+        client_ip_module._trusted_networks.cache_clear()
@@ -35,3 +35,149 @@ def test_get_today_timetable(client, teacher_token):
     payload = response.json()
     assert payload["success"] is True
     assert isinstance(payload["data"], list)
+
+
+def _slot_payload(timetable, **overrides):
+    payload = {
+        "division_id": timetable.division_id,
+        "teacher_id": timetable.teacher_id,
+        "location_id": timetable.location_id,
+        "subject_id": timetable.subject_id,
+        "lecture_type": "THEORY",
+        "day_of_week": "MON",
+        "start_time": "11:00:00",
+        "end_time": "12:00:00",
+        "semester": timetable.semester,
+        "academic_year": timetable.academic_year,
+        "is_active": True,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_create_timetable_rejects_overlapping_slot(client, admin_token, timetable):
+    response = client.post(
+        "/api/v1/timetables",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json=_slot_payload(timetable, start_time="09:30:00", end_time="10:30:00"),
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_create_timetable_rejects_teacher_clash_in_another_semester(client, db, admin_token, timetable, branch):
+    from app.database.divisions import Division
+
+    third_semester = Division(
+        name="C", branch_id=branch.id, year=2, semester=3, academic_year=timetable.academic_year, capacity=60
+    )
+    db.add(third_semester)
+    db.commit()
+
+    clash = _slot_payload(
+        timetable, division_id=third_semester.id, semester=3, start_time="09:30:00", end_time="10:30:00"
+    )
+    response = client.post("/api/v1/timetables", headers={"Authorization": f"Bearer {admin_token}"}, json=clash)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    detail = str(response.json())
+    assert "Teacher" in detail and "Location" in detail
+    assert "Division" not in detail
+
+
+def test_next_term_slot_does_not_clash_with_this_term(client, db, admin_token, timetable, branch):
+    """Odd and even semesters of one academic year never run at the same time."""
+    from app.database.divisions import Division
+
+    second_semester = Division(
+        name="D", branch_id=branch.id, year=1, semester=2, academic_year=timetable.academic_year, capacity=60
+    )
+    db.add(second_semester)
+    db.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    next_term = _slot_payload(
+        timetable, division_id=second_semester.id, semester=2, start_time="09:30:00", end_time="10:30:00"
+    )
+
+    response = client.post("/api/v1/timetables/import", headers=headers, json={"items": [next_term]})
+    assert response.status_code == status.HTTP_200_OK
+
+    clash = {**next_term, "division_id": timetable.division_id, "semester": timetable.semester + 2}
+    response = client.post("/api/v1/timetables", headers=headers, json=clash)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_create_timetable_allows_back_to_back_slot(client, admin_token, timetable):
+    response = client.post(
+        "/api/v1/timetables",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json=_slot_payload(timetable, start_time="10:00:00", end_time="11:00:00"),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["success"] is True
+
+
+def test_import_timetables(client, admin_token, timetable):
+    response = client.post(
+        "/api/v1/timetables/import",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={
+            "items": [
+                _slot_payload(timetable, day_of_week="TUE"),
+                _slot_payload(timetable, day_of_week="WED"),
+            ]
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"]["imported"] == 2
+
+
+def test_import_timetables_rejects_clash_within_payload(client, admin_token, timetable):
+    response = client.post(
+        "/api/v1/timetables/import",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={
+            "items": [
+                _slot_payload(timetable, day_of_week="TUE"),
+                _slot_payload(timetable, day_of_week="TUE", start_time="11:30:00", end_time="12:30:00"),
+            ]
+        },
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    errors = response.json()["data"]["errors"]
+    assert [error["index"] for error in errors] == [1]
+
+
+def _make_live(db, timetable):
+    from datetime import time
+    from app.services.active_sessions import WEEKDAYS, active_session_index, campus_now
+
+    timetable.day_of_week = WEEKDAYS[campus_now().weekday()]
+    timetable.start_time = time(0, 0)
+    timetable.end_time = time(23, 59, 59)
+    db.commit()
+    active_session_index.invalidate()
+
+
+def test_get_live_timetables(client, db, teacher_token, timetable):
+    _make_live(db, timetable)
+
+    response = client.get(
+        f"/api/v1/timetables/live?location_id={timetable.location_id}&teacher_id={timetable.teacher_id}",
+        headers={"Authorization": f"Bearer {teacher_token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()["data"]] == [timetable.id]
+
+
+def test_get_live_timetables_requires_filter(client, teacher_token):
+    response = client.get(
+        "/api/v1/timetables/live",
+        headers={"Authorization": f"Bearer {teacher_token}"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
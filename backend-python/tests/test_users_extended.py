@@ -38,3 +38,26 @@ def test_preferences_create_and_update(client, student_token, student_user):
     body = update_response.json()["data"]
     assert body["theme"] == "dark"
     assert body["notification_email"] is False
+
+
+def test_deactivated_user_token_is_revoked(
+    client, admin_token, student_token, student_user
+):
+    first = client.get(
+        f"/api/v1/users/{student_user.id}",
+        headers={"Authorization": f"Bearer {student_token}"},
+    )
+    assert first.status_code == status.HTTP_200_OK
+
+    deactivate = client.put(
+        f"/api/v1/users/{student_user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"is_active": False},
+    )
+    assert deactivate.status_code == status.HTTP_200_OK
+
+    second = client.get(
+        f"/api/v1/users/{student_user.id}",
+        headers={"Authorization": f"Bearer {student_token}"},
+    )
+    assert second.status_code == status.HTTP_401_UNAUTHORIZED
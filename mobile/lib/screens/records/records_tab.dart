@@ -105,8 +105,12 @@ class _RecordsTabState extends State<RecordsTab> {
     setState(() => _loading = true);
     try {
       final data = await _attendanceService.getTodayAttendance();
-      final items =
-          data['items'] as List? ?? data['present_students'] as List? ?? [];
+      // Each record is sent once in `records`; older servers sent the
+      // present and late ones in `items`.
+      final records = data['records'] as List?;
+      final items = records != null
+          ? records.where((e) => (e as Map)['status'] != 'absent').toList()
+          : data['items'] as List? ?? data['present_students'] as List? ?? [];
 
       if (mounted) {
         setState(() {
@@ -5,7 +5,8 @@ import API_CONFIG from '../config/api.js'
 export const authAPI = {
   register: (data) => apiClient.post('/auth/register', data),
   login: (credentials) => apiClient.post('/auth/login', credentials),
-  logout: () => apiClient.post('/auth/logout'),
+  logout: (refreshToken) =>
+    apiClient.post('/auth/logout', refreshToken ? { refresh_token: refreshToken } : undefined),
   refreshToken: (refreshToken) => apiClient.post('/auth/refresh', { refresh_token: refreshToken }),
   forgotPassword: (email) => apiClient.post('/auth/forgot-password', { email }),
   resetPassword: (token, newPassword) =>
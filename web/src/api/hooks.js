@@ -25,7 +25,7 @@ export const useRegister = () => {
 export const useLogout = () => {
   const queryClient = useQueryClient()
   return useMutation({
-    mutationFn: () => api.authAPI.logout(),
+    mutationFn: () => api.authAPI.logout(useAuthStore.getState().refreshToken),
     onSuccess: () => {
       queryClient.clear()
       useAuthStore.getState().logout()